@@ -0,0 +1,44 @@
+"""Benchmark the import time of the CLI, and check it against a budget.
+
+The CLI is imported in fresh interpreters, and the fastest of several runs is
+compared to the budget, as the CLI is run at every refresh of e.g. status bars.
+Exits with an error, if the budget is exceeded.
+
+Usage:
+    poetry run python benchmarks/bench_import.py [budget in ms]
+"""
+
+import subprocess
+import sys
+import time
+
+# milliseconds to import the CLI in, on top of starting a bare interpreter
+BUDGET_MS = 250.0
+REPEAT = 5
+
+
+def interpreter_time(code: str) -> float:
+    """Return seconds to run code in a fresh interpreter, fastest of several."""
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+
+    bare = interpreter_time("pass")
+    cli = interpreter_time("import optimal_congress.cli")
+    import_ms = (cli - bare) * 1e3
+
+    print(f"interpreter startup: {bare * 1e3:.0f} ms")
+    print(f"import of CLI:       {import_ms:.0f} ms (budget: {budget_ms:.0f} ms)")
+    if import_ms > budget_ms:
+        sys.exit("Import of CLI exceeds budget.")
+
+
+if __name__ == "__main__":
+    main()
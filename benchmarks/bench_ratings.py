@@ -0,0 +1,76 @@
+"""Benchmark joining events with ratings, and filtering latest ratings.
+
+Both should scale linearly with the number of ratings, so the time per rating
+should stay about constant across sizes.
+
+Usage:
+    poetry run python benchmarks/bench_ratings.py
+"""
+
+import random
+import timeit
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from pytz import timezone
+
+from optimal_congress.ratings import filter_latest_ratings, join_events_with_ratings
+from optimal_congress.schema import Event, Rating
+
+TZ_DE = timezone("Europe/Berlin")
+SIZES = [1_000, 2_000, 4_000, 8_000, 16_000]
+
+
+def generate(num_events: int, seed: int = 42) -> tuple[set[Event], set[Rating]]:
+    """Generate events, and three ratings of each of them over time."""
+    rng = random.Random(seed)
+    start = TZ_DE.localize(datetime(2023, 12, 27, 10))
+    events = set()
+    ratings = set()
+    for i in range(num_events):
+        schedule_start = start + timedelta(minutes=15 * rng.randint(0, 400))
+        event = Event(
+            id=uuid4(),
+            name=f"event {i}",
+            slug=f"event-{i}",
+            track=None,
+            assembly="foo",
+            room=None,
+            description="foo",
+            schedule_start=schedule_start,
+            schedule_end=schedule_start + timedelta(hours=1),
+        )
+        events.add(event)
+        for day in range(3):
+            ratings.add(
+                Rating(
+                    event_id=event.id,
+                    score=rng.randint(0, 10),
+                    timestamp=datetime(2023, 12, 1 + day, rng.randint(0, 23)),
+                )
+            )
+    return events, ratings
+
+
+def main() -> None:
+    print(f"{'ratings':>8} {'latest [µs/rating]':>20} {'join [µs/rating]':>18}")
+    for size in SIZES:
+        events, ratings = generate(size // 3)
+        latest = min(
+            timeit.repeat(lambda: filter_latest_ratings(ratings), number=1, repeat=5)
+        )
+        join = min(
+            timeit.repeat(
+                lambda: join_events_with_ratings(ratings=ratings, events=events),
+                number=1,
+                repeat=5,
+            )
+        )
+        print(
+            f"{len(ratings):>8} {latest / len(ratings) * 1e6:>20.2f} "
+            f"{join / len(ratings) * 1e6:>18.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
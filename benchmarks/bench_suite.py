@@ -0,0 +1,223 @@
+"""Benchmark the phases of the optimizer on synthetic programmes of growing size.
+
+Loading the cache, joining ratings, finding conflicts, building the program and
+solving are timed separately, as the fastest of several runs. Results are
+written to JSON, and compared to a baseline from an earlier run on the same
+machine. Exits with an error, if any phase is slower than its baseline by more
+than the tolerance.
+
+Usage:
+    poetry run python benchmarks/bench_suite.py --save-baseline
+    poetry run python benchmarks/bench_suite.py --output results.json
+    poetry run python benchmarks/bench_suite.py --scenario congress --repeat 5
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import timeit
+from collections.abc import Callable
+from datetime import datetime, time
+from pathlib import Path
+
+from synthetic import ProgrammeSpec, generate_programme, generate_ratings
+
+from optimal_congress import milp
+from optimal_congress.constraints import BreakWindow, ScheduleConstraints
+from optimal_congress.io import cache
+from optimal_congress.optimize import solve_schedule
+from optimal_congress.ratings import filter_latest_ratings, join_events_with_ratings
+from optimal_congress.schema import Conflicts, TransitTimes
+from optimal_congress.solvers import ScheduleProblem, SolverOptions
+
+# programmes of a small conference, a congress, and beyond
+SCENARIOS = {
+    "small": ProgrammeSpec(num_events=200, num_rooms=4),
+    "congress": ProgrammeSpec(num_events=1_000, num_rooms=20),
+    "large": ProgrammeSpec(num_events=5_000, num_rooms=100),
+}
+# limits on load of a schedule, with lunch and dinner breaks
+LIMITS = ScheduleConstraints(
+    max_hours_per_day=6,
+    breaks=[
+        BreakWindow(start=time(12), end=time(14), minutes=45),
+        BreakWindow(start=time(18), end=time(20), minutes=45),
+    ],
+    max_consecutive=3,
+)
+MILP_MAX_EVENTS = 1_000  # larger programmes take too long to solve repeatedly by CBC
+BASELINE = Path(__file__).parent / "baseline.json"
+TOLERANCE = 0.5  # relative slowdown flagged as regression, above noise between runs
+NOISE_S = 0.002  # absolute slowdown below which timings are considered noise
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """Return seconds of the fastest of several runs of a function."""
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def run_scenario(spec: ProgrammeSpec, repeat: int) -> dict[str, float]:
+    """Time each phase of the optimizer on a synthetic programme.
+
+    Args:
+        spec: Parameters of the programme, and of its ratings.
+        repeat: Number of runs per phase, of which the fastest is kept.
+    Returns:
+        Seconds by phase.
+    """
+    events, rooms = generate_programme(spec)
+    ratings = set(generate_ratings(events, spec))
+    event_ratings = join_events_with_ratings(
+        ratings=filter_latest_ratings(ratings), events=set(events)
+    )
+    rated_events = [event_rating.event for event_rating in event_ratings]
+    problem = ScheduleProblem(
+        events=rated_events,
+        scores=[event_rating.rating.score for event_rating in event_ratings],
+        conflicts=Conflicts.from_events(rated_events),
+    )
+    options = SolverOptions()
+
+    timings = {}
+    original = cache.DIR_EVENTS_CACHE, cache.FILE_EVENTS_CACHE
+    with tempfile.TemporaryDirectory() as directory:
+        # point events cache to a temporary directory, while loading it
+        cache.DIR_EVENTS_CACHE = Path(directory)
+        cache.FILE_EVENTS_CACHE = Path(directory) / "events.json"
+        try:
+            cache.save_events(set(events))
+
+            timings["cache_load"] = best_time(
+                lambda: cache.load_events(exit_if_empty=False), repeat
+            )
+            timings["cache_load_store"] = best_time(
+                lambda: cache.load_event_store(exit_if_empty=False), repeat
+            )
+            store = cache.load_event_store(exit_if_empty=False)
+        finally:
+            cache.DIR_EVENTS_CACHE, cache.FILE_EVENTS_CACHE = original
+
+    timings["latest_ratings"] = best_time(
+        lambda: filter_latest_ratings(ratings), repeat
+    )
+    latest, events_set = filter_latest_ratings(ratings), set(events)
+    timings["join"] = best_time(
+        lambda: join_events_with_ratings(ratings=latest, events=events_set), repeat
+    )
+    timings["conflicts"] = best_time(lambda: Conflicts.from_events(events), repeat)
+    timings["conflicts_store"] = best_time(lambda: store.conflicts("pairwise"), repeat)
+    transit = TransitTimes.from_rooms(rooms)
+    timings["conflicts_transit"] = best_time(
+        lambda: store.conflicts("pairwise", transit=transit), repeat
+    )
+    timings["model_build"] = best_time(
+        lambda: milp.build_milp(problem=problem, options=options), repeat
+    )
+    solvers = ["dp", "cbc"] if spec.num_events <= MILP_MAX_EVENTS else ["dp"]
+    for solver in solvers:
+        timings[f"solve_{solver}"] = best_time(
+            lambda: solve_schedule(
+                event_ratings=event_ratings,
+                solver=solver,
+                conflicts=problem.conflicts,
+            ),
+            repeat,
+        )
+    if spec.num_events <= MILP_MAX_EVENTS:
+        timings["solve_cbc_limits"] = best_time(
+            lambda: solve_schedule(
+                event_ratings=event_ratings,
+                solver="cbc",
+                conflicts=problem.conflicts,
+                constraints=LIMITS,
+            ),
+            repeat,
+        )
+    return timings
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    """Print results next to baseline, and return phases that regressed.
+
+    Args:
+        results: Seconds by phase, by scenario.
+        baseline: Seconds by phase, by scenario, of an earlier run.
+        tolerance: Relative slowdown that is flagged as regression.
+    Returns:
+        Names of regressed phases, as 'scenario/phase'.
+    """
+    regressions = []
+    print(f"\n{'phase':<28} {'time [ms]':>10} {'baseline [ms]':>14} {'ratio':>7}")
+    for scenario, timings in results.items():
+        for phase, seconds in timings.items():
+            name = f"{scenario}/{phase}"
+            before = baseline.get(scenario, {}).get(phase)
+            if before is None:
+                print(f"{name:<28} {seconds * 1e3:>10.1f} {'-':>14} {'-':>7}")
+                continue
+            regressed = (
+                seconds > before * (1 + tolerance) and seconds - before > NOISE_S
+            )
+            if regressed:
+                regressions.append(name)
+            print(
+                f"{name:<28} {seconds * 1e3:>10.1f} {before * 1e3:>14.1f} "
+                f"{seconds / before:>7.2f}{'  REGRESSION' if regressed else ''}"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=list(SCENARIOS),
+        help="Scenario to run, can be given several times. Defaults to all.",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per phase.")
+    parser.add_argument("--output", type=Path, help="JSON file to write results to.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Write results as baseline."
+    )
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    results = {}
+    for scenario in args.scenario or list(SCENARIOS):
+        print(f"running scenario '{scenario}'...")
+        results[scenario] = run_scenario(SCENARIOS[scenario], repeat=args.repeat)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scenarios": {
+            scenario: SCENARIOS[scenario].model_dump() for scenario in results
+        },
+        "results": results,
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())["results"]
+    regressions = compare(results, baseline, tolerance=args.tolerance)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"\nSaved baseline to {args.baseline}.")
+    elif regressions:
+        sys.exit(f"\n{len(regressions)} phases regressed: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
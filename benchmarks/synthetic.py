@@ -0,0 +1,117 @@
+"""Generate synthetic programmes and rating histories of congress scale.
+
+Events are scheduled back to back in parallel rooms, with changeover breaks in
+between, over the days of a congress. Durations are drawn from a distribution,
+and rating histories contain several revisions of some ratings over time.
+"""
+
+import random
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+from pytz import timezone
+
+from optimal_congress.schema import Event, EventLanguage, Rating, Room
+
+TZ_DE = timezone("Europe/Berlin")
+
+# durations in minutes, with their relative frequency, of talks and workshops
+DURATIONS = {20: 1.0, 40: 4.0, 60: 2.0, 120: 1.0}
+
+
+class ProgrammeSpec(BaseModel):
+    """Parameters of a synthetic programme, and of ratings of its events."""
+
+    num_events: int
+    num_rooms: int = Field(description="Number of parallel rooms.")
+    durations: dict[int, float] = Field(
+        default=DURATIONS, description="Relative frequency of durations in minutes."
+    )
+    rated_fraction: float = Field(default=0.3, description="Share of rated events.")
+    revisions: float = Field(
+        default=0.5, description="Mean number of re-ratings per rated event."
+    )
+    seed: int = 42
+
+    class Config:
+        frozen = True  # instances immutable and hashable
+
+
+def generate_programme(spec: ProgrammeSpec) -> tuple[list[Event], list[Room]]:
+    """Generate events in parallel rooms, from 10:30 to 02:00 on each day.
+
+    Args:
+        spec: Parameters of the programme.
+    Returns:
+        Events, and the rooms they are held in.
+    """
+    rng = random.Random(spec.seed)
+    rooms = [
+        Room(id=UUID(int=rng.getrandbits(128)), name=f"Saal {i}", assembly="congress")
+        for i in range(spec.num_rooms)
+    ]
+    durations, weights = list(spec.durations), list(spec.durations.values())
+    first_day = datetime(2023, 12, 27, 10, 30)
+
+    languages: list[list[EventLanguage]] = [["de"], ["en"], ["de", "en"]]
+    events: list[Event] = []
+    for i in range(spec.num_events):
+        room = rooms[i % spec.num_rooms]
+        # events of a room follow each other, starting on the first day
+        if i < spec.num_rooms:
+            start = first_day
+        else:
+            start = events[i - spec.num_rooms].schedule_end.replace(tzinfo=None)
+            start += timedelta(minutes=rng.choice([10, 15, 20, 30]))
+        duration = timedelta(minutes=rng.choices(durations, weights)[0])
+        # continue on next day, once past 02:00
+        day_end = datetime.combine(start.date(), datetime.min.time()) + timedelta(
+            hours=26 if start.hour >= 10 else 2
+        )
+        if start + duration > day_end:
+            start = datetime.combine(day_end.date(), first_day.time())
+        events.append(
+            Event(
+                id=UUID(int=rng.getrandbits(128)),
+                name=f"event {i}",
+                slug=f"event-{i}",
+                track=rng.choice(["Hardware", "Security", "Ethics", "Science", None]),
+                assembly=room.assembly,
+                room=room.id,
+                language=rng.choice(languages),
+                description=" ".join(["lorem ipsum"] * rng.randint(20, 100)),
+                schedule_start=TZ_DE.localize(start),
+                schedule_end=TZ_DE.localize(start + duration),
+            )
+        )
+    return events, rooms
+
+
+def generate_ratings(events: list[Event], spec: ProgrammeSpec) -> list[Rating]:
+    """Generate ratings of some events, with earlier revisions of some of them.
+
+    Args:
+        events: Events to rate.
+        spec: Parameters of the ratings.
+    Returns:
+        Ratings, with several ratings of some events at different times.
+    """
+    rng = random.Random(spec.seed)
+    rated = rng.sample(events, round(len(events) * spec.rated_fraction))
+    ratings = []
+    for event in rated:
+        # number of re-ratings is geometrically distributed with given mean
+        num_ratings = 1
+        while rng.random() < spec.revisions / (1 + spec.revisions):
+            num_ratings += 1
+        for _ in range(num_ratings):
+            ratings.append(
+                Rating(
+                    event_id=event.id,
+                    score=rng.randint(0, 10),
+                    timestamp=datetime(2023, 12, 1)
+                    + timedelta(minutes=rng.randint(0, 26 * 24 * 60)),
+                )
+            )
+    return ratings
@@ -0,0 +1,70 @@
+"""Functions to detect changes of events between fetches."""
+
+import hashlib
+
+from pydantic import BaseModel, Field
+
+from optimal_congress.schema import Event
+
+
+class EventChanges(BaseModel):
+    """Changes of events, from cached events to fetched events."""
+
+    new: set[Event] = Field(description="Fetched events, which were not cached.")
+    removed: set[Event] = Field(description="Cached events, which were not fetched.")
+    modified: set[Event] = Field(description="Fetched events, with changed content.")
+    rescheduled: dict[Event, Event] = Field(
+        description="Cached events by fetched events, of which time or room changed."
+    )
+
+    class Config:
+        frozen = True  # instances immutable
+
+    def __bool__(self) -> bool:
+        """Changes are truthy, if any event was added, removed or modified."""
+        return bool(self.new or self.removed or self.modified)
+
+
+def content_hash(event: Event) -> str:
+    """Hash all fields of an event, as events are equal by ID only.
+
+    Args:
+        event: Event to hash.
+    Returns:
+        Hex digest of serialized event.
+    """
+    return hashlib.blake2b(event.model_dump_json().encode(), digest_size=16).hexdigest()
+
+
+def diff_events(cached: set[Event], fetched: set[Event]) -> EventChanges:
+    """Find new, removed, and modified events, by hashes of their content.
+
+    Args:
+        cached: Events in cache.
+        fetched: Events fetched from API.
+    Returns:
+        Changes from cached to fetched events.
+    """
+    cached_by_id = {event.id: event for event in cached}
+    fetched_by_id = {event.id: event for event in fetched}
+
+    modified = set()
+    rescheduled = {}
+    for event_id in cached_by_id.keys() & fetched_by_id.keys():
+        old, new = cached_by_id[event_id], fetched_by_id[event_id]
+        if content_hash(old) == content_hash(new):
+            continue
+        modified.add(new)
+        if (old.schedule_start, old.schedule_end, old.room) != (
+            new.schedule_start,
+            new.schedule_end,
+            new.room,
+        ):
+            rescheduled[new] = old
+
+    return EventChanges(
+        new={fetched_by_id[i] for i in fetched_by_id.keys() - cached_by_id.keys()},
+        removed={cached_by_id[i] for i in cached_by_id.keys() - fetched_by_id.keys()},
+        modified=modified,
+        rescheduled=rescheduled,
+    )
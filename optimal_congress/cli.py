@@ -3,36 +3,66 @@
 # %%
 import logging
 import os
+import sys
+from datetime import datetime, time
 from importlib import metadata
 from pathlib import Path
+from uuid import UUID
 
-import pandas as pd
 import typer
-from rich.console import Console
-from rich.table import Table
+from pytz import timezone
 from typing_extensions import Annotated
 
-from optimal_congress.io.api import fetch_events, fetch_rooms
+from optimal_congress.changes import diff_events
+from optimal_congress.config import DIR_RATINGS_CACHE
+from optimal_congress.constraints import BreakWindow, ScheduleConstraints
 from optimal_congress.io.cache import (
+    load_event_store,
     load_events,
     load_ratings,
     load_rooms,
+    load_validators,
+    load_warm_start,
     save_events,
-    save_rating,
+    save_ratings,
     save_rooms,
+    save_validators,
+    save_warm_start,
 )
-from optimal_congress.optimize import optimize_schedule
+from optimal_congress.io.export import save_schedules
+from optimal_congress.optimize import (
+    load_or_find_conflicts,
+    solve_batch,
+    solve_rolling,
+    solve_schedule,
+)
+from optimal_congress.profiling import phase
 from optimal_congress.ratings import (
+    compact_ratings,
     enquire_and_save_ratings,
     filter_latest_ratings,
-    filter_unrated_events,
     join_events_with_ratings,
 )
-from optimal_congress.schema import EventLanguage, Rating, RatingsExport, Room
+from optimal_congress.schema import (
+    Conflicts,
+    Event,
+    EventLanguage,
+    Formulation,
+    Rating,
+    Room,
+    TransitTimes,
+    index_rooms,
+)
+from optimal_congress.solvers import SOLVERS, SolverOptions
 
 # deactivate color for rich/colorama
 os.environ["NO_COLOR"] = "1"
 
+# Heavy dependencies are imported only by the commands that need them, to keep
+# the startup of the CLI fast: requests by `fetch`, rich by commands printing
+# tables, pandas by `dump` and `load`, PuLP by MILP solver backends, and NumPy
+# by commands that filter events in arrays.
+
 app = typer.Typer(
     add_completion=False,
     context_settings={"help_option_names": ["-h", "--help"]},
@@ -43,17 +73,70 @@ app = typer.Typer(
 # %%
 @app.callback()
 def users_callback(
+    ctx: typer.Context,
     verbose: bool = typer.Option(
         False,
         "-v",
         "--verbose",
         help="Include debug messages in output.",
     ),
+    debug_lp: bool = typer.Option(
+        False,
+        "--debug-lp",
+        help="Include linear programs and their solutions in debug messages "
+        "(with --verbose). Slow on large programs.",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print the time spent in each phase of the command, "
+        "e.g. cache read, join, model build and solve.",
+    ),
+    profile_output: Path | None = typer.Option(
+        None,
+        "--profile-output",
+        help="Write a JSON trace of the phases to this file, "
+        "or cProfile statistics if it ends with '.prof'. Implies --profile.",
+    ),
 ) -> None:
     """Optimize your personal schedule for the 38c3."""
     # set log level
     log_level = logging.DEBUG if verbose else logging.INFO
     logging.basicConfig(level=log_level, format="%(message)s")
+    # linear programs are expensive to format, so log them only if requested
+    logging.getLogger("optimal_congress.lp").setLevel(
+        logging.DEBUG if debug_lp else logging.INFO
+    )
+
+    if profile or profile_output is not None:
+        profile_command(ctx=ctx, output=profile_output)
+
+
+def profile_command(ctx: typer.Context, output: Path | None) -> None:
+    """Profile the phases of the command, and report them once it finished."""
+    from optimal_congress.profiling import start_profiling, stop_profiling
+
+    profiler = None
+    if output is not None and output.suffix == ".prof":
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    start_profiling()
+
+    def report() -> None:
+        phases = stop_profiling()
+        if phases is not None:
+            print(f"\n{phases.report()}", file=sys.stderr)
+        if profiler is not None and output is not None:
+            profiler.disable()
+            profiler.dump_stats(output)
+            print(f"Wrote cProfile statistics to {output}.", file=sys.stderr)
+        elif phases is not None and output is not None:
+            phases.save_trace(output)
+            print(f"Wrote trace of phases to {output}.", file=sys.stderr)
+
+    ctx.call_on_close(report)
 
 
 @app.command()
@@ -62,45 +145,103 @@ def fetch(
         default=False, help="At dryrun, local cache is not changed."
     ),
 ) -> None:
-    """Fetch events and rooms from API, and update local cache."""
+    """Fetch events and rooms from API, and update local cache.
 
-    # fetch from API
+    Events and rooms are only fetched, if they were modified since last fetch.
+    """
+    from optimal_congress.io.api import fetch_endpoints
+
+    events_cache = load_events(exit_if_empty=False)
+    rooms_cache = load_rooms(exit_if_empty=False)
+
+    # fetch from API concurrently, unless not modified since cached
     print("Fetching events and rooms from API...")
-    events_api = fetch_events()
-    rooms_api = fetch_rooms()
+    fetched = fetch_endpoints(
+        validators={
+            "events": load_validators("events") if events_cache else None,
+            "rooms": load_validators("rooms") if rooms_cache else None,
+        }
+    )
+    events_api, events_validators = fetched["events"]
+    rooms_api, rooms_validators = fetched["rooms"]
+    if events_api is None and rooms_api is None:
+        print("Events and rooms not modified since last fetch.")
+        exit()
+    events_api = events_cache if events_api is None else events_api
+    rooms_api = rooms_cache if rooms_api is None else rooms_api
 
     # print summary
     print(f"Fetched {len(events_api)} events and {len(rooms_api)} rooms from API.")
 
     print("\nComparing API with cache...")
-    events_cache = load_events(exit_if_empty=False)
 
-    # check for changes
-    new_events = events_api - events_cache
-    removed_events = events_cache - events_api
+    # check for changes, by content of events
+    changes = diff_events(cached=events_cache, fetched=events_api)
     # report changes
     print(
-        f"Found {len(new_events)} new events, and {len(removed_events)} removed events."
+        f"Found {len(changes.new)} new events, {len(changes.removed)} removed events, "
+        f"and {len(changes.modified)} modified events, "
+        f"of which {len(changes.rescheduled)} were rescheduled."
     )
-    if new_events:
+    if changes.new:
         print("\nNew events:")
-        for event in new_events:
+        for event in changes.new:
             print(f"- {event.name[:50]:.<52}{event.url}")
-    if removed_events:
+    if changes.removed:
         print("\nRemoved events:")
-        for event in removed_events:
+        for event in changes.removed:
             print(f"- {event.name[:50]:.<52}{event.url}")
+    if changes.rescheduled:
+        rooms_by_id = index_rooms(rooms_api | rooms_cache)
+        print("\nRescheduled events:")
+        for new, old in sorted(
+            changes.rescheduled.items(), key=lambda item: item[0].schedule_start
+        ):
+            print(
+                f"- {new.name[:50]:.<52}"
+                f"{format_slot(old, rooms_by_id)} -> {format_slot(new, rooms_by_id)}"
+            )
+
+    # changes of previous schedule invalidate it
+    warm_start = load_warm_start()
+    if warm_start is not None:
+        invalidated = {
+            event.id
+            for event in changes.removed | set(changes.rescheduled)
+            if event.id in warm_start.scheduled
+        }
+        if invalidated:
+            print(
+                f"\n{len(invalidated)} events of your last schedule were removed or "
+                "rescheduled. Run `optimize` again to update your schedule."
+            )
 
     # save to cache, if not dryrun
     if dry:
         print("\nDryrun, not updating cache.")
         exit()
-    print("\nUpdating cache...")
-    save_events(events_api)
-    save_rooms(rooms_api)
+    # write only what changed
+    if changes or rooms_api != rooms_cache:
+        print("\nUpdating cache...")
+    if changes:
+        save_events(events_api)
+    if rooms_api != rooms_cache:
+        save_rooms(rooms_api)
+    # only now, cache matches validators of responses
+    save_validators("events", events_validators)
+    save_validators("rooms", rooms_validators)
     print("Done.")
 
 
+def format_slot(event: Event, rooms: dict[UUID, Room]) -> str:
+    """Format time and room of an event, e.g. 'Fri 27 10:00-11:00 Saal 1'."""
+    start_time = event.schedule_start.strftime("%a %d %H:%M")
+    end_time = event.schedule_end.strftime("%H:%M")
+    room = rooms.get(event.room) if event.room is not None else None
+    room_name = room.name if room is not None else str()
+    return f"{start_time}-{end_time} {room_name[:15]}".strip()
+
+
 @app.command()
 def rate(
     language: str | None = typer.Option(
@@ -115,6 +256,8 @@ def rate(
     Example:
     optimal-congress rate --language en
     """
+    import numpy as np
+
     # validate input
     if language is not None and language not in EventLanguage.__args__:  # type: ignore
         raise typer.BadParameter(
@@ -123,39 +266,33 @@ def rate(
         )
 
     print("loading events and ratings from cache...")
-    events = load_events(exit_if_empty=True)
+    store = load_event_store(exit_if_empty=True)
     ratings = load_ratings(exit_if_empty=False)
 
-    print(f"\nFound {len(events)} events and {len(ratings)} ratings.")
+    print(f"\nFound {len(store)} events and {len(ratings)} ratings.")
 
     # consider previous ratings
-    unrated_events = filter_unrated_events(
-        events=events,
-        ratings=ratings,
-    )
-    if len(unrated_events) == 0:
+    unrated = np.isnan(store.scores(ratings))
+    if not unrated.any():
         print("\nNo new events to rate. Exiting.")
         exit()
 
     # keep only events with relevant language
     if language is not None:
-        unrated_events = {
-            event
-            for event in unrated_events
-            if event.language is not None
-            if language in event.language
-        }
-        if len(unrated_events) == 0:
+        unrated &= store.language_mask(language)  # type: ignore
+        if not unrated.any():
             print(f"\nNo unrated events in chosen language '{language}'. Exiting.")
             exit()
 
-    enquire_and_save_ratings(events=unrated_events)
+    enquire_and_save_ratings(events=set(store.events(np.flatnonzero(unrated))))
     print("Done.")
 
 
 @app.command()
 def ratings() -> None:
     """List all latest ratings."""
+    from rich.console import Console
+    from rich.table import Table
 
     print("loading events, ratings, and rooms from cache...")
     events = load_events(exit_if_empty=True)
@@ -175,31 +312,32 @@ def ratings() -> None:
         reverse=True,
     )
 
-    # define table
-    table = Table(title="Event Ratings")
-    table.add_column(header="Rating", justify="right", no_wrap=True)
-    table.add_column(header="Title")
-    table.add_column(header="URL", justify="center")
-    table.add_column(header="Time")
-
-    # populate table
-    for event_rating in event_ratings_sorted:
-        # format time string
-        start_time = event_rating.event.schedule_start.strftime("%a %d %H:%M")
-        end_time = event_rating.event.schedule_end.strftime("%H:%M")
-        time_string = f"{start_time}-{end_time}"
-
-        table.add_row(
-            str(event_rating.rating.score),
-            event_rating.event.name[:50],
-            f"[link={event_rating.event.url}]🔗[/link]",
-            time_string,
-        )
-
-    # print table
-    print()  # empty line
-    console = Console()
-    console.print(table)
+    with phase("render"):
+        # define table
+        table = Table(title="Event Ratings")
+        table.add_column(header="Rating", justify="right", no_wrap=True)
+        table.add_column(header="Title")
+        table.add_column(header="URL", justify="center")
+        table.add_column(header="Time")
+
+        # populate table
+        for event_rating in event_ratings_sorted:
+            # format time string
+            start_time = event_rating.event.schedule_start.strftime("%a %d %H:%M")
+            end_time = event_rating.event.schedule_end.strftime("%H:%M")
+            time_string = f"{start_time}-{end_time}"
+
+            table.add_row(
+                str(event_rating.rating.score),
+                event_rating.event.name[:50],
+                f"[link={event_rating.event.url}]🔗[/link]",
+                time_string,
+            )
+
+        # print table
+        print()  # empty line
+        console = Console()
+        console.print(table)
 
 
 @app.command()
@@ -210,66 +348,331 @@ def optimize(
         "--min",
         help="Minimum rating required for talk to be considered in optimization.",
     ),
+    solver: str = typer.Option(
+        "auto",
+        "-s",
+        "--solver",
+        help=f"Solver backend, one of {['auto', *SOLVERS]}.",
+    ),
+    formulation: str = typer.Option(
+        "pairwise",
+        "-f",
+        "--formulation",
+        help="Formulation of no-overlap constraints ('pairwise' or 'clique').",
+    ),
+    threads: int | None = typer.Option(
+        None,
+        "--threads",
+        help="Number of threads used by MILP solvers.",
+    ),
+    time_limit: float | None = typer.Option(
+        None,
+        "--time-limit",
+        help="Maximal solving time in seconds, for MILP solvers. "
+        "If exceeded, the best schedule found so far is returned.",
+    ),
+    gap: float | None = typer.Option(
+        None,
+        "--gap",
+        help="Relative gap to optimum at which MILP solvers stop, e.g. 0.01.",
+    ),
+    warm_start: bool = typer.Option(
+        True,
+        "--warm-start/--cold-start",
+        help="Start MILP solvers from previous program and schedule.",
+    ),
+    workers: int | None = typer.Option(
+        None,
+        "-w",
+        "--workers",
+        help="Split problem into independent components of overlapping events, "
+        "and solve them on this number of processes. "
+        "In batch mode, solve attendees on this number of processes instead.",
+    ),
+    batch: list[Path] | None = typer.Option(
+        None,
+        "-b",
+        "--batch",
+        help="Ratings directory of an attendee, to optimize schedules of many "
+        "attendees in one run. Can be given several times.",
+    ),
+    output: Path = typer.Option(
+        Path("schedules.json"),
+        "-o",
+        "--output",
+        help="JSON file to which schedules are written in batch mode.",
+    ),
+    at: str | None = typer.Option(
+        None,
+        "--at",
+        help="Re-optimize only events from this time on ('now', or e.g. "
+        "'2024-12-28T14:00'), keeping events of the last schedule that started "
+        "before.",
+    ),
+    transit: bool = typer.Option(
+        False,
+        "--transit",
+        help="Leave time to get from room to room between scheduled events: "
+        "5 minutes within an assembly, and 10 minutes otherwise.",
+    ),
+    transit_matrix: Path | None = typer.Option(
+        None,
+        "--transit-matrix",
+        help="JSON file of minutes from room to room, by room IDs, e.g. "
+        '{"<room id>": {"<room id>": 15}}. Overrides defaults of --transit.',
+    ),
+    max_hours_per_day: float | None = typer.Option(
+        None,
+        "--max-hours-per-day",
+        help="Maximal hours of scheduled events per congress day (from 06:00).",
+    ),
+    breaks: list[str] | None = typer.Option(
+        None,
+        "--break",
+        help="Window of each day to keep free, e.g. '12:00-14:00', or with the "
+        "free minutes within it, e.g. '12:00-14:00/45'. Can be given several times.",
+    ),
+    max_consecutive: int | None = typer.Option(
+        None,
+        "--max-consecutive",
+        help="Maximal number of events starting within any window of "
+        "--consecutive-window minutes.",
+    ),
+    consecutive_window: float = typer.Option(
+        180.0,
+        "--consecutive-window",
+        help="Minutes of rolling window of --max-consecutive.",
+    ),
+    earliest: str | None = typer.Option(
+        None,
+        "--earliest",
+        help="Time of day before which no event starts, e.g. '10:00'.",
+    ),
+    latest: str | None = typer.Option(
+        None,
+        "--latest",
+        help="Time of day after which no event ends, e.g. '23:00' or '01:00'.",
+    ),
 ) -> None:
-    """Optimize the schedule based on ratings."""
+    """Optimize the schedule based on ratings.
+
+    Example:
+    optimal-congress optimize --solver cbc --formulation clique --threads 4
+
+    Batch example, writing one schedule per ratings directory to a JSON file:
+    optimal-congress optimize --batch alice/ --batch bob/ --output schedules.json
+
+    Rolling example, during the congress:
+    optimal-congress optimize --at now
+
+    Transit example, with walking times between rooms:
+    optimal-congress optimize --transit-matrix transit.json
+
+    Load example, with at most 8 hours a day, and a lunch break:
+    optimal-congress optimize --max-hours-per-day 8 --break 12:00-14:00/45
+    """
+    # validate input
+    if solver != "auto" and solver not in SOLVERS:
+        raise typer.BadParameter(
+            f"Invalid solver: {solver}. Should be one of {['auto', *SOLVERS]}.",
+        )
+    if formulation not in Formulation.__args__:  # type: ignore
+        raise typer.BadParameter(
+            f"Invalid formulation: {formulation}. "
+            f"Should be one of {list(Formulation.__args__)}.",  # type: ignore
+        )
+
+    if batch and at is not None:
+        raise typer.BadParameter("Batch mode cannot re-optimize from a given time.")
+    use_transit = transit or transit_matrix is not None
+    if batch and use_transit:
+        raise typer.BadParameter("Batch mode does not support transit times.")
+    if use_transit and solver == "dp":
+        raise typer.BadParameter("Solver 'dp' does not support transit times.")
+    constraints = ScheduleConstraints(
+        max_hours_per_day=max_hours_per_day,
+        breaks=[parse_break(value) for value in breaks or []],
+        max_consecutive=max_consecutive,
+        consecutive_window=consecutive_window,
+        earliest=parse_time_of_day(earliest) if earliest is not None else None,
+        latest=parse_time_of_day(latest) if latest is not None else None,
+    )
+    if constraints.aggregated and solver == "dp":
+        raise typer.BadParameter(
+            "Solver 'dp' only supports --earliest and --latest of all limits."
+        )
+    if batch:
+        optimize_batch(
+            directories=batch,
+            output=output,
+            minimum_rating=minimum_rating,
+            solver=solver,
+            options=SolverOptions(
+                formulation=formulation,  # type: ignore
+                threads=threads,
+                time_limit=time_limit,
+                gap=gap,
+            ),
+            workers=workers or 1,
+            constraints=constraints,
+        )
+        return
+
+    from rich.console import Console
+    from rich.table import Table
 
     print("loading events, ratings, and rooms from cache...")
     ratings = load_ratings(exit_if_empty=True)
-    events = load_events(exit_if_empty=True)
-    rooms: set[Room] = load_rooms(exit_if_empty=True)
+    store = load_event_store(exit_if_empty=True)
+    rooms: dict[UUID, Room] = index_rooms(load_rooms(exit_if_empty=True))
+    transit_times = None
+    if use_transit:
+        transit_times = TransitTimes.from_rooms(
+            rooms.values(),
+            matrix=(
+                parse_transit_matrix(transit_matrix)
+                if transit_matrix is not None
+                else None
+            ),
+        )
 
-    # latest ratings with their events
-    latest_ratings = filter_latest_ratings(ratings)
-    event_ratings = join_events_with_ratings(
-        ratings=latest_ratings,
-        events=events,
+    # latest ratings with their events, filtered by minimum required rating
+    event_ratings = store.join_ratings(
+        filter_latest_ratings(ratings), min_rating=minimum_rating
     )
 
-    # filter events by minimum required rating
-    event_ratings_filtered = {
-        event_rating
-        for event_rating in event_ratings
-        if event_rating.rating.score >= minimum_rating
-    }
-
     # optimize schedule
-    scheduled_events = optimize_schedule(event_ratings=event_ratings_filtered)
+    options = SolverOptions(
+        formulation=formulation,  # type: ignore
+        threads=threads,
+        time_limit=time_limit,
+        gap=gap,
+    )
+
+    # conflicts between all events are cached until events change, and only found
+    # if the chosen solver uses them
+    def conflicts() -> Conflicts:
+        return load_or_find_conflicts(
+            store,
+            formulation,  # type: ignore
+            transit=transit_times,
+        )
+
+    if at is not None:
+        # last schedule is needed to keep events, even with cold start
+        schedule = solve_rolling(
+            event_ratings=event_ratings,
+            now=parse_time(at),
+            warm_start=load_warm_start(),
+            solver=solver,
+            options=options,
+            conflicts=conflicts,
+            transit=transit_times,
+            constraints=constraints,
+        )
+    else:
+        schedule = solve_schedule(
+            event_ratings=event_ratings,
+            solver=solver,
+            options=options,
+            warm_start=load_warm_start() if warm_start else None,
+            workers=workers,
+            conflicts=conflicts,
+            transit=transit_times,
+            constraints=constraints,
+        )
+    save_warm_start(schedule.warm_start)
 
     events_sorted = sorted(
-        scheduled_events, key=lambda event: event.schedule_start, reverse=False
+        schedule.events, key=lambda event: event.schedule_start, reverse=False
+    )
+
+    # report solver status
+    gap_string = "unknown" if schedule.gap is None else f"{schedule.gap:.2%}"
+    print(
+        f"\nSolver '{schedule.solver}' found {schedule.status} schedule "
+        f"with total rating {schedule.objective:g} (gap: {gap_string})."
+    )
+
+    with phase("render"):
+        # define table
+        table = Table(title="\nScheduled events:")
+        table.add_column(header="Time")
+        table.add_column(header="Room")
+        table.add_column(header="Title")
+        table.add_column(header="URL", justify="center")
+
+        # populate table
+        for event in events_sorted:
+            # get room name via event's room id
+            room = rooms.get(event.room) if event.room is not None else None
+            room_name = room.name if room is not None else str()
+
+            # format time string
+            start_time = event.schedule_start.strftime("%a %d %H:%M")
+            end_time = event.schedule_end.strftime("%H:%M")
+            time_string = f"{start_time} - {end_time}"
+
+            table.add_row(
+                time_string,
+                room_name,
+                event.name[:60],
+                f"[link={event.url}]🔗[/link]",
+            )
+
+        # print table
+        print()  # empty line
+        console = Console()
+        console.print(table)
+
+
+def optimize_batch(
+    directories: list[Path],
+    output: Path,
+    minimum_rating: float,
+    solver: str,
+    options: SolverOptions,
+    workers: int,
+    constraints: ScheduleConstraints | None = None,
+) -> None:
+    """Optimize schedules of many attendees, and write them to a JSON file.
+
+    Events are loaded only once, and attendees are named by their directory.
+    """
+    print("loading events and ratings from cache...")
+    store = load_event_store(exit_if_empty=True)
+
+    event_ratings = {}
+    for directory in directories:
+        if directory.name in event_ratings:
+            raise typer.BadParameter(f"Duplicate attendee name: {directory.name}.")
+        # latest ratings with their events, filtered by minimum required rating
+        ratings = filter_latest_ratings(
+            load_ratings(exit_if_empty=False, directory=directory)
+        )
+        event_ratings[directory.name] = store.join_ratings(
+            ratings, min_rating=minimum_rating
+        )
+
+    print(f"\nOptimizing schedules of {len(event_ratings)} attendees...")
+    schedules = solve_batch(
+        event_ratings=event_ratings,
+        solver=solver,
+        options=options,
+        workers=workers,
+        conflicts=load_or_find_conflicts(store, options.formulation),
+        constraints=constraints,
     )
 
-    # define table
-    table = Table(title="\nScheduled events:")
-    table.add_column(header="Time")
-    table.add_column(header="Room")
-    table.add_column(header="Title")
-    table.add_column(header="URL", justify="center")
-
-    # populate table
-    for event in events_sorted:
-        # get room name via event's room id
-        try:
-            room_name = {room for room in rooms if room.id == event.room}.pop().name
-        except KeyError:
-            room_name = str()
-
-        # format time string
-        start_time = event.schedule_start.strftime("%a %d %H:%M")
-        end_time = event.schedule_end.strftime("%H:%M")
-        time_string = f"{start_time} - {end_time}"
-
-        table.add_row(
-            time_string,
-            room_name,
-            event.name[:60],
-            f"[link={event.url}]🔗[/link]",
+    for name, schedule in schedules.items():
+        print(
+            f"- {name[:30]:.<32}{len(schedule.events)} events, "
+            f"total rating {schedule.objective:g} ({schedule.status})"
         )
 
-    # print table
-    print()  # empty line
-    console = Console()
-    console.print(table)
+    print(f"\nWriting schedules to {output}...")
+    save_schedules(schedules=schedules, path=output)
+    print("Done.")
 
 
 @app.command()
@@ -280,55 +683,159 @@ def next(
         "--rating",
         help="Minimum rating required for event to be listed.",
     ),
+    minimum_rating: float = typer.Option(
+        0.0,
+        "-m",
+        "--min",
+        help="Minimum rating required for event to be considered in the schedule "
+        "(with --schedule), as in `optimize`.",
+    ),
     num_events: int = typer.Option(
         10,
         "-n",
         "--number",
         help="Number of events to list.",
     ),
+    schedule: bool = typer.Option(
+        False,
+        "-s",
+        "--schedule",
+        help="List next events of an optimal schedule from now on, instead of all "
+        "rated events. Events of the last schedule that already started are kept. "
+        "Limits of `optimize` are not applied, and the saved schedule is not "
+        "replaced (use `optimize --at now` for both).",
+    ),
+    at: str = typer.Option(
+        "now",
+        "--at",
+        help="Time from which on to list events ('now', or e.g. '2024-12-28T14:00').",
+    ),
 ) -> None:
-    """List next upcoming events, filtered by minimum rating."""
-    # get current time
-    now = pd.Timestamp.now(tz="Europe/Berlin")
+    """List next upcoming events, filtered by minimum rating.
+
+    Example, listing what to attend next without conflicts:
+    optimal-congress next --schedule
+    """
+    now = parse_time(at)
 
     print("loading events, ratings, and rooms from cache...")
-    events = load_events(exit_if_empty=True)
-    rooms: set[Room] = load_rooms(exit_if_empty=True)
+    store = load_event_store(exit_if_empty=True)
+    rooms: dict[UUID, Room] = index_rooms(load_rooms(exit_if_empty=True))
+    latest_ratings = filter_latest_ratings(load_ratings(exit_if_empty=True))
+
+    if schedule:
+        # re-optimize only upcoming events, which is fast even late in congress
+        rolling = solve_rolling(
+            event_ratings=store.join_ratings(latest_ratings, min_rating=minimum_rating),
+            now=now,
+            warm_start=load_warm_start(),
+        )
+        # events being attended, and next ones
+        events_sorted = sorted(
+            (event for event in rolling.events if event.schedule_end > now),
+            key=lambda event: event.schedule_start,
+        )[:num_events]
+    else:
+        # next events, filtered by minimum required rating
+        events_sorted = store.upcoming(
+            scores=store.scores(latest_ratings),
+            min_rating=min_rating,
+            now=now,
+            num_events=num_events,
+        )
 
-    # join ratings with their events
-    event_ratings = join_events_with_ratings(
-        ratings=load_ratings(exit_if_empty=True),
-        events=events,
+    with phase("render"):
+        # print scheduled events
+        print("\nNext events of your schedule:" if schedule else "\nNext events:")
+        for event in events_sorted:
+            # get room name via event's room id
+            room = rooms.get(event.room) if event.room is not None else None
+            room_name = room.name if room is not None else str()
+
+            start_time = event.schedule_start.strftime("%a %d %H:%M")
+            end_time = event.schedule_end.strftime("%H:%M")
+            print(
+                f"- {start_time}-{end_time} {room_name[:15]:.<16}"
+                f"{event.name[:40]:.<42}{event.url}"
+            )
+
+
+def parse_time(value: str) -> datetime:
+    """Parse 'now' or an ISO 8601 timestamp, in local time of congress if naive.
+
+    Raises:
+        typer.BadParameter: If the value is neither 'now' nor a timestamp.
+    """
+    tz = timezone("Europe/Berlin")
+    if value == "now":
+        return datetime.now(tz=tz)
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except ValueError:
+        raise typer.BadParameter(
+            f"Invalid time: {value}. Should be 'now' or e.g. '2024-12-28T14:00'."
+        ) from None
+    return tz.localize(timestamp) if timestamp.tzinfo is None else timestamp
+
+
+def parse_time_of_day(value: str) -> time:
+    """Parse a time of day, e.g. '14:00'.
+
+    Raises:
+        typer.BadParameter: If the value is not a time of day.
+    """
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        raise typer.BadParameter(
+            f"Invalid time of day: {value}. Should be e.g. '14:00'."
+        ) from None
+
+
+def parse_break(value: str) -> BreakWindow:
+    """Parse a break window, e.g. '12:00-14:00', with free minutes, e.g. '/45'.
+
+    Raises:
+        typer.BadParameter: If the value is not such a window.
+    """
+    window, _, minutes = value.partition("/")
+    start, separator, end = window.partition("-")
+    if not separator:
+        raise typer.BadParameter(
+            f"Invalid break: {value}. Should be e.g. '12:00-14:00'."
+        )
+    try:
+        free = float(minutes) if minutes else None
+    except ValueError:
+        raise typer.BadParameter(
+            f"Invalid break: {value}. Free minutes should be a number, e.g. '/45'."
+        ) from None
+    break_window = BreakWindow(
+        start=parse_time_of_day(start), end=parse_time_of_day(end), minutes=free
     )
+    length = break_window.duration.total_seconds() / 60
+    if length <= 0 or (free or 0) > length:
+        raise typer.BadParameter(
+            f"Invalid break: {value}. Should end after it starts, and be longer "
+            "than its free minutes."
+        )
+    return break_window
 
-    # filter events by minimum required rating, and 'is in future'
-    events_filtered = {
-        event_rating.event
-        for event_rating in event_ratings
-        if event_rating.rating.score >= min_rating
-        and event_rating.event.schedule_start > now
-    }
 
-    # sort events by start time, keep only first n
-    events_sorted = sorted(
-        events_filtered, key=lambda event: event.schedule_start, reverse=False
-    )[:num_events]
-
-    # print scheduled events
-    print("\nNext events:")
-    for event in events_sorted:
-        # get room name via event's room id
-        try:
-            room_name = {room for room in rooms if room.id == event.room}.pop().name
-        except KeyError:
-            room_name = str()
-
-        start_time = event.schedule_start.strftime("%a %d %H:%M")
-        end_time = event.schedule_end.strftime("%H:%M")
-        print(
-            f"- {start_time}-{end_time} {room_name[:15]:.<16}"
-            f"{event.name[:40]:.<42}{event.url}"
+def parse_transit_matrix(path: Path) -> dict[UUID, dict[UUID, float]]:
+    """Parse minutes from room to room, from a JSON object of objects by room IDs.
+
+    Raises:
+        typer.BadParameter: If the file cannot be read, or is not such an object.
+    """
+    from pydantic import TypeAdapter, ValidationError
+
+    try:
+        return TypeAdapter(dict[UUID, dict[UUID, float]]).validate_json(
+            path.read_bytes()
         )
+    except (OSError, ValidationError) as error:
+        raise typer.BadParameter(f"Invalid transit matrix: {path}. {error}") from None
 
 
 @app.command()
@@ -344,6 +851,10 @@ def dump(
 
     This will exports the latest rating for each rated event.
     """
+    import pandas as pd
+
+    from optimal_congress.io.ratings_csv import RatingsExport
+
     # convert argument to absolute path
     path = Path(file_path)
     absolute_path = path if path.is_absolute() else Path.cwd() / path
@@ -399,6 +910,10 @@ def load(
 
     CSV format should be the same one as what the `dump` command exports.
     """
+    import pandas as pd
+
+    from optimal_congress.io.ratings_csv import RatingsExport
+
     # convert argument to absolute path
     path = Path(file_path)
     absolute_path = path if path.is_absolute() else Path.cwd() / path
@@ -425,8 +940,55 @@ def load(
         print("\nDryrun, not updating cache.")
         exit()
     print(f"Saving {len(ratings)} ratings to cache...")
-    for rating in ratings:
-        save_rating(rating=rating)
+    save_ratings(ratings=ratings)
+
+
+@app.command()
+def serve(
+    host: str = typer.Option(
+        "127.0.0.1",
+        "--host",
+        help="Host to listen on.",
+    ),
+    port: int = typer.Option(
+        8000,
+        "-p",
+        "--port",
+        help="Port to listen on.",
+    ),
+    attendees: list[Path] | None = typer.Option(
+        None,
+        "-a",
+        "--attendee",
+        help="Ratings directory of an attendee, to serve queries of many "
+        "attendees. Can be given several times. Defaults to the ratings cache.",
+    ),
+) -> None:
+    """Serve next events, ratings and schedules over HTTP, keeping cache in memory.
+
+    The cache is reloaded whenever it changes, e.g. after `fetch` or `rate`.
+
+    Example:
+    optimal-congress serve --port 8000
+    curl 'http://127.0.0.1:8000/next?rating=8&number=5'
+    """
+    from optimal_congress.server import serve as serve_queries
+
+    ratings_dirs = {"default": DIR_RATINGS_CACHE}
+    if attendees:
+        ratings_dirs = {directory.name: directory for directory in attendees}
+        if len(ratings_dirs) < len(attendees):
+            raise typer.BadParameter("Attendees must have distinct directory names.")
+
+    serve_queries(host=host, port=port, ratings_dirs=ratings_dirs)
+
+
+@app.command()
+def compact() -> None:
+    """Compact cached ratings, keeping only the latest rating of each event."""
+    print("compacting ratings in cache...")
+    num_before, num_after = compact_ratings()
+    print(f"Kept {num_after} latest of {num_before} ratings.")
 
 
 @app.command()
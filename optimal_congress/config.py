@@ -9,5 +9,16 @@ HUB_EVENT_ROUTE = "https://events.ccc.de/congress/2024/hub/en/event"
 
 # folder to store serialized ratings
 DIR_RATINGS_CACHE = Path.home() / ".cache/congress_optimizer/ratings"
+# name of append-only log of ratings, in a ratings directory
+RATINGS_LOG = "ratings.jsonl"
 DIR_EVENTS_CACHE = Path.home() / ".cache/congress_optimizer/events"
 DIR_ROOMS_CACHE = Path.home() / ".cache/congress_optimizer/rooms"
+# files to store all events and all rooms, each in one JSON array
+FILE_EVENTS_CACHE = DIR_EVENTS_CACHE / "events.json"
+FILE_ROOMS_CACHE = DIR_ROOMS_CACHE / "rooms.json"
+# folder to store conflicts between cached events, for each formulation
+DIR_CONFLICTS_CACHE = Path.home() / ".cache/congress_optimizer/conflicts"
+# folder to store validators of API responses, for conditional requests
+DIR_HTTP_CACHE = Path.home() / ".cache/congress_optimizer/http"
+# folder to store state of previous optimization, for warm starts
+DIR_OPTIMIZE_CACHE = Path.home() / ".cache/congress_optimizer/optimize"
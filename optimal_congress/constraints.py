@@ -0,0 +1,215 @@
+"""Limits on the load of a schedule, besides not attending overlapping events.
+
+Limits are encoded as few aggregated rows, e.g. one per congress day or break
+window, instead of constraints per pair of events, so that solving stays fast
+with all limits enabled. Earliest and latest times only filter events.
+"""
+
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import date, datetime, time, timedelta
+
+from pydantic import BaseModel, Field
+
+from optimal_congress.schema import Event
+
+# congress days start in the morning, so that late events count to the day before
+DAY_START = timedelta(hours=6)
+
+
+def congress_day(timestamp: datetime) -> date:
+    """Return the congress day of a timestamp, in local time of the timestamp."""
+    return (timestamp.replace(tzinfo=None) - DAY_START).date()
+
+
+def day_time(day: date, value: time) -> datetime:
+    """Return the naive local timestamp of a time of day on a congress day.
+
+    Times before `DAY_START` are on the next calendar day, e.g. 01:00 at night.
+    """
+    timestamp = datetime.combine(day, value)
+    if timestamp - datetime.combine(day, time()) < DAY_START:
+        timestamp += timedelta(days=1)
+    return timestamp
+
+
+class BreakWindow(BaseModel):
+    """Window of each congress day, within which some time is kept free."""
+
+    start: time
+    end: time
+    minutes: float | None = Field(
+        default=None, description="Free minutes within window. Defaults to all."
+    )
+
+    class Config:
+        frozen = True  # instances immutable and hashable
+
+    @property
+    def duration(self) -> timedelta:
+        """Length of the window, on any congress day."""
+        day = date(2000, 1, 1)
+        return day_time(day, self.end) - day_time(day, self.start)
+
+
+class LoadRow(BaseModel):
+    """Linear limit on scheduled events: their weighted sum is at most a bound."""
+
+    name: str = Field(description="Name of row, unique within a problem.")
+    indices: list[int] = Field(description="Indices of limited events.")
+    weights: list[float] = Field(description="Weight of each event, e.g. hours.")
+    bound: float
+
+    class Config:
+        frozen = True  # instances immutable and hashable
+
+
+class ScheduleConstraints(BaseModel):
+    """Optional limits on a schedule, e.g. to keep time for breaks and meals."""
+
+    max_hours_per_day: float | None = Field(
+        default=None, description="Maximal hours of scheduled events per day."
+    )
+    breaks: list[BreakWindow] = Field(
+        default_factory=list, description="Windows with free time on each day."
+    )
+    max_consecutive: int | None = Field(
+        default=None,
+        description="Maximal number of events starting within any rolling window.",
+    )
+    consecutive_window: float = Field(
+        default=180.0, description="Minutes of rolling window of `max_consecutive`."
+    )
+    earliest: time | None = Field(
+        default=None, description="Time of day, before which no event starts."
+    )
+    latest: time | None = Field(
+        default=None, description="Time of day, after which no event ends."
+    )
+    attended: list[Event] = Field(
+        default_factory=list,
+        description="Events attended already, which count towards the limits.",
+    )
+
+    class Config:
+        frozen = True  # instances immutable
+
+    @property
+    def aggregated(self) -> bool:
+        """Whether any limit spans several events, rather than filtering events."""
+        return (
+            self.max_hours_per_day is not None
+            or bool(self.breaks)
+            or self.max_consecutive is not None
+        )
+
+    def admits(self, event: Event) -> bool:
+        """Check if an event lies between the earliest and latest time of its day."""
+        start = event.schedule_start.replace(tzinfo=None)
+        end = event.schedule_end.replace(tzinfo=None)
+        day = congress_day(start)
+        if self.earliest is not None and start < day_time(day, self.earliest):
+            return False
+        if self.latest is not None and end > day_time(day, self.latest):
+            return False
+        return True
+
+    def load_rows(self, events: Sequence[Event]) -> list[LoadRow]:
+        """Encode limits as rows over events, one per day, break or window.
+
+        Attended events use up part of the limits, e.g. of the hours of their day,
+        so that only the rest is left to the given events. Rows that cannot be
+        violated, e.g. of days with few events, are skipped.
+
+        Args:
+            events: Events to limit.
+        Returns:
+            Rows with indices into `events`.
+        Raises:
+            ValueError: If a break window is empty, or shorter than its free time.
+        """
+        # attended events follow the given events, from index n on
+        n = len(events)
+        events = [*events, *self.attended]
+        starts = [event.schedule_start.replace(tzinfo=None) for event in events]
+        ends = [event.schedule_end.replace(tzinfo=None) for event in events]
+        days = [congress_day(start) for start in starts]
+        by_day: dict[date, list[int]] = defaultdict(list)
+        for i, day in enumerate(days):
+            by_day[day].append(i)
+
+        rows = []
+        if self.max_hours_per_day is not None:
+            for day, indices in sorted(by_day.items()):
+                hours = [(ends[i] - starts[i]) / timedelta(hours=1) for i in indices]
+                rows.append(
+                    LoadRow(
+                        name=f"load_hours_{day:%Y%m%d}",
+                        indices=indices,
+                        weights=hours,
+                        bound=self.max_hours_per_day,
+                    )
+                )
+
+        for k, window in enumerate(self.breaks):
+            length = window.duration / timedelta(minutes=1)
+            free = length if window.minutes is None else window.minutes
+            if length <= 0 or free > length:
+                raise ValueError(
+                    f"Invalid break from {window.start} to {window.end}, "
+                    f"with {free:g} free minutes."
+                )
+            for day, indices in sorted(by_day.items()):
+                window_start = day_time(day, window.start)
+                window_end = window_start + window.duration
+                # minutes of each event within window
+                overlaps = {
+                    i: (min(ends[i], window_end) - max(starts[i], window_start))
+                    / timedelta(minutes=1)
+                    for i in indices
+                }
+                within = [i for i in indices if overlaps[i] > 0]
+                rows.append(
+                    LoadRow(
+                        name=f"load_break{k}_{day:%Y%m%d}",
+                        indices=within,
+                        weights=[overlaps[i] for i in within],
+                        bound=length - free,
+                    )
+                )
+
+        if self.max_consecutive is not None:
+            span = timedelta(minutes=self.consecutive_window)
+            order = sorted(range(len(events)), key=lambda i: starts[i])
+            # one row per window that starts with an event, unless a subset of the
+            # previous window, i.e. unless no further event entered it
+            last = 0
+            for first, i in enumerate(order):
+                previous = last
+                while last < len(order) and starts[order[last]] < starts[i] + span:
+                    last += 1
+                if last > previous:
+                    indices = order[first:last]
+                    rows.append(
+                        LoadRow(
+                            name=f"load_consecutive_{first}",
+                            indices=indices,
+                            weights=[1.0] * len(indices),
+                            bound=self.max_consecutive,
+                        )
+                    )
+
+        limits = []
+        for row in rows:
+            used = sum([w for i, w in zip(row.indices, row.weights) if i >= n])
+            indices = [i for i in row.indices if i < n]
+            weights = [w for i, w in zip(row.indices, row.weights) if i < n]
+            # limits exceeded by attended events leave nothing to the others
+            bound = max(row.bound - used, 0.0)
+            if sum(weights) > bound:
+                limits.append(
+                    LoadRow(
+                        name=row.name, indices=indices, weights=weights, bound=bound
+                    )
+                )
+        return limits
@@ -1,26 +1,254 @@
 """Functions for read operations against congress API."""
 
-import json
+import re
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import Any
 
 import requests
+from pydantic import BaseModel, Field
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 
 from optimal_congress.config import API_EVENTS, API_ROOMS
-from optimal_congress.schema import Event, Room
+from optimal_congress.schema import Event, HttpValidators, Room
 
+# seconds to wait for connection to, and data from, the API
+TIMEOUT = 30
+# bytes of (decompressed) content to read from the API at once
+CHUNK_SIZE = 64 * 1024
+# tokens that delimit elements of JSON arrays: complete strings and complete objects
+# without nesting (which are both skipped), the start of incomplete strings,
+# brackets, braces, and commas
+_JSON_STRING = rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+_JSON_TOKENS = re.compile(
+    rb"\{(?:[^\"{}\[\]]++|"
+    + _JSON_STRING
+    + rb")*+\}|"
+    + _JSON_STRING
+    + rb'|"|[\[\]{},]',
+    re.DOTALL,
+)
 
-def fetch_events() -> set[Event]:
-    """Load events from the API."""
-    events_dict = json.loads(s=requests.get(url=API_EVENTS).text)
-    events = {Event(**event) for event in events_dict}
-    if len(events) == 0:
-        raise ValueError("No events found! Check state of congress API.")
-    return events
 
+@cache
+def get_session() -> requests.Session:
+    """Return session shared by all requests, to reuse pooled connections.
 
-def fetch_rooms() -> set[Room]:
-    """Load rooms from the API."""
-    rooms_dict = json.loads(s=requests.get(url=API_ROOMS).text)
-    rooms = {Room(**room) for room in rooms_dict}
-    if len(rooms) == 0:
-        raise ValueError("No rooms found! Check state of congress API.")
-    return rooms
+    Compressed responses are accepted with all encodings that can be decoded,
+    i.e. gzip and deflate, and brotli if the `brotli` package is installed.
+    """
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    return session
+
+
+def request_if_modified(
+    url: str,
+    validators: HttpValidators | None = None,
+) -> tuple[requests.Response | None, HttpValidators]:
+    """Request content from the API as a stream, unless it was not modified.
+
+    With validators of a previous response, the request is conditional, and the
+    server responds without content if it was not modified since.
+
+    Args:
+        url: URL to fetch.
+        validators: ETag and Last-Modified of a previous response, if any.
+    Returns:
+        Response with content not read yet, or None if not modified, and
+        validators of content.
+    Raises:
+        requests.HTTPError: If the server responds with an error.
+    """
+    headers = {}
+    if validators is not None:
+        if validators.etag is not None:
+            headers["If-None-Match"] = validators.etag
+        if validators.last_modified is not None:
+            headers["If-Modified-Since"] = validators.last_modified
+
+    response = get_session().get(url=url, headers=headers, timeout=TIMEOUT, stream=True)
+    if response.status_code == requests.codes.not_modified and validators:
+        response.close()
+        return None, validators
+    if not response.ok:
+        response.close()
+    response.raise_for_status()
+
+    return response, HttpValidators(
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+    )
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split a JSON array into its elements, while its chunks arrive.
+
+    Elements are not parsed, but only delimited by scanning for brackets, braces,
+    commas and strings, so that each of them can be validated on its own.
+    Strings and flat objects are matched as a whole, so that their content is not
+    scanned in Python.
+
+    Args:
+        chunks: Consecutive chunks of a JSON array, split at any byte.
+    Yields:
+        JSON of each element of array.
+    Raises:
+        ValueError: If chunks do not form a JSON array.
+    """
+    buffer = b""
+    scanned = 0  # position in buffer up to which it was scanned
+    start = -1  # position in buffer at which current element starts
+    depth = 0  # nesting of arrays and objects, with 1 within the top-level array
+
+    for chunk in chunks:
+        buffer += chunk
+        scanned_all = True
+        for match in _JSON_TOKENS.finditer(buffer, scanned):
+            token = match.group()
+            i = match.start()
+            if token == b'"':
+                # string is not complete yet, so scan it again with next chunk
+                scanned = i
+                scanned_all = False
+                break
+            elif len(token) > 1:
+                continue  # complete strings and objects are skipped as a whole
+            elif token in b"[{":
+                if depth == 0:
+                    if token != b"[" or buffer[:i].strip():
+                        raise ValueError("JSON is not an array.")
+                    start = i + 1
+                depth += 1
+            elif token in b"]}":
+                depth -= 1
+                if depth == 0:
+                    element = buffer[start:i].strip()
+                    if element:
+                        yield element
+                    return
+            elif token == b"," and depth == 1:
+                yield buffer[start:i].strip()
+                start = i + 1
+        if scanned_all:
+            scanned = len(buffer)
+
+        # drop elements already yielded, and keep current one only
+        offset = max(start, 0)
+        buffer = buffer[offset:]
+        scanned -= offset
+        start -= offset if start >= 0 else 0
+
+    raise ValueError("JSON array is incomplete.")
+
+
+class Endpoint(BaseModel):
+    """An endpoint of the API, which lists items of a model as JSON array."""
+
+    url: str
+    model: type[BaseModel] = Field(description="Model of items listed.")
+
+    class Config:
+        frozen = True  # instances immutable and hashable
+
+
+# registry of API endpoints, by name
+ENDPOINTS: dict[str, Endpoint] = {
+    "events": Endpoint(url=API_EVENTS, model=Event),
+    "rooms": Endpoint(url=API_ROOMS, model=Room),
+}
+
+
+def register_endpoint(name: str, url: str, model: type[BaseModel]) -> None:
+    """Register an endpoint of the API, e.g. a listing of assemblies.
+
+    Args:
+        name: Name to fetch endpoint by, which also names its cached validators.
+        url: URL of endpoint.
+        model: Model of items listed by endpoint.
+    """
+    ENDPOINTS[name] = Endpoint(url=url, model=model)
+
+
+def fetch_endpoint(
+    name: str,
+    validators: HttpValidators | None = None,
+) -> tuple[set[Any] | None, HttpValidators]:
+    """Load items from an endpoint of the API, unless they were not modified.
+
+    Args:
+        name: Name of registered endpoint.
+        validators: Validators of previously fetched items, if any.
+    Returns:
+        Items, or None if not modified, and validators of response.
+    Raises:
+        ValueError: If the endpoint is unknown, or lists no items.
+    """
+    if name not in ENDPOINTS:
+        raise ValueError(f"Unknown endpoint: {name}. Should be one of {[*ENDPOINTS]}.")
+    endpoint = ENDPOINTS[name]
+
+    response, validators = request_if_modified(url=endpoint.url, validators=validators)
+    if response is None:
+        return None, validators
+
+    # validate each item as soon as it arrives, without parsing whole array first
+    with response:
+        chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+        items = {
+            endpoint.model.model_validate_json(item) for item in iter_json_array(chunks)
+        }
+    if len(items) == 0:
+        raise ValueError(f"No {name} found! Check state of congress API.")
+    return items, validators
+
+
+def fetch_endpoints(
+    validators: dict[str, HttpValidators | None],
+) -> dict[str, tuple[set[Any] | None, HttpValidators]]:
+    """Load items from several endpoints of the API concurrently.
+
+    Each endpoint is fetched and parsed on its own thread, so that parsing of one
+    response overlaps with the transfer of others.
+
+    Args:
+        validators: Validators of previously fetched items, by name of endpoint.
+    Returns:
+        Items, or None if not modified, and validators of response, by name of
+        endpoint.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, len(validators))) as pool:
+        futures = {
+            name: pool.submit(fetch_endpoint, name, endpoint_validators)
+            for name, endpoint_validators in validators.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def fetch_events(
+    validators: HttpValidators | None = None,
+) -> tuple[set[Event] | None, HttpValidators]:
+    """Load events from the API, unless they were not modified.
+
+    Args:
+        validators: Validators of previously fetched events, if any.
+    Returns:
+        Events, or None if not modified, and validators of response.
+    """
+    return fetch_endpoint("events", validators=validators)
+
+
+def fetch_rooms(
+    validators: HttpValidators | None = None,
+) -> tuple[set[Room] | None, HttpValidators]:
+    """Load rooms from the API, unless they were not modified.
+
+    Args:
+        validators: Validators of previously fetched rooms, if any.
+    Returns:
+        Rooms, or None if not modified, and validators of response.
+    """
+    return fetch_endpoint("rooms", validators=validators)
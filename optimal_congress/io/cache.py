@@ -1,13 +1,118 @@
 """IO operations on local cache."""
 
-import json
+import logging
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, TypeVar
+from uuid import UUID
+
+from pydantic import TypeAdapter
 
 from optimal_congress.config import (
+    DIR_CONFLICTS_CACHE,
     DIR_EVENTS_CACHE,
+    DIR_HTTP_CACHE,
+    DIR_OPTIMIZE_CACHE,
     DIR_RATINGS_CACHE,
     DIR_ROOMS_CACHE,
+    FILE_EVENTS_CACHE,
+    FILE_ROOMS_CACHE,
+    RATINGS_LOG,
+)
+from optimal_congress.profiling import phase
+from optimal_congress.schema import (
+    Conflicts,
+    Event,
+    Formulation,
+    HttpValidators,
+    Rating,
+    Room,
+    WarmStart,
 )
-from optimal_congress.schema import Event, Rating, Room
+
+if TYPE_CHECKING:
+    from optimal_congress.store import EventStore
+
+Model = TypeVar("Model", bound=Event | Room)
+
+# validate and serialize all events, or all rooms, in one pass
+EVENTS_ADAPTER: TypeAdapter[list[Event]] = TypeAdapter(list[Event])
+ROOMS_ADAPTER: TypeAdapter[list[Room]] = TypeAdapter(list[Room])
+RATINGS_ADAPTER: TypeAdapter[list[Rating]] = TypeAdapter(list[Rating])
+
+# header of binary conflicts file: format version, key of events, and numbers of
+# events, groups, and indices within groups (all little-endian)
+CONFLICTS_MAGIC = b"OCC1"
+CONFLICTS_HEADER = struct.Struct("<4s16sIII")
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write file atomically, so that readers never see a partially written file.
+
+    Data is written to a temporary file in the same directory first, which then
+    replaces the target file.
+
+    Args:
+        path: Path of file to write.
+        data: Content of file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+    ) as f:
+        try:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    # temporary files are only readable by owner, unlike files written directly
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, path)
+
+
+def _load_models(path: Path, adapter: TypeAdapter[list[Model]]) -> list[Model]:
+    """Load list of models from a JSON file, or no models if it does not exist."""
+    if not path.exists():
+        return []
+    with phase("cache read"):
+        data = path.read_bytes()
+    with phase("validation"):
+        return adapter.validate_json(data)
+
+
+def _migrate_files(
+    directory: Path,
+    pattern: str,
+    path: Path,
+    adapter: TypeAdapter[list[Model]],
+) -> None:
+    """Migrate models from one JSON file each to one file for all of them.
+
+    Args:
+        directory: Directory of files with one model each.
+        pattern: Glob pattern of files with one model each, e.g. 'event_*.json'.
+        path: Path of file for all models.
+        adapter: Adapter to validate and serialize a list of models.
+    """
+    files = list(directory.glob(pattern))
+    if not files:
+        return
+    logging.info(f"Migrating {len(files)} files in {directory} to {path.name}...")
+
+    # single files left next to the consolidated file were written after it, by
+    # an older version, so their models replace those with the same ID
+    single = adapter.validate_json(
+        b"[" + b",".join(file.read_bytes() for file in files) + b"]"
+    )
+    models = {model.id: model for model in [*_load_models(path, adapter), *single]}
+    write_atomic(path, adapter.dump_json([*models.values()]))
+
+    for file in files:
+        file.unlink()
 
 
 def save_events(
@@ -20,18 +125,13 @@ def save_events(
         events: List of events to save.
         clear: Whether to clear all cached events before saving. Defaults to True.
     """
-    # create events cache directory, if it does not exist
-    DIR_EVENTS_CACHE.mkdir(parents=True, exist_ok=True)
+    _migrate_files(DIR_EVENTS_CACHE, "event_*.json", FILE_EVENTS_CACHE, EVENTS_ADAPTER)
 
-    # empty cache
-    if clear:
-        for file in DIR_EVENTS_CACHE.glob("*.json"):
-            file.unlink()
+    # keep cached events, unless replaced by given ones
+    if not clear:
+        events = {*events, *_load_models(FILE_EVENTS_CACHE, EVENTS_ADAPTER)}
 
-    # save events
-    for event in events:
-        with open(DIR_EVENTS_CACHE / f"event_{event.id}.json", "w") as f:
-            f.write(event.model_dump_json())
+    write_atomic(FILE_EVENTS_CACHE, EVENTS_ADAPTER.dump_json(list(events)))
 
 
 def save_rooms(
@@ -40,54 +140,33 @@ def save_rooms(
 ) -> None:
     """Save rooms to cache.
 
-    Args:s
+    Args:
         rooms: List of rooms to save.
         clear: Whether to clear all cached rooms before saving. Defaults to True.
     """
-    # create rooms directory if it doesn't exist
-    DIR_ROOMS_CACHE.mkdir(parents=True, exist_ok=True)
+    _migrate_files(DIR_ROOMS_CACHE, "room_*.json", FILE_ROOMS_CACHE, ROOMS_ADAPTER)
 
-    # empty cache
-    if clear:
-        for file in DIR_ROOMS_CACHE.glob("*.json"):
-            file.unlink()
+    # keep cached rooms, unless equal to given ones
+    if not clear:
+        rooms = {*rooms, *_load_models(FILE_ROOMS_CACHE, ROOMS_ADAPTER)}
 
-    # save rooms
-    for room in rooms:
-        with open(DIR_ROOMS_CACHE / f"room_{room.id}.json", "w") as f:
-            f.write(room.model_dump_json())
-
-
-def save_rating(rating: Rating) -> None:
-    """Save single new rating to cache.
-
-    Note: This does not overwrite cached rating for the same event.
-    """
-    # create ratings directory if it doesn't exist
-    DIR_RATINGS_CACHE.mkdir(parents=True, exist_ok=True)
-
-    # save ratings
-    with open(
-        DIR_RATINGS_CACHE / f"rating_{rating.event_id}_{rating.timestamp}.json",
-        "w",
-    ) as f:
-        f.write(rating.model_dump_json())
+    write_atomic(FILE_ROOMS_CACHE, ROOMS_ADAPTER.dump_json(list(rooms)))
 
 
 def load_events(exit_if_empty: bool) -> set[Event]:
     """Load events from disk.
 
+    Events cached in one file each, by earlier versions, are migrated first.
+
     Args:
         exit_if_empty: Exit if no events are found, and give instructions.
     Returns:
         List of events.
     """
-    # create events directory if it doesn't exist
-    DIR_EVENTS_CACHE.mkdir(parents=True, exist_ok=True)
+    _migrate_files(DIR_EVENTS_CACHE, "event_*.json", FILE_EVENTS_CACHE, EVENTS_ADAPTER)
 
     # load events
-    events_files = list(DIR_EVENTS_CACHE.glob("*.json"))
-    events = {Event(**json.loads(open(file).read())) for file in events_files}
+    events = set(_load_models(FILE_EVENTS_CACHE, EVENTS_ADAPTER))
 
     # exit if no events are found
     if exit_if_empty and len(events) == 0:
@@ -96,20 +175,48 @@ def load_events(exit_if_empty: bool) -> set[Event]:
     return events
 
 
+def load_event_store(exit_if_empty: bool) -> "EventStore":
+    """Load events from disk into arrays, without validating models of all events.
+
+    Models are built only for the events that are used (see `EventStore`).
+
+    Args:
+        exit_if_empty: Exit if no events are found, and give instructions.
+    Returns:
+        Store of events.
+    """
+    # NumPy is imported only by commands that filter events
+    from optimal_congress.store import EventStore
+
+    _migrate_files(DIR_EVENTS_CACHE, "event_*.json", FILE_EVENTS_CACHE, EVENTS_ADAPTER)
+
+    # load events
+    with phase("cache read"):
+        data = FILE_EVENTS_CACHE.read_bytes() if FILE_EVENTS_CACHE.exists() else b""
+    with phase("parse"):
+        store = EventStore.from_json(data)
+
+    # exit if no events are found
+    if exit_if_empty and len(store) == 0:
+        print("\nNo events found! Run `fetch` command to load events from API.")
+        exit()
+    return store
+
+
 def load_rooms(exit_if_empty: bool) -> set[Room]:
     """Load rooms from disk.
 
+    Rooms cached in one file each, by earlier versions, are migrated first.
+
     Args:
         exit_if_empty: Exit if no events are found, and give instructions.
     Returns:
         List of rooms.
     """
-    # create rooms directory if it doesn't exist
-    DIR_ROOMS_CACHE.mkdir(parents=True, exist_ok=True)
+    _migrate_files(DIR_ROOMS_CACHE, "room_*.json", FILE_ROOMS_CACHE, ROOMS_ADAPTER)
 
     # load rooms
-    rooms_files = list(DIR_ROOMS_CACHE.glob("*.json"))
-    rooms = {Room(**json.loads(open(file).read())) for file in rooms_files}
+    rooms = set(_load_models(FILE_ROOMS_CACHE, ROOMS_ADAPTER))
 
     # exit if no events are found
     if exit_if_empty and len(rooms) == 0:
@@ -118,23 +225,226 @@ def load_rooms(exit_if_empty: bool) -> set[Room]:
     return rooms
 
 
-def load_ratings(exit_if_empty: bool) -> set[Rating]:
-    """Load all ratings from disk.
+def _migrate_rating_files(directory: Path) -> None:
+    """Migrate ratings from one JSON file each to the ratings log, in time order."""
+    files = list(directory.glob("rating_*.json"))
+    if not files:
+        return
+    logging.info(f"Migrating {len(files)} files in {directory} to {RATINGS_LOG}...")
+
+    ratings = RATINGS_ADAPTER.validate_json(
+        b"[" + b",".join(file.read_bytes() for file in files) + b"]"
+    )
+    save_ratings(set(ratings), directory=directory)
+
+    for file in files:
+        file.unlink()
+
+
+def save_rating(rating: Rating) -> None:
+    """Save single new rating to cache.
+
+    Note: This does not overwrite cached rating for the same event.
+    """
+    save_ratings({rating})
+
+
+def save_ratings(
+    ratings: set[Rating],
+    clear: bool = False,
+    directory: Path = DIR_RATINGS_CACHE,
+) -> None:
+    """Append new ratings to the ratings log, in order of their timestamps.
+
+    Note: This does not overwrite cached ratings for the same events, which are
+    only dropped by compaction (see `compact_ratings`).
+
+    Args:
+        ratings: Ratings to save.
+        clear: Whether to replace all cached ratings, instead of appending.
+        directory: Directory of ratings. Defaults to the ratings cache.
+    """
+    ratings_sorted = sorted(ratings, key=lambda rating: rating.timestamp)
+    lines = b"".join(
+        rating.model_dump_json().encode() + b"\n" for rating in ratings_sorted
+    )
+
+    if clear:
+        write_atomic(directory / RATINGS_LOG, lines)
+        return
+
+    # create ratings directory if it doesn't exist
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / RATINGS_LOG, "a+b") as f:
+        # end a partially written last line, so that it is skipped on its own
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                lines = b"\n" + lines
+        f.write(lines)
+
+
+def load_ratings(
+    exit_if_empty: bool,
+    directory: Path = DIR_RATINGS_CACHE,
+) -> set[Rating]:
+    """Load all ratings from disk, including superseded ones.
+
+    Ratings cached in one file each, by earlier versions, are migrated first.
 
     Args:
         exit_if_empty: Exit if no ratings are found, and give instructions.
+        directory: Directory of ratings. Defaults to the ratings cache.
     Returns:
         List of ratings.
     """
-    # create ratings directory if it doesn't exist
-    DIR_RATINGS_CACHE.mkdir(parents=True, exist_ok=True)
+    _migrate_rating_files(directory)
 
     # load ratings
-    ratings_files = list(DIR_RATINGS_CACHE.glob("*.json"))
-    ratings = {Rating(**json.loads(open(file).read())) for file in ratings_files}
+    log = directory / RATINGS_LOG
+    with phase("cache read"):
+        lines = log.read_bytes().splitlines() if log.exists() else []
+    lines = [line for line in lines if line.strip()]
+    try:
+        with phase("validation"):
+            ratings = set(RATINGS_ADAPTER.validate_json(b"[" + b",".join(lines) + b"]"))
+    except ValueError:
+        # e.g. last line was not written completely, so skip invalid lines
+        ratings = set()
+        for line in lines:
+            try:
+                ratings.add(Rating.model_validate_json(line))
+            except ValueError:
+                logging.warning(f"Skipping invalid line in {log}: {line[:50]!r}")
 
     # exit if no events are found
     if exit_if_empty and len(ratings) == 0:
         print("\nNo ratings found! Run `rate` command to rate events.")
         exit()
     return ratings
+
+
+def save_conflicts(conflicts: Conflicts, key: bytes) -> None:
+    """Save conflicts between cached events in compact binary format.
+
+    Only the conflicts of latest events are kept, one file per formulation.
+    After the header, the file holds the IDs of events (16 bytes each), the
+    size of each group, and the indices of events in all groups (4 bytes each).
+
+    Args:
+        conflicts: Conflicts to save.
+        key: Key of events, which conflicts were found for (see `EventStore.key`).
+    """
+    sizes = [len(group) for group in conflicts.groups]
+    indices = [i for group in conflicts.groups for i in group]
+    data = b"".join(
+        [
+            CONFLICTS_HEADER.pack(
+                CONFLICTS_MAGIC,
+                key,
+                len(conflicts.event_ids),
+                len(sizes),
+                len(indices),
+            ),
+            b"".join(event_id.bytes for event_id in conflicts.event_ids),
+            struct.pack(f"<{len(sizes)}I", *sizes),
+            struct.pack(f"<{len(indices)}I", *indices),
+        ]
+    )
+    write_atomic(DIR_CONFLICTS_CACHE / f"{conflicts.formulation}.bin", data)
+
+
+@phase("cache read")
+def load_conflicts(formulation: Formulation, key: bytes) -> Conflicts | None:
+    """Load conflicts between cached events, if they were found for same events.
+
+    Args:
+        formulation: Formulation of conflicts, as pairs or as cliques.
+        key: Key of events, to find conflicts for (see `EventStore.key`).
+    Returns:
+        Conflicts, or None if there are none for these events (or they are invalid).
+    """
+    file = DIR_CONFLICTS_CACHE / f"{formulation}.bin"
+    if not file.exists():
+        return None
+    data = file.read_bytes()
+    try:
+        magic, file_key, num_events, num_groups, num_indices = (
+            CONFLICTS_HEADER.unpack_from(data)
+        )
+    except struct.error:
+        return None
+    size = CONFLICTS_HEADER.size + 16 * num_events + 4 * (num_groups + num_indices)
+    if magic != CONFLICTS_MAGIC or file_key != key or len(data) != size:
+        return None
+
+    offset = CONFLICTS_HEADER.size
+    event_ids = [
+        UUID(bytes=data[i : i + 16])
+        for i in range(offset, offset + 16 * num_events, 16)
+    ]
+    offset += 16 * num_events
+    sizes = struct.unpack_from(f"<{num_groups}I", data, offset)
+    offset += 4 * num_groups
+    indices = struct.unpack_from(f"<{num_indices}I", data, offset)
+
+    groups = []
+    start = 0
+    for group_size in sizes:
+        groups.append(list(indices[start : start + group_size]))
+        start += group_size
+
+    # skip validation, as groups can be many
+    return Conflicts.model_construct(
+        formulation=formulation, event_ids=event_ids, groups=groups
+    )
+
+
+def save_validators(name: str, validators: HttpValidators) -> None:
+    """Save validators of the API response that the cache was updated from.
+
+    Args:
+        name: Name of cached API response, e.g. 'events'.
+        validators: Validators of response.
+    """
+    write_atomic(DIR_HTTP_CACHE / f"{name}.json", validators.model_dump_json().encode())
+
+
+def load_validators(name: str) -> HttpValidators | None:
+    """Load validators of the API response that the cache was updated from.
+
+    Args:
+        name: Name of cached API response, e.g. 'events'.
+    Returns:
+        Validators of response, or None if there are none (or they are invalid).
+    """
+    file = DIR_HTTP_CACHE / f"{name}.json"
+    if not file.exists():
+        return None
+    try:
+        return HttpValidators.model_validate_json(file.read_bytes())
+    except ValueError:
+        return None
+
+
+def save_warm_start(warm_start: WarmStart) -> None:
+    """Save state of latest optimization to cache, replacing the previous one."""
+    write_atomic(
+        DIR_OPTIMIZE_CACHE / "warm_start.json", warm_start.model_dump_json().encode()
+    )
+
+
+def load_warm_start() -> WarmStart | None:
+    """Load state of latest optimization from disk.
+
+    Returns:
+        State of latest optimization, or None if there is none (or it is invalid).
+    """
+    file = DIR_OPTIMIZE_CACHE / "warm_start.json"
+    if not file.exists():
+        return None
+    try:
+        return WarmStart.model_validate_json(file.read_bytes())
+    except ValueError:
+        # e.g. written by an older version, so optimization starts cold
+        return None
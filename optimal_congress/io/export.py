@@ -0,0 +1,37 @@
+"""Export of optimization results."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from optimal_congress.optimize import Schedule
+
+
+def dump_schedule(schedule: Schedule) -> dict[str, Any]:
+    """Dump schedule to JSON-compatible dict, with events sorted by start time.
+
+    The state for a next warm start is not dumped.
+
+    Args:
+        schedule: Schedule to dump.
+    Returns:
+        Schedule as dict.
+    """
+    events = sorted(schedule.events, key=lambda event: event.schedule_start)
+    return {
+        **schedule.model_dump(mode="json", exclude={"events", "warm_start"}),
+        "events": [event.model_dump(mode="json") for event in events],
+    }
+
+
+def save_schedules(schedules: dict[str, Schedule], path: Path) -> None:
+    """Save schedules of many attendees to a single JSON file.
+
+    Args:
+        schedules: Schedule by name of attendee.
+        path: Path of JSON file to write.
+    """
+    export = {name: dump_schedule(schedule) for name, schedule in schedules.items()}
+
+    with open(path, "w") as f:
+        json.dump(export, f, indent=2)
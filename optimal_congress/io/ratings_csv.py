@@ -0,0 +1,18 @@
+"""Schema of ratings exported to, and imported from, CSV.
+
+This module is imported only by the commands that export or import CSV, as pandas
+and pandera are slow to import.
+"""
+
+from uuid import UUID
+
+import pandera as pa
+
+
+class RatingsExport(pa.typing.DataFrame):
+    """A schema for exporting and importing ratings to/from CSV."""
+
+    score: float = pa.Field()
+    name: str = pa.Field()
+    url: str = pa.Field()
+    id: UUID = pa.Field()
@@ -0,0 +1,416 @@
+"""Mixed integer linear programs of the schedule optimization, solved with PuLP.
+
+This module is imported only by the MILP solver backends, as PuLP is slow to import.
+"""
+
+import logging
+import re
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pulp import (
+    PULP_CBC_CMD,
+    HiGHS,
+    HiGHS_CMD,
+    LpConstraint,
+    LpMaximize,
+    LpProblem,
+    LpSolver,
+    LpVariable,
+    lpSum,
+    value,
+)
+from pulp.apis.core import PulpSolverError
+from pulp.constants import LpSolution, LpSolutionIntegerFeasible, LpSolutionOptimal
+
+from optimal_congress.profiling import phase
+from optimal_congress.schema import (
+    Event,
+    WarmStart,
+    find_conflicting_pairs,
+)
+from optimal_congress.solvers import (
+    ScheduleProblem,
+    SolverOptions,
+    SolverResult,
+    solve_greedy,
+)
+
+# logger of programs and their solutions, which are expensive to format, so that
+# they are only logged if explicitly enabled (see `--debug-lp` of the CLI)
+LP_LOGGER = logging.getLogger("optimal_congress.lp")
+
+
+def solve_cbc(problem: ScheduleProblem, options: SolverOptions) -> SolverResult:
+    """Solve the mixed integer linear program with CBC.
+
+    The best bound is read from the CBC log, as PuLP does not report it. In anytime
+    mode, the greedy schedule is taken if CBC fails: e.g. the bundled CBC may crash
+    at the time limit, when started from a MIP start.
+    """
+    with TemporaryDirectory() as tmp_dir:
+        log_path = Path(tmp_dir) / "cbc.log"
+        solver = PULP_CBC_CMD(
+            msg=False,
+            threads=options.threads,
+            timeLimit=options.time_limit,
+            gapRel=options.gap,
+            logPath=str(log_path),
+            warmStart=problem.warm_start is not None or options.anytime,
+        )
+        try:
+            prob, lp_vars = solve_milp(problem=problem, options=options, solver=solver)
+        except PulpSolverError as e:
+            if not options.anytime:
+                raise
+            logging.warning(f"CBC failed ({e}), taking greedy schedule.")
+            return solve_greedy(problem, options)
+        log = log_path.read_text() if log_path.exists() else ""
+
+    # e.g. 'Upper bound:      1553.703', if stopped before optimality was proven
+    match = re.search(r"^(?:Upper|Lower) bound:\s+(\S+)", log, flags=re.MULTILINE)
+    gap = None
+    if match:
+        # relative gap between solution and bound, as defined by CBC
+        objective = value(prob.objective) or 0.0
+        gap = abs(float(match.group(1)) - objective) / max(abs(objective), 1e-10)
+    return milp_result(
+        problem=problem, prob=prob, lp_vars=lp_vars, options=options, gap=gap
+    )
+
+
+def solve_highs(problem: ScheduleProblem, options: SolverOptions) -> SolverResult:
+    """Solve the mixed integer linear program with HiGHS.
+
+    Requires either the `highspy` package, or the `highs` executable.
+    """
+    solver: LpSolver
+    for highs_api in (HiGHS, HiGHS_CMD):
+        solver = highs_api(
+            msg=False,
+            threads=options.threads,
+            timeLimit=options.time_limit,
+            gapRel=options.gap,
+        )
+        if solver.available():
+            break
+    else:
+        raise ValueError(
+            "Solver 'highs' is not available. Install it with `pip install highspy`."
+        )
+    prob, lp_vars = solve_milp(problem=problem, options=options, solver=solver)
+
+    # only the highspy API reports the gap
+    gap = None
+    if isinstance(solver, HiGHS):
+        gap = prob.solverModel.getInfo().mip_gap
+    return milp_result(
+        problem=problem, prob=prob, lp_vars=lp_vars, options=options, gap=gap
+    )
+
+
+def build_milp(
+    problem: ScheduleProblem,
+    options: SolverOptions,
+) -> tuple[LpProblem, list[LpVariable]]:
+    """Build the mixed integer linear program of the schedule optimization.
+
+    If the problem comes with a previous program of compatible events, that
+    program is patched instead of built from scratch (see `patch_milp`). In any
+    case, the previous schedule is set as initial solution of the program. In
+    anytime mode without previous schedule, the greedy schedule is set instead,
+    so that the solver has a solution from the start.
+
+    Args:
+        problem: Events and their scores, possibly with a previous program.
+        options: Solver options, including the formulation of constraints.
+    Returns:
+        The program, and its decision variables in same order as events.
+    """
+    warm_start = problem.warm_start
+    if warm_start is not None and _is_patchable(warm_start, problem, options):
+        prob, lp_vars = patch_milp(problem=problem, warm_start=warm_start)
+    else:
+        prob, lp_vars = _build_milp_from_scratch(problem=problem, options=options)
+
+    # previous (or greedy) schedule as initial solution, for MIP start
+    if warm_start is not None:
+        for event, lp_var in zip(problem.events, lp_vars):
+            lp_var.setInitialValue(1 if event.id in warm_start.scheduled else 0)
+    elif options.anytime:
+        scheduled = set(solve_greedy(problem, options).scheduled)
+        for i, lp_var in enumerate(lp_vars):
+            lp_var.setInitialValue(1 if i in scheduled else 0)
+
+    return prob, lp_vars
+
+
+def _variable_name(event: Event) -> str:
+    """Name of the decision variable of an event, stable across programs."""
+    return f"event_{event.id.hex}"
+
+
+def _overlap_constraint(
+    lp_vars: list[LpVariable],
+    events: list[Event],
+    i: int,
+    j: int,
+) -> tuple[LpConstraint, str]:
+    """Constraint with its name, that two overlapping events are not both attended."""
+    name = f"overlap_{events[i].id.hex}_{events[j].id.hex}"
+    return (lp_vars[i] + lp_vars[j] <= 1, name)
+
+
+def _add_load_rows(
+    prob: LpProblem,
+    lp_vars: list[LpVariable],
+    problem: ScheduleProblem,
+) -> None:
+    """Replace the load limits of a program with those of the given problem."""
+    for name in [name for name in prob.constraints if name.startswith("load_")]:
+        del prob.constraints[name]
+    for row in problem.load_rows():
+        prob += (
+            lpSum(lp_vars[i] * weight for i, weight in zip(row.indices, row.weights))
+            <= row.bound,
+            row.name,
+        )
+
+
+def _build_milp_from_scratch(
+    problem: ScheduleProblem,
+    options: SolverOptions,
+) -> tuple[LpProblem, list[LpVariable]]:
+    """Build the mixed integer linear program, without previous program."""
+    events = problem.events
+
+    # define problem
+    prob = LpProblem(name="OptimalCongress", sense=LpMaximize)
+
+    # define decision variables (binary vector of same length as events)
+    lp_vars = [
+        LpVariable(
+            name=_variable_name(event),
+            cat="Binary",
+        )
+        for event in events
+    ]
+
+    # objective function: maximize sum of ratings for scheduled events
+    prob += lpSum(lp_var * score for lp_var, score in zip(lp_vars, problem.scores))
+
+    # constraints: no overlapping events can be scheduled
+    pair_names: set[str] = set()
+    for k, group in enumerate(problem.conflict_groups(options.formulation)):
+        if len(group) == 2:
+            constraint, name = _overlap_constraint(lp_vars, events, *group)
+            # restricted cliques may contain same pair several times
+            if name not in pair_names:
+                pair_names.add(name)
+                prob += (constraint, name)
+        else:
+            prob += (lpSum(lp_vars[i] for i in group) <= 1, f"overlap_{k}")
+
+    # constraints: limits on load, e.g. hours per day, as one row each
+    _add_load_rows(prob, lp_vars, problem)
+
+    return prob, lp_vars
+
+
+def _is_patchable(
+    warm_start: WarmStart,
+    problem: ScheduleProblem,
+    options: SolverOptions,
+) -> bool:
+    """Check if previous program can be patched to the given problem.
+
+    This requires the same formulation and transit times, and no changed times of
+    known events, as their constraints would be outdated.
+    """
+    if warm_start.model is None or warm_start.formulation != options.formulation:
+        return False
+    if warm_start.transit != problem.transit:
+        return False
+    return all(
+        warm_start.event_times.get(event.id, times) == times
+        for event in problem.events
+        for times in [(event.schedule_start, event.schedule_end)]
+    )
+
+
+def patch_milp(
+    problem: ScheduleProblem,
+    warm_start: WarmStart,
+) -> tuple[LpProblem, list[LpVariable]]:
+    """Patch a previous program to the given problem, instead of rebuilding it.
+
+    The objective is replaced with the current scores. Events that are not part of
+    the program yet are added as variables, with their overlap constraints. Events
+    that are no longer part of the problem are fixed to not be scheduled, or
+    dropped if they are in no constraint anymore. Load limits are replaced with
+    those of the problem.
+
+    Args:
+        problem: Events and their scores.
+        warm_start: Previous program, with same formulation and event times.
+    Returns:
+        The program, and its decision variables in same order as events.
+    """
+    assert warm_start.model is not None
+    events = problem.events
+    _, prob = LpProblem.from_dict(warm_start.model)
+    previous_vars = prob.variablesDict()
+
+    # reuse variables of known events, and add new variables for unknown ones
+    lp_vars: list[LpVariable] = []
+    added: set[int] = set()
+    for i, event in enumerate(events):
+        lp_var = previous_vars.get(_variable_name(event))
+        if lp_var is None:
+            lp_var = LpVariable(name=_variable_name(event), cat="Binary")
+            added.add(i)
+        elif lp_var.upBound == 0:
+            # removed before, so overlap constraints with new events may be missing
+            added.add(i)
+        lp_var.upBound = 1
+        lp_vars.append(lp_var)
+
+    # fix variables of events that are no longer part of the problem
+    current_names = {lp_var.name for lp_var in lp_vars}
+    for name, lp_var in previous_vars.items():
+        if name not in current_names:
+            lp_var.upBound = 0
+
+    # patch objective with current scores
+    prob.setObjective(
+        lpSum(lp_var * score for lp_var, score in zip(lp_vars, problem.scores))
+    )
+
+    # conflict constraints of added events, in pairwise formulation
+    if added:
+        constraint_names = set(prob.constraints)
+        for i, j in find_conflicting_pairs(events, transit=problem.transit):
+            if i in added or j in added:
+                constraint, name = _overlap_constraint(lp_vars, events, i, j)
+                if name not in constraint_names:
+                    prob += (constraint, name)
+
+    # load limits span many events, so they are cheaper to rebuild than to patch
+    _add_load_rows(prob, lp_vars, problem)
+
+    logging.debug(f"Patched previous program with {len(added)} added events.")
+    return _without_orphans(prob), lp_vars
+
+
+def _without_orphans(prob: LpProblem) -> LpProblem:
+    """Copy a program with only the variables of its objective and constraints.
+
+    Variables of removed events may have occurred only in replaced load limits. As
+    such variables have no column, CBC rejects programs that still contain them.
+    """
+    pruned = LpProblem(name=prob.name, sense=prob.sense)
+    pruned.setObjective(prob.objective)
+    for name, constraint in prob.constraints.items():
+        pruned += (constraint, name)
+    return pruned
+
+
+def solve_milp(
+    problem: ScheduleProblem,
+    options: SolverOptions,
+    solver: LpSolver,
+) -> tuple[LpProblem, list[LpVariable]]:
+    """Build and solve the mixed integer linear program with a PuLP solver.
+
+    With a time limit or gap, the best solution found so far is accepted. If the
+    time limit is hit before any solution is found, the greedy schedule is taken,
+    as it is always feasible.
+
+    Returns:
+        The solved program, and its decision variables in same order as events.
+    Raises:
+        ValueError: If no optimal solution is found, without time limit or gap.
+    """
+    with phase("model build"):
+        prob, lp_vars = build_milp(problem=problem, options=options)
+
+    if LP_LOGGER.isEnabledFor(logging.DEBUG):
+        LP_LOGGER.debug(f"\nProblem:\n{prob}")
+
+    # solve problem
+    with phase("solve"):
+        prob.solve(solver)
+
+    # check if optimal (or, in anytime mode, any) solution was found
+    optimal = prob.sol_status == LpSolutionOptimal
+    feasible = prob.sol_status == LpSolutionIntegerFeasible
+    if options.anytime and not (optimal or feasible):
+        logging.warning(
+            "Time limit was hit without a feasible solution "
+            f"(status: {LpSolution[prob.sol_status]}), taking greedy schedule."
+        )
+        scheduled = set(solve_greedy(problem, options).scheduled)
+        for i, lp_var in enumerate(lp_vars):
+            lp_var.varValue = 1 if i in scheduled else 0
+        prob.sol_status = LpSolutionIntegerFeasible
+    elif not (optimal or (options.anytime and feasible)):
+        raise ValueError(
+            f"No optimal solution found (status: {LpSolution[prob.sol_status]})."
+        )
+
+    if LP_LOGGER.isEnabledFor(logging.DEBUG):
+        LP_LOGGER.debug(
+            "solution:\n"
+            + "\n".join(f"{var.name}: {var.varValue}" for var in prob.variables())
+        )
+
+    return prob, lp_vars
+
+
+def milp_result(
+    problem: ScheduleProblem,
+    prob: LpProblem,
+    lp_vars: list[LpVariable],
+    options: SolverOptions,
+    gap: float | None,
+) -> SolverResult:
+    """Extract scheduled events and optimality gap from a solved program.
+
+    Args:
+        problem: Events and their scores, possibly with a previous program.
+        prob: Solved program.
+        lp_vars: Decision variables, in same order as events.
+        options: Options the program was solved with.
+        gap: Relative gap to best bound reported by the solver, if known.
+    Returns:
+        Solution of the program.
+    """
+    objective = value(prob.objective) or 0.0
+    optimal = prob.sol_status == LpSolutionOptimal
+
+    # without gap tolerance, an optimal solution has no gap
+    if gap is None and optimal and options.gap is None:
+        gap = 0.0
+
+    scheduled = [i for i, lp_var in enumerate(lp_vars) if (lp_var.varValue or 0) > 0.5]
+
+    # keep times of all events in program, including those of previous programs
+    event_times = problem.warm_start.event_times if problem.warm_start else {}
+    event_times = event_times | {
+        event.id: (event.schedule_start, event.schedule_end) for event in problem.events
+    }
+    warm_start = WarmStart(
+        scheduled={problem.events[i].id for i in scheduled},
+        model=prob.to_dict(),
+        formulation=options.formulation,
+        event_times=event_times,
+        transit=problem.transit,
+    )
+
+    return SolverResult(
+        scheduled=scheduled,
+        status="optimal" if optimal else "feasible",
+        objective=objective,
+        gap=gap,
+        warm_start=warm_start,
+    )
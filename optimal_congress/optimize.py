@@ -1,82 +1,523 @@
 """Schedule optimization."""
 
+import hashlib
 import logging
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from typing import TYPE_CHECKING
 
-from pulp import PULP_CBC_CMD, LpMaximize, LpProblem, LpStatus, LpVariable
+from pydantic import BaseModel, Field
 
-from optimal_congress.schema import Event, EventRating, events_overlap
+from optimal_congress.constraints import LoadRow, ScheduleConstraints
+from optimal_congress.io.cache import load_conflicts, save_conflicts
+from optimal_congress.schema import (
+    Conflicts,
+    Event,
+    EventRating,
+    Formulation,
+    TransitTimes,
+    WarmStart,
+    events_conflict,
+    find_overlap_components,
+)
+from optimal_congress.solvers import (
+    ScheduleProblem,
+    SolverBackend,
+    SolverOptions,
+    SolverResult,
+    SolverStatus,
+    get_solver,
+)
 
+if TYPE_CHECKING:
+    from optimal_congress.store import EventStore
 
-def optimize_schedule(
+# solver backends that use precomputed conflicts, unlike the dynamic program
+CONFLICT_SOLVERS = ("cbc", "highs", "greedy")
+
+
+class Schedule(BaseModel):
+    """Scheduled events, and how they were found."""
+
+    events: set[Event]
+    solver: str = Field(description="Name of solver backend that found schedule.")
+    status: SolverStatus
+    objective: float = Field(description="Total score of scheduled events.")
+    gap: float | None = Field(description="Relative gap to best known bound.")
+    warm_start: WarmStart = Field(description="State to start next optimization.")
+
+    class Config:
+        frozen = True  # instances immutable
+
+
+def solve_schedule(
     event_ratings: set[EventRating],
-) -> set[Event]:
+    solver: str = "auto",
+    options: SolverOptions | None = None,
+    warm_start: WarmStart | None = None,
+    workers: int | None = None,
+    conflicts: Conflicts | Callable[[], Conflicts] | None = None,
+    transit: TransitTimes | None = None,
+    constraints: ScheduleConstraints | None = None,
+) -> Schedule:
     """
-    Optimize the schedule of events based on ratings.
+    Optimize the schedule of events based on ratings, and report solver status.
+
+    With a time limit, this works as anytime optimization: If optimality is not
+    proven within the limit, the best schedule found so far is returned, along
+    with its gap to the best known bound.
+
+    With a warm start from a previous optimization, MILP solvers patch the previous
+    program instead of rebuilding it, and start from the previous schedule.
+
+    With workers, the problem is split into components of overlapping events,
+    which are solved independently on a pool of processes (see `solve_components`).
+
+    With constraints, events before the earliest or after the latest time are
+    dropped, and limits on load are passed on to the solver backend.
 
     Args:
         events_ratings: Tuples of events and matching ratings.
+        solver: Name of a registered solver backend, or 'auto' (see `select_solver`).
+        options: Options for the solver backend, e.g. formulation or time limit.
+        warm_start: State of a previous optimization, see `Schedule.warm_start`.
+        workers: Number of processes to solve components with, if any.
+        conflicts: Precomputed conflicts of a superset of the rated events, found
+            with the same transit times, or a function to find them. It is only
+            called if the solver backend uses conflicts (see `CONFLICT_SOLVERS`).
+        transit: Minutes to get from room to room, to leave between events.
+        constraints: Limits on the schedule, e.g. hours per day or breaks.
     Returns:
-        Scheduled events.
+        Scheduled events, with status of solution.
     Raises:
-        ValueError: If no optimal solution is found.
+        ValueError: If no solution is found, or no optimal one without time limit.
     """
+    if constraints is not None:
+        event_ratings = {
+            event_rating
+            for event_rating in event_ratings
+            if constraints.admits(event_rating.event)
+        }
+
     # unpack events and ratings
     events = [event_rating.event for event_rating in event_ratings]
-    ratings = [event_rating.rating for event_rating in event_ratings]
+    problem = ScheduleProblem(
+        events=events,
+        scores=[event_rating.rating.score for event_rating in event_ratings],
+        warm_start=warm_start,
+        transit=transit,
+        constraints=constraints,
+    )
+    options = options or SolverOptions()
+
+    if solver == "auto":
+        solver = select_solver(problem)
+    if conflicts is not None and solver in CONFLICT_SOLVERS:
+        if callable(conflicts):
+            conflicts = conflicts()
+        problem = problem.model_copy(update={"conflicts": conflicts.restrict(events)})
+    backend = get_solver(solver)
+    if workers is None:
+        result = backend(problem, options)
+    else:
+        result = solve_components(
+            backend=backend, problem=problem, options=options, workers=workers
+        )
 
-    # sanity check
-    assert len(events) == len(ratings)
+    # backends without program keep the previous one for next warm start
+    scheduled_ids = {problem.events[i].id for i in result.scheduled}
+    next_warm_start = result.warm_start or (
+        warm_start.model_copy(update={"scheduled": scheduled_ids})
+        if warm_start is not None
+        else WarmStart(scheduled=scheduled_ids)
+    )
 
-    # define problem
-    prob = LpProblem(name="OptimalCongress", sense=LpMaximize)
+    return Schedule(
+        events={problem.events[i] for i in result.scheduled},
+        solver=solver,
+        status=result.status,
+        objective=result.objective,
+        gap=result.gap,
+        warm_start=next_warm_start,
+    )
 
-    # define decision variables (binary vector of same length as events)
-    lp_vars = [
-        LpVariable(
-            name=event.slug,
-            cat="Binary",
-        )
-        for event in events
-    ]
-
-    # objective function: maximize sum of ratings for scheduled events
-    prob += sum(lp_var * rating.score for lp_var, rating in zip(lp_vars, ratings))
-
-    # constraints: no overlapping events can be scheduled
-    for i, event_i in enumerate(events):
-        for j, event_j in enumerate(events):
-            if i >= j:
-                # avoid double counting, and comparing event to itself
-                continue
-            if events_overlap(event_i, event_j):
-                # rename event names to make work with pulp
-                event_i_name = event_i.slug.replace("-", "_")
-                event_j_name = event_j.slug.replace("-", "_")
-                constraint_name = f"overlap_{event_i_name}_{event_j_name}"
-                prob += (lp_vars[i] + lp_vars[j] <= 1, constraint_name)
-
-    logging.debug("\nProblem:")
-    logging.debug(prob)
-
-    # solve problem
-    prob.solve(PULP_CBC_CMD(msg=False))
-
-    # check if optimal solution was found
-    optimal = LpStatus[prob.status] == "Optimal"
-    if not optimal:
-        raise ValueError("No optimal solution found.")
-
-    logging.debug("solution:")
-    for var in prob.variables():
-        logging.debug(f"{var.name}: {var.varValue}")
-
-    # extract scheduled events
-    scheduled_event_names: set[str] = {
-        var.name for var in prob.variables() if var.varValue == 1
+
+def solve_rolling(
+    event_ratings: set[EventRating],
+    now: datetime,
+    warm_start: WarmStart | None = None,
+    solver: str = "auto",
+    options: SolverOptions | None = None,
+    conflicts: Conflicts | Callable[[], Conflicts] | None = None,
+    transit: TransitTimes | None = None,
+    constraints: ScheduleConstraints | None = None,
+) -> Schedule:
+    """Re-optimize the schedule from now on, keeping events that already started.
+
+    Events of the previous schedule that started before now are kept, as they
+    were attended already (or are being attended). Only events that start from
+    now on, and after all kept events ended, are optimized. So the program
+    shrinks as the congress goes on, and is built from scratch each time. It is
+    not kept for the next warm start, as it lacks all past events. With
+    transit times, optimized events also leave time to get from the kept events.
+    Kept events count towards limits on load, e.g. towards the hours of their day.
+
+    Args:
+        events_ratings: Tuples of events and matching ratings.
+        now: Time from which on events are optimized, with timezone.
+        warm_start: State of a previous optimization, with the events to keep.
+        solver: Name of a registered solver backend, or 'auto' (see `select_solver`).
+        options: Options for the solver backend, e.g. formulation or time limit.
+        conflicts: Precomputed conflicts of a superset of the rated events, or a
+            function to find them, as in `solve_schedule`.
+        transit: Minutes to get from room to room, to leave between events.
+        constraints: Limits on the schedule, e.g. hours per day or breaks.
+    Returns:
+        Kept and optimized events, with status of solving the optimized ones.
+    Raises:
+        ValueError: If no solution is found, or no optimal one without time limit.
+    """
+    previous = warm_start.scheduled if warm_start is not None else set()
+    kept = {
+        event_rating
+        for event_rating in event_ratings
+        if event_rating.event.id in previous and event_rating.event.schedule_start < now
     }
-    scheduled_events: set[Event] = {
-        event
-        for event in events
-        if event.slug.replace("-", "_") in scheduled_event_names
+    # events to optimize start once kept events ended, so they never overlap
+    start = max([now, *[event_rating.event.schedule_end for event_rating in kept]])
+    upcoming = {
+        event_rating
+        for event_rating in event_ratings
+        if event_rating.event.schedule_start >= start
+        and not any(
+            events_conflict(kept_rating.event, event_rating.event, transit)
+            for kept_rating in kept
+        )
     }
-    return scheduled_events
+    logging.debug(f"Keeping {len(kept)} events, optimizing {len(upcoming)} events.")
+    if constraints is not None:
+        constraints = constraints.model_copy(
+            update={"attended": [event_rating.event for event_rating in kept]}
+        )
+
+    schedule = solve_schedule(
+        event_ratings=upcoming,
+        solver=solver,
+        options=options,
+        # previous schedule as MIP start, but not previous program of all events
+        warm_start=WarmStart(scheduled=previous) if warm_start is not None else None,
+        conflicts=conflicts,
+        transit=transit,
+        constraints=constraints,
+    )
+    kept_events = {event_rating.event for event_rating in kept}
+    return schedule.model_copy(
+        update={
+            "events": schedule.events | kept_events,
+            "objective": schedule.objective
+            + sum([event_rating.rating.score for event_rating in kept]),
+            # program of upcoming events only, so the next one is built anew
+            "warm_start": WarmStart(
+                scheduled=schedule.warm_start.scheduled
+                | {event.id for event in kept_events}
+            ),
+        }
+    )
+
+
+def solve_components(
+    backend: SolverBackend,
+    problem: ScheduleProblem,
+    options: SolverOptions,
+    workers: int,
+) -> SolverResult:
+    """Solve the components of overlapping events independently, and merge results.
+
+    Events of different components never overlap, so their optimal schedules can
+    be found independently, and solving time scales with the largest component.
+
+    Components that share a limit on load, e.g. on the hours of the same day, are
+    merged, as their schedules depend on each other.
+
+    Sub-problems are built from scratch, so only the previous schedule is used as
+    warm start, but not the previous program. A time limit applies per component.
+
+    Args:
+        backend: Solver backend to solve each component with.
+        problem: Events and their scores, possibly with previous schedule.
+        options: Options for the solver backend.
+        workers: Number of processes to solve with. With 1, solve in this process.
+    Returns:
+        Merged solution of all components, without program for next warm start.
+    """
+    components = find_overlap_components(problem.events, transit=problem.transit)
+    components = _merge_components(components, problem.load_rows())
+    logging.debug(f"Solving {len(components)} components with {workers} workers.")
+
+    mip_start = None
+    if problem.warm_start is not None:
+        mip_start = WarmStart(scheduled=problem.warm_start.scheduled)
+    subproblems = []
+    for component in components:
+        events = [problem.events[i] for i in component]
+        subproblems.append(
+            ScheduleProblem(
+                events=events,
+                scores=[problem.scores[i] for i in component],
+                warm_start=mip_start,
+                conflicts=(
+                    problem.conflicts.restrict(events)
+                    if problem.conflicts is not None
+                    else None
+                ),
+                transit=problem.transit,
+                constraints=problem.constraints,
+            )
+        )
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                pool.map(
+                    backend,
+                    subproblems,
+                    repeat(options),
+                    chunksize=max(1, len(subproblems) // (4 * workers)),
+                )
+            )
+    else:
+        results = [backend(subproblem, options) for subproblem in subproblems]
+
+    # gaps are relative to objective, so total gap is their weighted average
+    objective = sum([result.objective for result in results])
+    gap = None
+    if all(result.gap is not None for result in results):
+        gap = sum(
+            [abs(result.objective) * (result.gap or 0.0) for result in results]
+        ) / max(abs(objective), 1e-10)
+
+    status: SolverStatus = "optimal"
+    if any(result.status != "optimal" for result in results):
+        status = "feasible"
+
+    return SolverResult(
+        scheduled=[
+            component[i]
+            for component, result in zip(components, results)
+            for i in result.scheduled
+        ],
+        status=status,
+        objective=objective,
+        gap=gap,
+    )
+
+
+def _merge_components(
+    components: list[list[int]], rows: list[LoadRow]
+) -> list[list[int]]:
+    """Merge components of events that are limited by the same row.
+
+    Args:
+        components: Lists of indices of events, one for each component.
+        rows: Limits on load, with indices of events.
+    Returns:
+        Lists of indices of events, with each row within a single list.
+    """
+    component_of = {i: k for k, component in enumerate(components) for i in component}
+    parent = list(range(len(components)))
+
+    def find(k: int) -> int:
+        """Find representative of merged component, halving the path to it."""
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    for row in rows:
+        roots = {find(component_of[i]) for i in row.indices}
+        first = min(roots, default=0)
+        for root in roots:
+            parent[root] = first
+
+    merged: dict[int, list[int]] = defaultdict(list)
+    for k, component in enumerate(components):
+        merged[find(k)].extend(component)
+    return list(merged.values())
+
+
+# conflicts of all events, shared by batch workers (see `solve_batch`)
+_batch_conflicts: Conflicts | None = None
+
+
+def _init_batch_worker(conflicts: Conflicts) -> None:
+    """Keep conflicts of all events in worker process, to restrict per attendee."""
+    global _batch_conflicts
+    _batch_conflicts = conflicts
+
+
+def _solve_batch_item(
+    event_ratings: set[EventRating],
+    solver: str,
+    options: SolverOptions,
+    constraints: ScheduleConstraints | None = None,
+) -> Schedule:
+    """Solve schedule of a single attendee, with conflicts of worker process."""
+    schedule = solve_schedule(
+        event_ratings=event_ratings,
+        solver=solver,
+        options=options,
+        conflicts=_batch_conflicts,
+        constraints=constraints,
+    )
+    # program of each attendee is not kept, so do not send it back
+    return schedule.model_copy(
+        update={"warm_start": WarmStart(scheduled=schedule.warm_start.scheduled)}
+    )
+
+
+def solve_batch(
+    event_ratings: dict[str, set[EventRating]],
+    events: set[Event] | None = None,
+    solver: str = "auto",
+    options: SolverOptions | None = None,
+    workers: int = 1,
+    conflicts: Conflicts | None = None,
+    constraints: ScheduleConstraints | None = None,
+) -> dict[str, Schedule]:
+    """Optimize the schedules of many attendees on the same events.
+
+    Conflicts between events are found once for all events, and restricted to the
+    rated events of each attendee. Attendees are solved on a pool of processes,
+    each of which receives the conflicts only once.
+
+    Args:
+        event_ratings: Events and matching ratings, by name of attendee.
+        events: All events, of which attendees rated some. Only needed without
+            conflicts, and defaults to the rated events of all attendees.
+        solver: Name of a registered solver backend, or 'auto' (see `select_solver`).
+        options: Options for the solver backend, e.g. formulation or time limit.
+        workers: Number of processes to solve attendees with. With 1, solve in this
+            process.
+        conflicts: Precomputed conflicts of all events, if any.
+        constraints: Limits on the schedule of each attendee, e.g. hours per day.
+    Returns:
+        Schedule by name of attendee, without program for next warm start.
+    Raises:
+        ValueError: If no solution is found, or no optimal one without time limit.
+    """
+    options = options or SolverOptions()
+    if conflicts is None or conflicts.formulation != options.formulation:
+        if events is None:
+            events = {
+                event_rating.event
+                for attendee_ratings in event_ratings.values()
+                for event_rating in attendee_ratings
+            }
+        conflicts = Conflicts.from_events(
+            sorted(events, key=lambda event: event.schedule_start),
+            formulation=options.formulation,
+        )
+    names = list(event_ratings)
+    logging.debug(f"Solving schedules of {len(names)} attendees.")
+
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_batch_worker,
+            initargs=(conflicts,),
+        ) as pool:
+            schedules = list(
+                pool.map(
+                    _solve_batch_item,
+                    [event_ratings[name] for name in names],
+                    repeat(solver),
+                    repeat(options),
+                    repeat(constraints),
+                )
+            )
+    else:
+        _init_batch_worker(conflicts)
+        schedules = [
+            _solve_batch_item(event_ratings[name], solver, options, constraints)
+            for name in names
+        ]
+
+    return dict(zip(names, schedules))
+
+
+def load_or_find_conflicts(
+    store: "EventStore",
+    formulation: Formulation,
+    transit: TransitTimes | None = None,
+) -> Conflicts:
+    """Load conflicts between events from cache, or find and cache them.
+
+    Conflicts depend only on IDs and times of events, and on transit times if
+    any, so they are found once per version of the events cache, and reused until
+    events or transit times change.
+
+    Args:
+        store: All events, e.g. of the events cache.
+        formulation: Whether to group conflicts by pairs or by cliques.
+        transit: Minutes to get from room to room. Defaults to overlaps only.
+    Returns:
+        Conflicts between events.
+    """
+    key = store.key()
+    if transit is not None:
+        key = hashlib.blake2b(key + transit.key(), digest_size=16).digest()
+    conflicts = load_conflicts(formulation=formulation, key=key)
+    if conflicts is None:
+        logging.debug(f"Finding {formulation} conflicts between events.")
+        conflicts = store.conflicts(formulation, transit=transit)
+        save_conflicts(conflicts=conflicts, key=key)
+    return conflicts
+
+
+def optimize_schedule(
+    event_ratings: set[EventRating],
+    solver: str = "auto",
+    options: SolverOptions | None = None,
+    workers: int | None = None,
+    constraints: ScheduleConstraints | None = None,
+) -> set[Event]:
+    """
+    Optimize the schedule of events based on ratings.
+
+    Args:
+        events_ratings: Tuples of events and matching ratings.
+        solver: Name of a registered solver backend, or 'auto' (see `select_solver`).
+        options: Options for the solver backend, e.g. formulation or time limit.
+        workers: Number of processes to solve components with, if any.
+        constraints: Limits on the schedule, e.g. hours per day or breaks.
+    Returns:
+        Scheduled events.
+    Raises:
+        ValueError: If no solution is found, or no optimal one without time limit.
+    """
+    schedule = solve_schedule(
+        event_ratings=event_ratings,
+        solver=solver,
+        options=options,
+        workers=workers,
+        constraints=constraints,
+    )
+    return schedule.events
+
+
+def select_solver(problem: ScheduleProblem) -> str:
+    """Select the fastest exact solver backend that supports the given problem.
+
+    Args:
+        problem: Events and their scores.
+    Returns:
+        Name of registered solver backend.
+    """
+    # transit times depend on pairs of rooms, and limits on load on many events,
+    # which only MILP solvers support
+    if problem.transit is not None or problem.load_rows():
+        return "cbc"
+    return "dp"
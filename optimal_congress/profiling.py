@@ -0,0 +1,145 @@
+"""Timing of the phases of a command, e.g. cache read, join, or solve.
+
+Phases are marked with `phase`, which costs next to nothing unless profiling
+was started. Time of nested phases is only counted for the innermost phase, so
+the times of all phases add up to at most the total time.
+"""
+
+import json
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+
+class Span(BaseModel):
+    """A single run of a phase."""
+
+    name: str
+    start: float = Field(description="Seconds since profiling started.")
+    duration: float = Field(description="Seconds, including nested phases.")
+    own: float = Field(description="Seconds, excluding nested phases.")
+
+    class Config:
+        frozen = True  # instances immutable and hashable
+
+
+class Profiler:
+    """Spans of phases, recorded while profiling in the thread that started it."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.end: float | None = None
+        self.thread = threading.get_ident()
+        self.spans: list[Span] = []
+        self.nested: list[float] = []  # seconds of nested phases, per open phase
+
+    @property
+    def total(self) -> float:
+        """Seconds from start until stop of profiling, or until now."""
+        return (self.end or time.perf_counter()) - self.start
+
+    def summary(self) -> dict[str, tuple[float, int]]:
+        """Return own seconds and number of runs by phase, in order of first run."""
+        summary: dict[str, tuple[float, int]] = {}
+        for span in sorted(self.spans, key=lambda span: span.start):
+            seconds, count = summary.get(span.name, (0.0, 0))
+            summary[span.name] = (seconds + span.own, count + 1)
+        return summary
+
+    def report(self) -> str:
+        """Format a breakdown of the total time by phase."""
+        total = self.total
+        lines = [f"Profile of {total * 1e3:.1f} ms:"]
+        rows = list(self.summary().items())
+        other = total - sum([seconds for _, (seconds, _) in rows])
+        for name, (seconds, count) in [*rows, ("other", (other, 0))]:
+            runs = f" ({count} runs)" if count > 1 else ""
+            lines.append(
+                f"- {name[:20]:.<22}{seconds * 1e3:>9.1f} ms "
+                f"{seconds / max(total, 1e-10):>6.1%}{runs}"
+            )
+        return "\n".join(lines)
+
+    def save_trace(self, path: Path) -> None:
+        """Write spans in trace event format, e.g. for chrome://tracing or Perfetto.
+
+        Args:
+            path: JSON file to write trace to.
+        """
+        trace = {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "ph": "X",  # complete event, with duration
+                    "ts": span.start * 1e6,
+                    "dur": span.duration * 1e6,
+                    "pid": 0,
+                    "tid": 0,
+                }
+                for span in self.spans
+            ],
+            "displayTimeUnit": "ms",
+            "summary": {
+                name: {"seconds": seconds, "runs": count}
+                for name, (seconds, count) in self.summary().items()
+            },
+            "total": self.total,
+        }
+        path.write_text(json.dumps(trace, indent=2))
+
+
+# profiler of the running command, if profiling
+_profiler: Profiler | None = None
+
+
+def start_profiling() -> Profiler:
+    """Start recording phases, in the calling thread."""
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def stop_profiling() -> Profiler | None:
+    """Stop recording phases, and return the profiler, if profiling."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.end = time.perf_counter()
+    return profiler
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Record the time spent within a phase, if profiling.
+
+    Can be used as context manager, or as decorator of a function.
+
+    Args:
+        name: Name of phase, e.g. 'join'. Runs of same name are summed up.
+    """
+    profiler = _profiler
+    if profiler is None or threading.get_ident() != profiler.thread:
+        yield
+        return
+
+    profiler.nested.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        nested = profiler.nested.pop()
+        if profiler.nested:
+            profiler.nested[-1] += duration
+        profiler.spans.append(
+            Span(
+                name=name,
+                start=start - profiler.start,
+                duration=duration,
+                own=duration - nested,
+            )
+        )
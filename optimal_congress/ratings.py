@@ -1,11 +1,17 @@
 """Functions related to ratings."""
 
 import os
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
 
-from optimal_congress.io.cache import save_rating
+from optimal_congress.config import DIR_RATINGS_CACHE
+from optimal_congress.io.cache import load_ratings, save_rating, save_ratings
+from optimal_congress.profiling import phase
 from optimal_congress.schema import Event, EventRating, Rating
 
 
+@phase("latest ratings")
 def filter_latest_ratings(ratings: set[Rating]) -> set[Rating]:
     """Return the latest rating for each event.
 
@@ -14,34 +20,59 @@ def filter_latest_ratings(ratings: set[Rating]) -> set[Rating]:
     Returns:
         List of latest ratings.
     """
-    # sort ratings by timestamp, descending
-    ratings_sorted = sorted(
-        list(ratings), key=lambda rating: rating.timestamp, reverse=True
-    )
+    # keep only latest rating for each event, in a single pass
+    latest_ratings: dict[UUID, Rating] = {}
+    for rating in ratings:
+        latest = latest_ratings.get(rating.event_id)
+        if latest is None or rating.timestamp > latest.timestamp:
+            latest_ratings[rating.event_id] = rating
+    return set(latest_ratings.values())
 
-    # keep only latest rating for each event
-    latest_ratings: set[Rating] = set()
-    for rating in ratings_sorted:
-        if rating.event_id not in [r.event_id for r in latest_ratings]:
-            latest_ratings.add(rating)
-    return latest_ratings
 
+@phase("filter")
+def filter_upcoming_events(
+    event_ratings: set[EventRating],
+    min_rating: float,
+    now: datetime,
+    num_events: int,
+) -> list[Event]:
+    """Return the next events that start after now, filtered by minimum rating.
 
-def filter_unrated_events(
-    events: set[Event],
-    ratings: set[Rating],
-) -> set[Event]:
-    """Return the unrated events from a list of events based on previous ratings.
+    Args:
+        event_ratings: Events with their latest ratings.
+        min_rating: Minimum rating required for event to be returned.
+        now: Current time, with timezone.
+        num_events: Maximal number of events to return.
+    Returns:
+        Next events, sorted by start time.
+    """
+    # filter events by minimum required rating, and 'is in future'
+    events_filtered = {
+        event_rating.event
+        for event_rating in event_ratings
+        if event_rating.rating.score >= min_rating
+        and event_rating.event.schedule_start > now
+    }
+
+    # sort events by start time, keep only first n
+    return sorted(events_filtered, key=lambda event: event.schedule_start)[:num_events]
+
+
+def compact_ratings(directory: Path = DIR_RATINGS_CACHE) -> tuple[int, int]:
+    """Compact the ratings log, keeping only the latest rating of each event.
+
+    After compaction, the ratings log is the view of latest ratings, without
+    history to skip when loading it.
 
     Args:
-        events: list of events.
-        previous_ratings: list of previous ratings.
+        directory: Directory of ratings. Defaults to the ratings cache.
     Returns:
-        List of events for which no rating is provided.
+        Number of ratings before and after compaction.
     """
-    rated_event_ids = {rating.event_id for rating in ratings}
-    unrated_events = {event for event in events if event.id not in rated_event_ids}
-    return unrated_events
+    ratings = load_ratings(exit_if_empty=False, directory=directory)
+    latest_ratings = filter_latest_ratings(ratings)
+    save_ratings(latest_ratings, clear=True, directory=directory)
+    return len(ratings), len(latest_ratings)
 
 
 def enquire_and_save_ratings(events: set[Event]) -> None:
@@ -73,6 +104,7 @@ def enquire_and_save_ratings(events: set[Event]) -> None:
         save_rating(rating=rating)
 
 
+@phase("join")
 def join_events_with_ratings(
     ratings: set[Rating],
     events: set[Event],
@@ -87,12 +119,12 @@ def join_events_with_ratings(
     Returns:
         Ratings with their associated Events.
     """
-    # join events with ratings
-    event_ratings: set[EventRating] = set()
-    for rating in ratings:
-        matching_events = {event for event in events if event.id == rating.event_id}
-        if matching_events:
-            event = {event for event in events if event.id == rating.event_id}.pop()
-            event_ratings.add(EventRating(event=event, rating=rating))
+    # join events with ratings, via index of events
+    events_by_id = {event.id: event for event in events}
+    event_ratings = {
+        EventRating(event=events_by_id[rating.event_id], rating=rating)
+        for rating in ratings
+        if rating.event_id in events_by_id
+    }
 
     return event_ratings
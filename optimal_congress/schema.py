@@ -1,18 +1,28 @@
 """Model definitions."""
 
-from datetime import datetime
-from typing import Annotated
+import hashlib
+import heapq
+import json
+from collections.abc import Iterable, Sequence
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Annotated, Any
 from uuid import UUID
 
-import pandera as pa
 from pydantic import BaseModel, BeforeValidator, Field
 from typing_extensions import Literal
 
 from optimal_congress.config import HUB_EVENT_ROUTE
+from optimal_congress.profiling import phase
 
 # languages to accept for events
 EventLanguage = Literal["de", "en"]
 
+# formulations of the no-overlap constraints:
+# - pairwise: one constraint per pair of overlapping events
+# - clique: one constraint per group of events that all overlap each other
+Formulation = Literal["pairwise", "clique"]
+
 
 class Room(BaseModel):
     """A room."""
@@ -25,6 +35,121 @@ class Room(BaseModel):
         frozen = True  # instances immutable and hashable
 
 
+class HttpValidators(BaseModel):
+    """Validators of an HTTP response, to request it again only if modified."""
+
+    etag: str | None = None
+    last_modified: str | None = None
+
+    class Config:
+        frozen = True  # instances immutable and hashable
+
+
+class TransitTimes(BaseModel):
+    """Minutes it takes to get from one room to another, between two events.
+
+    Times are looked up in the matrix first, in either direction. Rooms missing
+    from the matrix default to a time by whether they belong to the same assembly.
+    """
+
+    matrix: dict[UUID, dict[UUID, float]] = Field(
+        default_factory=dict, description="Minutes from room to room, by room IDs."
+    )
+    assemblies: dict[UUID, str] = Field(
+        default_factory=dict, description="Assembly of each room, by room ID."
+    )
+    same_assembly: float = Field(
+        default=5.0, description="Minutes between rooms of the same assembly."
+    )
+    other_assembly: float = Field(
+        default=10.0, description="Minutes between rooms of different assemblies."
+    )
+
+    class Config:
+        frozen = True  # instances immutable
+
+    @classmethod
+    def from_rooms(
+        cls,
+        rooms: Iterable[Room],
+        matrix: dict[UUID, dict[UUID, float]] | None = None,
+        same_assembly: float = 5.0,
+        other_assembly: float = 10.0,
+    ) -> "TransitTimes":
+        """Create transit times between rooms, defaulting by their assemblies.
+
+        Args:
+            rooms: Rooms, to look up their assemblies.
+            matrix: Minutes from room to room, overriding the defaults.
+            same_assembly: Minutes between rooms of the same assembly.
+            other_assembly: Minutes between rooms of different assemblies.
+        Returns:
+            Transit times.
+        """
+        return cls(
+            matrix=matrix or {},
+            assemblies={room.id: room.assembly for room in rooms},
+            same_assembly=same_assembly,
+            other_assembly=other_assembly,
+        )
+
+    def minutes(self, source: UUID | None, target: UUID | None) -> float:
+        """Return minutes to get from one room to another.
+
+        Events without room, e.g. online events, need no transit.
+
+        Args:
+            source: ID of room to leave.
+            target: ID of room to get to.
+        Returns:
+            Minutes of transit, zero within the same room.
+        """
+        if source is None or target is None or source == target:
+            return 0.0
+        if target in self.matrix.get(source, {}):
+            return self.matrix[source][target]
+        if source in self.matrix.get(target, {}):
+            return self.matrix[target][source]
+        assembly = self.assemblies.get(source)
+        if assembly is not None and assembly == self.assemblies.get(target):
+            return self.same_assembly
+        return self.other_assembly
+
+    def key(self) -> bytes:
+        """Hash transit times, regardless of the order of rooms.
+
+        Returns:
+            Digest of 16 bytes, equal for equal times between equal rooms.
+        """
+        data = json.dumps(self.model_dump(mode="json"), sort_keys=True)
+        return hashlib.blake2b(data.encode(), digest_size=16).digest()
+
+    def max_minutes(self, source: UUID | None) -> float:
+        """Return an upper bound of the minutes to get from a room to any other."""
+        if source is None:
+            return 0.0
+        reverse = [row[source] for row in self.matrix.values() if source in row]
+        return max(
+            [
+                self.same_assembly,
+                self.other_assembly,
+                *self.matrix.get(source, {}).values(),
+                *reverse,
+            ]
+        )
+
+
+def index_rooms(rooms: Iterable[Room]) -> dict[UUID, Room]:
+    """Index rooms by their ID, to look up the rooms of events in constant time.
+
+    Args:
+        rooms: Rooms to index.
+    Returns:
+        Rooms by their ID.
+    """
+    return {room.id: room for room in rooms}
+
+
 def parse_language(
     value: list[EventLanguage] | str | None,
 ) -> list[EventLanguage] | None:
@@ -92,6 +217,277 @@ def events_overlap(event1: Event, event2: Event) -> bool:
     )
 
 
+def events_conflict(
+    event1: Event, event2: Event, transit: TransitTimes | None = None
+) -> bool:
+    """Check if two events cannot both be attended, given transit between rooms.
+
+    Without transit times, events conflict if they overlap.
+
+    Args:
+        event1: First event.
+        event2: Second event.
+        transit: Minutes to get from room to room, if any.
+    Returns:
+        Whether either event starts before the other ends, plus transit to it.
+    """
+    if transit is None:
+        return events_overlap(event1, event2)
+    to_event2 = timedelta(minutes=transit.minutes(event1.room, event2.room))
+    to_event1 = timedelta(minutes=transit.minutes(event2.room, event1.room))
+    return (
+        event2.schedule_start < event1.schedule_end + to_event2
+        and event1.schedule_start < event2.schedule_end + to_event1
+    )
+
+
+def _sweep_pairs(
+    starts: Sequence[datetime], ends: Sequence[datetime]
+) -> list[tuple[int, int]]:
+    """Find all index pairs of overlapping intervals, with a sweep over starts."""
+    # ties in start time are broken by end time, so zero-length events are handled
+    order = sorted(range(len(starts)), key=lambda i: (starts[i], ends[i]))
+
+    pairs: list[tuple[int, int]] = []
+    active: list[tuple[datetime, int]] = []  # heap of (end, index) of running events
+    for j in order:
+        start = starts[j]
+        # drop events that ended before (or exactly when) this event starts
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, i in active:
+            pairs.append((min(i, j), max(i, j)))
+        heapq.heappush(active, (ends[j], j))
+    return pairs
+
+
+def _padded_ends(events: Sequence[Event], transit: TransitTimes) -> list[datetime]:
+    """Extend end of each event by the longest transit from its room."""
+    padding: dict[UUID | None, timedelta] = {}
+    ends = []
+    for event in events:
+        if event.room not in padding:
+            padding[event.room] = timedelta(minutes=transit.max_minutes(event.room))
+        ends.append(event.schedule_end + padding[event.room])
+    return ends
+
+
+def find_overlapping_pairs(events: Sequence[Event]) -> list[tuple[int, int]]:
+    """Find all pairs of overlapping events, with a sweep over their start times.
+
+    Events are visited in order of their start time, while a heap keeps the
+    events that are still running. Each visited event overlaps exactly with the
+    running events that end after it starts. This takes O(n log n + k) time for
+    n events and k overlapping pairs.
+
+    Args:
+        events: Events to check for overlaps.
+    Returns:
+        Index pairs (i, j) into `events` with i < j, one for each overlapping pair.
+    """
+    return _sweep_pairs(
+        starts=[event.schedule_start for event in events],
+        ends=[event.schedule_end for event in events],
+    )
+
+
+def find_conflicting_pairs(
+    events: Sequence[Event], transit: TransitTimes | None = None
+) -> list[tuple[int, int]]:
+    """Find all pairs of events that cannot both be attended, given transit times.
+
+    Ends of events are extended by the longest transit from their room, so that
+    the sweep over start times finds a superset of conflicting pairs. Candidates
+    are then checked with the exact transit between their rooms.
+
+    Args:
+        events: Events to check for conflicts.
+        transit: Minutes to get from room to room. Defaults to overlaps only.
+    Returns:
+        Index pairs (i, j) into `events` with i < j, one for each conflicting pair.
+    """
+    if transit is None:
+        return find_overlapping_pairs(events)
+    candidates = _sweep_pairs(
+        starts=[event.schedule_start for event in events],
+        ends=_padded_ends(events, transit),
+    )
+    return [
+        (i, j)
+        for i, j in candidates
+        if events_conflict(events[i], events[j], transit=transit)
+    ]
+
+
+def find_overlap_cliques(events: Sequence[Event]) -> list[list[int]]:
+    """Find the maximal groups of events that all overlap each other.
+
+    Overlapping events form an interval graph, whose maximal cliques are the sets
+    of events running at some start time. The sweep keeps the running events at
+    each distinct start time, and emits them once an event ends, i.e. once they
+    cannot grow any further. Every overlapping pair is contained in at least one
+    clique.
+
+    Args:
+        events: Events to group.
+    Returns:
+        Lists of indices into `events`, one for each clique of at least two events.
+    """
+    order = sorted(
+        range(len(events)),
+        key=lambda i: (events[i].schedule_start, events[i].schedule_end),
+    )
+
+    cliques: list[list[int]] = []
+    active: list[tuple[datetime, int]] = []  # heap of (end, index) of running events
+    candidate: list[int] | None = None  # running events at latest start time
+    for start, group in groupby(order, key=lambda i: events[i].schedule_start):
+        # emit candidate, as soon as any of its events has ended
+        ended = False
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+            ended = True
+        if ended and candidate is not None:
+            cliques.append(candidate)
+            candidate = None
+
+        group_events = list(group)
+        # zero-length events only overlap with events running around them
+        for i in group_events:
+            if events[i].schedule_end == start and active:
+                cliques.append([index for _, index in active] + [i])
+                candidate = None
+
+        # events of positive length extend the running events
+        started = [i for i in group_events if events[i].schedule_end > start]
+        for i in started:
+            heapq.heappush(active, (events[i].schedule_end, i))
+        if started:
+            candidate = [index for _, index in active]
+    if candidate is not None:
+        cliques.append(candidate)
+
+    return [clique for clique in cliques if len(clique) > 1]
+
+
+def find_overlap_components(
+    events: Sequence[Event], transit: TransitTimes | None = None
+) -> list[list[int]]:
+    """Split events into groups that do not conflict with events of other groups.
+
+    These are the connected components of the conflict graph. Sorted by start time,
+    a new component begins whenever an event starts after all previous events have
+    ended, e.g. after each night's quiet gap. With transit times, events end only
+    after the longest transit from their room.
+
+    Args:
+        events: Events to split.
+        transit: Minutes to get from room to room. Defaults to overlaps only.
+    Returns:
+        Lists of indices into `events`, one for each component.
+    """
+    ends = (
+        [event.schedule_end for event in events]
+        if transit is None
+        else _padded_ends(events, transit)
+    )
+    order = sorted(
+        range(len(events)),
+        key=lambda i: (events[i].schedule_start, ends[i]),
+    )
+
+    components: list[list[int]] = []
+    latest_end: datetime | None = None
+    for i in order:
+        if latest_end is None or events[i].schedule_start >= latest_end:
+            components.append([])
+        components[-1].append(i)
+        latest_end = max(latest_end or ends[i], ends[i])
+    return components
+
+
+class Conflicts(BaseModel):
+    """Groups of events, of which at most one can be attended.
+
+    Groups are computed once for a whole programme, and restricted to the events
+    of each optimization problem, e.g. to the rated events of each attendee.
+    """
+
+    formulation: Formulation
+    event_ids: list[UUID] = Field(description="IDs of events, in order of indices.")
+    groups: list[list[int]] = Field(description="Indices of conflicting events.")
+
+    class Config:
+        frozen = True  # instances immutable
+
+    @classmethod
+    @phase("conflicts")
+    def from_events(
+        cls,
+        events: Sequence[Event],
+        formulation: Formulation = "pairwise",
+        transit: TransitTimes | None = None,
+    ) -> "Conflicts":
+        """Find groups of conflicting events, as pairs or as cliques.
+
+        With transit times, events also conflict if there is too little time to
+        get from the room of one to the room of the other. Cliques of overlapping
+        events are then complemented by pairs of such events.
+
+        Args:
+            events: Events to find conflicts between.
+            formulation: Whether to group conflicts by pairs or by cliques.
+            transit: Minutes to get from room to room. Defaults to overlaps only.
+        Returns:
+            Conflicts, with indices into `events`.
+        """
+        match formulation:
+            case "pairwise":
+                groups = [[i, j] for i, j in find_conflicting_pairs(events, transit)]
+            case "clique":
+                groups = find_overlap_cliques(events)
+                if transit is not None:
+                    groups += [
+                        [i, j]
+                        for i, j in find_conflicting_pairs(events, transit)
+                        if not events_overlap(events[i], events[j])
+                    ]
+            case _:
+                raise ValueError(f"Unknown formulation: {formulation}")
+        # skip validation, as groups can be many
+        return cls.model_construct(
+            formulation=formulation,
+            event_ids=[event.id for event in events],
+            groups=groups,
+        )
+
+    def restrict(self, events: Sequence[Event]) -> "Conflicts":
+        """Restrict conflicts to a subset of events.
+
+        Groups with less than two of the given events are dropped.
+
+        Args:
+            events: Events to keep, all of which must be part of these conflicts.
+        Returns:
+            Conflicts, with indices into `events`.
+        """
+        index = {event.id: i for i, event in enumerate(events)}
+        event_indices = [index.get(event_id) for event_id in self.event_ids]
+
+        groups = []
+        for group in self.groups:
+            restricted = [event_indices[i] for i in group]
+            kept = [i for i in restricted if i is not None]
+            if len(kept) > 1:
+                groups.append(kept)
+
+        return Conflicts.model_construct(
+            formulation=self.formulation,
+            event_ids=[event.id for event in events],
+            groups=groups,
+        )
+
+
 class Rating(BaseModel):
     """A rating for an event."""
 
@@ -113,10 +509,20 @@ class EventRating(BaseModel):
         frozen = True  # instances immutable and hashable
 
 
-class RatingsExport(pa.typing.DataFrame):
-    """A schema for exporting and importing ratings to/from CSV."""
+class WarmStart(BaseModel):
+    """Program and schedule of a previous optimization, to start the next one from."""
 
-    score: float = pa.Field()
-    name: str = pa.Field()
-    url: str = pa.Field()
-    id: UUID = pa.Field()
+    scheduled: set[UUID] = Field(description="IDs of previously scheduled events.")
+    model: dict[str, Any] | None = Field(
+        default=None, description="Previous program, as serialized by PuLP."
+    )
+    formulation: Formulation = Field(
+        default="pairwise", description="Formulation of constraints in program."
+    )
+    event_times: dict[UUID, tuple[datetime, datetime]] = Field(
+        default_factory=dict,
+        description="Start and end of each event in program, to detect changes.",
+    )
+    transit: TransitTimes | None = Field(
+        default=None, description="Transit times between rooms, used in program."
+    )
@@ -0,0 +1,287 @@
+"""Server that keeps events, ratings and conflicts in memory, to answer fast."""
+
+import json
+import logging
+import threading
+from collections.abc import Callable
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+from uuid import UUID
+
+from pytz import timezone
+
+from optimal_congress.config import RATINGS_LOG
+from optimal_congress.io import cache
+from optimal_congress.io.export import dump_schedule
+from optimal_congress.optimize import (
+    Schedule,
+    load_or_find_conflicts,
+    solve_schedule,
+)
+from optimal_congress.ratings import (
+    filter_latest_ratings,
+    filter_upcoming_events,
+)
+from optimal_congress.schema import (
+    Conflicts,
+    Event,
+    EventRating,
+    Formulation,
+    Room,
+    index_rooms,
+)
+from optimal_congress.solvers import SolverOptions
+from optimal_congress.store import EventStore
+
+# signature of a file, which changes whenever the file is written
+FileSignature = tuple[int, int] | None
+
+
+class CacheState:
+    """Events, rooms and latest ratings of the cache, kept in memory.
+
+    Before each query, the signatures of the cache files are checked, and only
+    those parts of the state are reloaded whose files changed. Conflicts between
+    events and optimized schedules are kept until events or ratings change.
+    """
+
+    def __init__(self, ratings_dirs: dict[str, Path]) -> None:
+        """Create empty state, which is loaded at first refresh.
+
+        Args:
+            ratings_dirs: Ratings directory by name of attendee.
+        """
+        self.ratings_dirs = ratings_dirs
+        self.lock = threading.Lock()
+        self.signatures: dict[Path, FileSignature] = {}
+        self.store = EventStore([])
+        self.rooms: dict[UUID, Room] = {}
+        self.event_ratings: dict[str, set[EventRating]] = {}
+        self.conflicts: dict[Formulation, Conflicts] = {}
+        self.schedules: dict[tuple[Any, ...], Schedule] = {}
+        # counts reloads of events or ratings, to detect schedules solved meanwhile
+        self.generation = 0
+
+    def _changed(self, path: Path) -> bool:
+        """Check if file changed since last check, by its modification time and size."""
+        try:
+            stat = path.stat()
+            signature: FileSignature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        changed = path not in self.signatures or self.signatures[path] != signature
+        self.signatures[path] = signature
+        return changed
+
+    def refresh(self) -> None:
+        """Reload those parts of the state whose files changed."""
+        with self.lock:
+            events_changed = self._changed(cache.FILE_EVENTS_CACHE)
+            if events_changed:
+                logging.debug("Reloading events.")
+                self.store = cache.load_event_store(exit_if_empty=False)
+                self.conflicts = {}
+                self.schedules = {}
+                self.generation += 1
+            if self._changed(cache.FILE_ROOMS_CACHE):
+                logging.debug("Reloading rooms.")
+                self.rooms = index_rooms(cache.load_rooms(exit_if_empty=False))
+
+            for name, directory in self.ratings_dirs.items():
+                if self._changed(directory / RATINGS_LOG) or events_changed:
+                    logging.debug(f"Reloading ratings of {name}.")
+                    ratings = cache.load_ratings(
+                        exit_if_empty=False, directory=directory
+                    )
+                    # models are built only for rated events
+                    self.event_ratings[name] = self.store.join_ratings(
+                        filter_latest_ratings(ratings)
+                    )
+                    self.schedules = {
+                        key: schedule
+                        for key, schedule in self.schedules.items()
+                        if key[0] != name
+                    }
+                    self.generation += 1
+
+    def get_event_ratings(self, attendee: str | None) -> set[EventRating]:
+        """Return events with latest ratings of an attendee, or of the first one.
+
+        Raises:
+            ValueError: If the attendee is unknown.
+        """
+        attendee = attendee or next(iter(self.ratings_dirs))
+        if attendee not in self.event_ratings:
+            raise ValueError(
+                f"Unknown attendee: {attendee}. "
+                f"Should be one of {list(self.ratings_dirs)}."
+            )
+        return self.event_ratings[attendee]
+
+    def get_schedule(
+        self,
+        attendee: str | None,
+        minimum_rating: float,
+        solver: str,
+        options: SolverOptions,
+    ) -> Schedule:
+        """Return optimized schedule of an attendee, solved once per state.
+
+        Schedules are solved without holding the lock. If the state is reloaded
+        meanwhile, the schedule is returned, but not kept for later queries.
+
+        Raises:
+            ValueError: If the attendee is unknown, or no schedule is found.
+        """
+        attendee = attendee or next(iter(self.ratings_dirs))
+        key = (attendee, minimum_rating, solver, options)
+        with self.lock:
+            if key in self.schedules:
+                return self.schedules[key]
+            event_ratings = self.get_event_ratings(attendee)
+            if options.formulation not in self.conflicts:
+                self.conflicts[options.formulation] = load_or_find_conflicts(
+                    self.store, formulation=options.formulation
+                )
+            conflicts = self.conflicts[options.formulation]
+            generation = self.generation
+
+        # solve without lock, so that other queries are answered meanwhile
+        schedule = solve_schedule(
+            event_ratings={
+                event_rating
+                for event_rating in event_ratings
+                if event_rating.rating.score >= minimum_rating
+            },
+            solver=solver,
+            options=options,
+            conflicts=conflicts,
+        )
+        with self.lock:
+            if self.generation == generation:
+                self.schedules[key] = schedule
+        return schedule
+
+
+def dump_event(event: Event, rooms: dict[UUID, Room]) -> dict[str, Any]:
+    """Dump event to JSON-compatible dict, with name of its room and its URL."""
+    room = rooms.get(event.room) if event.room is not None else None
+    return {
+        **event.model_dump(mode="json"),
+        "room_name": room.name if room is not None else None,
+        "url": event.url,
+    }
+
+
+def query_next(state: CacheState, query: dict[str, str]) -> dict[str, Any]:
+    """List next upcoming events, filtered by minimum rating."""
+    events = filter_upcoming_events(
+        event_ratings=state.get_event_ratings(query.get("attendee")),
+        min_rating=float(query.get("rating", 5.0)),
+        now=datetime.now(tz=timezone("Europe/Berlin")),
+        num_events=int(query.get("number", 10)),
+    )
+    return {"events": [dump_event(event, state.rooms) for event in events]}
+
+
+def query_ratings(state: CacheState, query: dict[str, str]) -> dict[str, Any]:
+    """List all latest ratings, in descending order."""
+    event_ratings = sorted(
+        state.get_event_ratings(query.get("attendee")),
+        key=lambda event_rating: event_rating.rating.score,
+        reverse=True,
+    )
+    return {
+        "ratings": [
+            {
+                "score": event_rating.rating.score,
+                "event": dump_event(event_rating.event, state.rooms),
+            }
+            for event_rating in event_ratings
+        ]
+    }
+
+
+def query_optimize(state: CacheState, query: dict[str, str]) -> dict[str, Any]:
+    """Optimize the schedule based on ratings."""
+    schedule = state.get_schedule(
+        attendee=query.get("attendee"),
+        minimum_rating=float(query.get("min", 0.0)),
+        solver=query.get("solver", "auto"),
+        options=SolverOptions.model_validate(
+            {
+                key: query[key]
+                for key in ("formulation", "threads", "time_limit", "gap")
+                if key in query
+            }
+        ),
+    )
+    return dump_schedule(schedule)
+
+
+# queries by path
+QUERIES: dict[str, Callable[[CacheState, dict[str, str]], dict[str, Any]]] = {
+    "/next": query_next,
+    "/ratings": query_ratings,
+    "/optimize": query_optimize,
+}
+
+
+class ScheduleServer(ThreadingHTTPServer):
+    """HTTP server, with state shared by all requests."""
+
+    def __init__(self, address: tuple[str, int], state: CacheState) -> None:
+        super().__init__(address, QueryHandler)
+        self.state = state
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Answer queries as JSON, e.g. `GET /next?rating=8&number=5`."""
+
+    server: ScheduleServer
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        status = 200
+        if url.path not in QUERIES:
+            status, body = 404, {"error": f"Unknown path. Use one of {[*QUERIES]}."}
+        else:
+            try:
+                self.server.state.refresh()
+                body = QUERIES[url.path](self.server.state, query)
+            except ValueError as e:
+                status, body = 400, {"error": str(e)}
+
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Log requests as debug messages, instead of to stderr."""
+        logging.debug(format % args)
+
+
+def serve(host: str, port: int, ratings_dirs: dict[str, Path]) -> None:
+    """Load cache, and answer queries until interrupted.
+
+    Args:
+        host: Host to listen on, e.g. '127.0.0.1'.
+        port: Port to listen on.
+        ratings_dirs: Ratings directory by name of attendee.
+    """
+    state = CacheState(ratings_dirs=ratings_dirs)
+    state.refresh()
+    with ScheduleServer((host, port), state) as server:
+        print(f"Serving {[*QUERIES]} on http://{host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nExiting.")
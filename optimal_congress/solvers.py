@@ -0,0 +1,258 @@
+"""Solver backends for the schedule optimization problem."""
+
+from bisect import bisect_right
+from collections.abc import Callable
+
+from pydantic import BaseModel, Field
+from typing_extensions import Literal
+
+from optimal_congress.constraints import LoadRow, ScheduleConstraints
+from optimal_congress.profiling import phase
+from optimal_congress.schema import (
+    Conflicts,
+    Event,
+    Formulation,
+    TransitTimes,
+    WarmStart,
+)
+
+
+class ScheduleProblem(BaseModel):
+    """Events to choose from, and the score for attending each of them."""
+
+    events: list[Event]
+    scores: list[float]
+    warm_start: WarmStart | None = Field(
+        default=None, description="Previous program and schedule, to start from."
+    )
+    conflicts: Conflicts | None = Field(
+        default=None, description="Precomputed conflicts, with indices into events."
+    )
+    transit: TransitTimes | None = Field(
+        default=None, description="Minutes to get from room to room, between events."
+    )
+    constraints: ScheduleConstraints | None = Field(
+        default=None, description="Limits on load, e.g. hours per day."
+    )
+
+    class Config:
+        frozen = True  # instances immutable and hashable
+
+    def conflict_groups(self, formulation: Formulation) -> list[list[int]]:
+        """Groups of events of which at most one can be attended.
+
+        Args:
+            formulation: Whether to group conflicts by pairs or by cliques.
+        Returns:
+            Groups of indices into events, precomputed if available.
+        """
+        if self.conflicts is not None and self.conflicts.formulation == formulation:
+            return self.conflicts.groups
+        return Conflicts.from_events(
+            self.events, formulation=formulation, transit=self.transit
+        ).groups
+
+    def load_rows(self) -> list[LoadRow]:
+        """Limits on load as rows over events, which are empty without limits."""
+        if self.constraints is None:
+            return []
+        return self.constraints.load_rows(self.events)
+
+
+class SolverOptions(BaseModel):
+    """Options for solver backends, ignored by backends that do not support them."""
+
+    formulation: Formulation = Field(
+        default="pairwise", description="Formulation of no-overlap constraints."
+    )
+    threads: int | None = Field(default=None, description="Number of solver threads.")
+    time_limit: float | None = Field(
+        default=None, description="Maximal solving time, in seconds."
+    )
+    gap: float | None = Field(
+        default=None, description="Relative gap to optimum, at which solving stops."
+    )
+
+    class Config:
+        frozen = True  # instances immutable and hashable
+
+    @property
+    def anytime(self) -> bool:
+        """Whether solving may stop early, accepting the best solution so far."""
+        return self.time_limit is not None or self.gap is not None
+
+
+# status of a solution:
+# - optimal: proven to be optimal (within the requested gap, if any)
+# - feasible: best solution found within the time limit, or by a heuristic
+SolverStatus = Literal["optimal", "feasible"]
+
+
+class SolverResult(BaseModel):
+    """Solution found by a solver backend."""
+
+    scheduled: list[int] = Field(description="Indices of scheduled events.")
+    status: SolverStatus
+    objective: float = Field(description="Total score of scheduled events.")
+    gap: float | None = Field(
+        default=None, description="Relative gap to best known bound, if known."
+    )
+    warm_start: WarmStart | None = Field(
+        default=None, description="Solved program, to start next optimization from."
+    )
+
+    class Config:
+        frozen = True  # instances immutable and hashable
+
+
+SolverBackend = Callable[[ScheduleProblem, SolverOptions], SolverResult]
+
+# solver backends by name
+SOLVERS: dict[str, SolverBackend] = {}
+
+
+def register_solver(name: str) -> Callable[[SolverBackend], SolverBackend]:
+    """Register a solver backend under a name, to be used as decorator.
+
+    Args:
+        name: Name under which backend can be chosen.
+    Returns:
+        Decorator that registers the backend, and returns it unchanged.
+    """
+
+    def decorator(backend: SolverBackend) -> SolverBackend:
+        SOLVERS[name] = backend
+        return backend
+
+    return decorator
+
+
+def get_solver(name: str) -> SolverBackend:
+    """Get a registered solver backend by name.
+
+    Raises:
+        ValueError: If no backend is registered under that name.
+    """
+    try:
+        return SOLVERS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown solver: {name}. Should be one of {list(SOLVERS)}."
+        ) from None
+
+
+@register_solver("dp")
+@phase("solve")
+def solve_dp(problem: ScheduleProblem, options: SolverOptions) -> SolverResult:
+    """Find non-overlapping events with maximal total score, by dynamic programming.
+
+    This solves the weighted interval scheduling problem exactly in O(n log n):
+    With events sorted by end time, the best schedule of the first j events either
+    skips event j, or attends it after the best schedule of all events that end
+    before event j starts.
+
+    Raises:
+        ValueError: If transit times or limits on load are given, as they depend on
+            pairs of rooms or on many events.
+    """
+    if problem.transit is not None:
+        raise ValueError("Solver 'dp' does not support transit times between rooms.")
+    if problem.load_rows():
+        raise ValueError("Solver 'dp' does not support limits on load.")
+    events, scores = problem.events, problem.scores
+
+    # sort by end time; zero-length events go after events ending at same time
+    order = sorted(
+        range(len(events)),
+        key=lambda i: (events[i].schedule_end, events[i].schedule_start),
+    )
+    ends = [events[i].schedule_end for i in order]
+
+    # number of preceding events that end before each event starts
+    compatible = [
+        min(bisect_right(ends, events[i].schedule_start), j)
+        for j, i in enumerate(order)
+    ]
+
+    # best total score within the first j events
+    best = [0.0] * (len(order) + 1)
+    for j, i in enumerate(order):
+        best[j + 1] = max(best[j], best[compatible[j]] + scores[i])
+
+    # backtrack the events attained in the best total score
+    scheduled: list[int] = []
+    j = len(order)
+    while j > 0:
+        if best[j] == best[j - 1]:
+            j -= 1
+        else:
+            scheduled.append(order[j - 1])
+            j = compatible[j - 1]
+    return SolverResult(
+        scheduled=scheduled,
+        status="optimal",
+        objective=best[-1],
+        gap=0.0,
+    )
+
+
+@register_solver("greedy")
+@phase("solve")
+def solve_greedy(problem: ScheduleProblem, options: SolverOptions) -> SolverResult:
+    """Schedule events by descending score, skipping those that overlap.
+
+    Events are also skipped if they exceed a limit on load, e.g. hours per day.
+    This is a fast heuristic without guarantee of optimality.
+    """
+    events, scores = problem.events, problem.scores
+
+    # rows of each event with its weight, and load of each row so far
+    rows = problem.load_rows()
+    event_rows: list[list[tuple[int, float]]] = [[] for _ in events]
+    for k, row in enumerate(rows):
+        for i, weight in zip(row.indices, row.weights):
+            event_rows[i].append((k, weight))
+    load = [0.0] * len(rows)
+
+    overlapping: list[set[int]] = [set() for _ in events]
+    for group in problem.conflict_groups(options.formulation):
+        for i in group:
+            overlapping[i].update(group)
+            overlapping[i].discard(i)
+
+    # prefer higher scores, and shorter events on ties
+    order = sorted(
+        range(len(events)),
+        key=lambda i: (-scores[i], events[i].schedule_end - events[i].schedule_start),
+    )
+    scheduled: set[int] = set()
+    for i in order:
+        fits = all(
+            load[k] + weight <= rows[k].bound + 1e-9 for k, weight in event_rows[i]
+        )
+        if scores[i] > 0 and fits and scheduled.isdisjoint(overlapping[i]):
+            scheduled.add(i)
+            for k, weight in event_rows[i]:
+                load[k] += weight
+    return SolverResult(
+        scheduled=sorted(scheduled),
+        status="feasible",
+        objective=sum([scores[i] for i in scheduled]),
+    )
+
+
+@register_solver("cbc")
+def solve_cbc(problem: ScheduleProblem, options: SolverOptions) -> SolverResult:
+    """Solve the mixed integer linear program with CBC (see `milp.solve_cbc`)."""
+    # PuLP is imported only once a program is solved, as it is slow to import
+    from optimal_congress import milp
+
+    return milp.solve_cbc(problem=problem, options=options)
+
+
+@register_solver("highs")
+def solve_highs(problem: ScheduleProblem, options: SolverOptions) -> SolverResult:
+    """Solve the mixed integer linear program with HiGHS (see `milp.solve_highs`)."""
+    from optimal_congress import milp
+
+    return milp.solve_highs(problem=problem, options=options)
@@ -0,0 +1,298 @@
+"""Column store of events, to filter and find overlaps without building models."""
+
+import hashlib
+import json
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+
+from optimal_congress.profiling import phase
+from optimal_congress.schema import (
+    Conflicts,
+    Event,
+    EventLanguage,
+    EventRating,
+    Formulation,
+    Rating,
+    TransitTimes,
+    find_overlap_cliques,
+)
+
+# record of an event within the key of events: ID, start and end in microseconds
+KEY_DTYPE = np.dtype([("id", "S16"), ("start", "<i8"), ("end", "<i8")])
+
+# bit of each language within the bitmask of languages of an event
+LANGUAGE_BITS: dict[str, int] = {
+    language: 1 << i
+    for i, language in enumerate(EventLanguage.__args__)  # type: ignore
+}
+
+
+def _encode(values: Iterable[Any]) -> tuple[list[Any], np.ndarray]:
+    """Encode values as categories and their codes, with -1 for None."""
+    categories: dict[Any, int] = {}
+    codes = [
+        -1 if value is None else categories.setdefault(value, len(categories))
+        for value in values
+    ]
+    return list(categories), np.array(codes, dtype=np.int32)
+
+
+def epoch_microseconds(timestamp: datetime) -> int:
+    """Convert timestamp to microseconds since the epoch."""
+    return int(timestamp.timestamp()) * 1_000_000 + timestamp.microsecond
+
+
+def _parse_time(value: str) -> int:
+    """Parse an ISO 8601 timestamp to microseconds since the epoch."""
+    return epoch_microseconds(datetime.fromisoformat(value))
+
+
+class EventStore:
+    """Events of a programme, as arrays with one row per event.
+
+    Times are microseconds since the epoch, tracks and rooms are codes into their
+    categories, and languages are bitmasks over `EventLanguage`. Filters and
+    overlaps are computed on these arrays, and models are built only for the
+    rows that are eventually used.
+    """
+
+    def __init__(self, records: Sequence[dict[str, Any]]) -> None:
+        """Build arrays from records of events, as cached by `save_events`.
+
+        Records are not validated, as the cache is validated when written.
+
+        Args:
+            records: Events as parsed from JSON, one dict each.
+        """
+        self.records = records
+        # rows by ID, as formatted in records, to look up ratings of events
+        self.index = {record["id"]: row for row, record in enumerate(records)}
+
+        # programmes have few distinct times, which are parsed only once
+        starts = [record["schedule_start"] for record in records]
+        ends = [record["schedule_end"] for record in records]
+        times = {value: _parse_time(value) for value in {*starts, *ends}}
+        self.start = np.array([times[value] for value in starts], dtype=np.int64)
+        self.end = np.array([times[value] for value in ends], dtype=np.int64)
+
+        self.tracks, self.track_codes = _encode(record["track"] for record in records)
+        rooms, self.room_codes = _encode(record["room"] for record in records)
+        self.rooms = [UUID(room) for room in rooms]
+        self.languages = np.array(
+            [
+                sum(LANGUAGE_BITS[language] for language in record["language"] or [])
+                for record in records
+            ],
+            dtype=np.uint8,
+        )
+        self._events: dict[int, Event] = {}  # models built so far, by row
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "EventStore":
+        """Build store from a JSON array of events, e.g. the events cache."""
+        return cls(json.loads(data) if data else [])
+
+    @classmethod
+    def from_events(cls, events: Iterable[Event]) -> "EventStore":
+        """Build store from models of events, which are kept to be returned."""
+        events = list(events)
+        store = cls([event.model_dump(mode="json") for event in events])
+        store._events = dict(enumerate(events))
+        return store
+
+    def __len__(self) -> int:
+        """Return the number of events."""
+        return len(self.records)
+
+    @property
+    def ids(self) -> list[UUID]:
+        """Return the IDs of events, in order of rows."""
+        return [UUID(event_id) for event_id in self.index]
+
+    def event(self, row: int) -> Event:
+        """Return the model of an event, built once on first access."""
+        if row not in self._events:
+            self._events[row] = Event.model_validate(self.records[row])
+        return self._events[row]
+
+    def events(self, rows: Iterable[int] | None = None) -> list[Event]:
+        """Return the models of events in given rows, or of all events."""
+        if rows is None:
+            rows = range(len(self))
+        return [self.event(int(row)) for row in rows]
+
+    def key(self) -> bytes:
+        """Hash IDs and times of events, on which their conflicts solely depend.
+
+        Returns:
+            Digest of 16 bytes, equal for events with same IDs and times, in any
+            order of rows.
+        """
+        records = np.empty(len(self), dtype=KEY_DTYPE)
+        records["id"] = np.frombuffer(
+            bytes.fromhex("".join(self.index).replace("-", "")), dtype="S16"
+        )
+        records["start"] = self.start
+        records["end"] = self.end
+        records.sort(order="id")
+        return hashlib.blake2b(records.tobytes(), digest_size=16).digest()
+
+    @phase("join")
+    def scores(self, ratings: Iterable[Rating]) -> np.ndarray:
+        """Return score of each event by latest ratings, with NaN for unrated events.
+
+        Args:
+            ratings: Latest ratings, at most one per event.
+        Returns:
+            Array of scores, one per row.
+        """
+        scores = np.full(len(self), np.nan)
+        for rating in ratings:
+            row = self.index.get(str(rating.event_id))
+            if row is not None:
+                scores[row] = rating.score
+        return scores
+
+    def language_mask(self, language: EventLanguage) -> np.ndarray:
+        """Return whether each event is held in the given language."""
+        return (self.languages & LANGUAGE_BITS[language]) != 0
+
+    @phase("join")
+    def join_ratings(
+        self,
+        ratings: Iterable[Rating],
+        min_rating: float = float("-inf"),
+    ) -> set[EventRating]:
+        """Join ratings with their events, building models only for kept ratings.
+
+        Args:
+            ratings: Ratings, e.g. the latest ratings.
+            min_rating: Minimum rating required for event to be kept.
+        Returns:
+            Ratings with their associated events.
+        """
+        rows = ((self.index.get(str(rating.event_id)), rating) for rating in ratings)
+        return {
+            EventRating(event=self.event(row), rating=rating)
+            for row, rating in rows
+            if row is not None and rating.score >= min_rating
+        }
+
+    @phase("filter")
+    def upcoming(
+        self,
+        scores: np.ndarray,
+        min_rating: float,
+        now: datetime,
+        num_events: int,
+    ) -> list[Event]:
+        """Return the next events that start after now, filtered by minimum rating.
+
+        Args:
+            scores: Score of each event, NaN for unrated events (see `scores`).
+            min_rating: Minimum rating required for event to be returned.
+            now: Current time, with timezone.
+            num_events: Maximal number of events to return.
+        Returns:
+            Next events, sorted by start time.
+        """
+        rows = np.flatnonzero(
+            (scores >= min_rating) & (self.start > epoch_microseconds(now))
+        )
+        rows = rows[np.argsort(self.start[rows], kind="stable")]
+        return self.events(rows[:num_events])
+
+    def overlapping_pairs(self, end: np.ndarray | None = None) -> np.ndarray:
+        """Find all pairs of overlapping events, like `schema.find_overlapping_pairs`.
+
+        With events sorted by start time, each event overlaps exactly with the
+        following events that start before it ends. These form a contiguous range,
+        whose bound is found by binary search for all events at once.
+
+        Args:
+            end: Ends of events in microseconds, to extend them. Defaults to ends.
+        Returns:
+            Array of row pairs (i, j) with i < j, one for each overlapping pair.
+        """
+        end = self.end if end is None else end
+        # ties in start time are broken by end time, so zero-length events are handled
+        order = np.lexsort((end, self.start))
+        start, end = self.start[order], end[order]
+
+        # following events in sorted order from first + 1 up to bound (exclusive)
+        first = np.arange(len(self))
+        bound = np.maximum(np.searchsorted(start, end, side="left"), first + 1)
+        counts = bound - first - 1
+
+        # one pair per following event, offset from first + 1
+        left = np.repeat(first, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        i, j = order[left], order[left + 1 + offsets]
+        return np.column_stack((np.minimum(i, j), np.maximum(i, j)))
+
+    def conflicting_pairs(self, transit: TransitTimes) -> np.ndarray:
+        """Find all pairs of events too close for transit between their rooms.
+
+        Like `schema.find_conflicting_pairs`, candidates overlap once events are
+        extended by the longest transit from their room, and are then checked with
+        the transit between their rooms, looked up in a matrix over room codes.
+
+        Args:
+            transit: Minutes to get from room to room.
+        Returns:
+            Array of row pairs (i, j) with i < j, one for each conflicting pair.
+        """
+        # last row and column for events without room, indexed by code -1
+        rooms: list[UUID | None] = [*self.rooms, None]
+        minutes = np.array(
+            [[transit.minutes(source, target) for target in rooms] for source in rooms],
+            dtype=np.float64,
+        ).reshape(len(rooms), len(rooms))
+        microseconds = np.rint(minutes * 60e6).astype(np.int64)
+
+        padding = microseconds.max(axis=1)
+        pairs = self.overlapping_pairs(end=self.end + padding[self.room_codes])
+        i, j = pairs[:, 0], pairs[:, 1]
+        room_i, room_j = self.room_codes[i], self.room_codes[j]
+        conflicting = (self.start[j] < self.end[i] + microseconds[room_i, room_j]) & (
+            self.start[i] < self.end[j] + microseconds[room_j, room_i]
+        )
+        return pairs[conflicting]
+
+    @phase("conflicts")
+    def conflicts(
+        self, formulation: Formulation, transit: TransitTimes | None = None
+    ) -> Conflicts:
+        """Find groups of conflicting events, with indices into rows.
+
+        Cliques are found on models of all events (see `Conflicts.from_events`).
+
+        Args:
+            formulation: Whether to group conflicts by pairs or by cliques.
+            transit: Minutes to get from room to room. Defaults to overlaps only.
+        Returns:
+            Conflicts between all events.
+        """
+        match formulation:
+            case "pairwise" if transit is not None:
+                groups = self.conflicting_pairs(transit).tolist()
+            case "pairwise":
+                groups = self.overlapping_pairs().tolist()
+            case "clique" if transit is not None:
+                return Conflicts.from_events(
+                    self.events(), formulation=formulation, transit=transit
+                )
+            case "clique":
+                groups = find_overlap_cliques(self.events())
+            case _:
+                raise ValueError(f"Unknown formulation: {formulation}")
+        # skip validation, as groups can be many
+        return Conflicts.model_construct(
+            formulation=formulation, event_ids=self.ids, groups=groups
+        )
@@ -0,0 +1,218 @@
+"""Tests for IO operations on local cache."""
+
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from pytz import timezone
+
+from optimal_congress.io import cache
+from optimal_congress.ratings import compact_ratings
+from optimal_congress.schema import (
+    Conflicts,
+    Event,
+    Formulation,
+    Rating,
+    Room,
+    WarmStart,
+)
+from optimal_congress.store import EventStore
+
+TZ_DE = timezone("Europe/Berlin")
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point events and rooms cache to a temporary directory."""
+    monkeypatch.setattr(cache, "DIR_EVENTS_CACHE", tmp_path / "events")
+    monkeypatch.setattr(cache, "DIR_ROOMS_CACHE", tmp_path / "rooms")
+    monkeypatch.setattr(cache, "FILE_EVENTS_CACHE", tmp_path / "events/events.json")
+    monkeypatch.setattr(cache, "FILE_ROOMS_CACHE", tmp_path / "rooms/rooms.json")
+    monkeypatch.setattr(cache, "DIR_CONFLICTS_CACHE", tmp_path / "conflicts")
+    monkeypatch.setattr(cache, "DIR_OPTIMIZE_CACHE", tmp_path / "optimize")
+    return tmp_path
+
+
+def make_ratings() -> list[Rating]:
+    """Create three ratings for each of two events, at increasing timestamps."""
+    event_ids = [uuid4(), uuid4()]
+    return [
+        Rating(event_id=event_id, score=i, timestamp=datetime(2023, 12, 27, i))
+        for i in range(3)
+        for event_id in event_ids
+    ]
+
+
+def make_event(name: str) -> Event:
+    """Create an event with the given name, and a random ID."""
+    return Event(
+        id=uuid4(),
+        name=name,
+        slug=name,
+        track=None,
+        assembly="foo",
+        room=uuid4(),
+        language=["en"],
+        description="foo",
+        schedule_start=datetime(2023, 12, 27, 10, tzinfo=TZ_DE),
+        schedule_end=datetime(2023, 12, 27, 11, tzinfo=TZ_DE),
+    )
+
+
+def test_save_and_load(cache_dir: Path) -> None:
+    """Events and rooms are saved in one file each, and loaded unchanged."""
+    events = {make_event(f"event {i}") for i in range(10)}
+    rooms = {Room(id=uuid4(), name=f"room {i}", assembly="foo") for i in range(3)}
+
+    cache.save_events(events)
+    cache.save_rooms(rooms)
+
+    assert [path.name for path in (cache_dir / "events").iterdir()] == ["events.json"]
+    assert [path.name for path in (cache_dir / "rooms").iterdir()] == ["rooms.json"]
+    # events are equal by ID, so compare all their fields
+    loaded = cache.load_events(exit_if_empty=False)
+    assert loaded == events
+    assert [event.model_dump() for event in sorted(loaded, key=lambda e: e.id)] == [
+        event.model_dump() for event in sorted(events, key=lambda e: e.id)
+    ]
+    assert cache.load_rooms(exit_if_empty=False) == rooms
+
+
+def test_load_event_store(cache_dir: Path) -> None:
+    """Store of cached events holds the same events, and is empty without cache."""
+    assert len(cache.load_event_store(exit_if_empty=False)) == 0
+
+    events = {make_event(f"event {i}") for i in range(10)}
+    cache.save_events(events)
+
+    store = cache.load_event_store(exit_if_empty=False)
+    assert set(store.events()) == events
+    assert store.key() == EventStore.from_events(events).key()
+
+
+def test_save_without_clear(cache_dir: Path) -> None:
+    """Without clearing, cached events are kept, unless replaced."""
+    event1, event2 = make_event("foo"), make_event("bar")
+    cache.save_events({event1, event2})
+
+    renamed = event2.model_copy(update={"name": "baz"})
+    cache.save_events({renamed}, clear=False)
+
+    loaded = {event.id: event for event in cache.load_events(exit_if_empty=False)}
+    assert set(loaded) == {event1.id, event2.id}
+    assert loaded[event2.id].name == "baz"
+
+
+def test_migrate_single_files(cache_dir: Path) -> None:
+    """Events and rooms cached in one file each are migrated on load."""
+    events = {make_event(f"event {i}") for i in range(10)}
+    room = Room(id=uuid4(), name="room", assembly="foo")
+    (cache_dir / "events").mkdir()
+    (cache_dir / "rooms").mkdir()
+    for event in events:
+        (cache_dir / f"events/event_{event.id}.json").write_text(
+            event.model_dump_json()
+        )
+    (cache_dir / f"rooms/room_{room.id}.json").write_text(room.model_dump_json())
+
+    assert cache.load_events(exit_if_empty=False) == events
+    assert cache.load_rooms(exit_if_empty=False) == {room}
+    assert [path.name for path in (cache_dir / "events").iterdir()] == ["events.json"]
+    assert [path.name for path in (cache_dir / "rooms").iterdir()] == ["rooms.json"]
+
+
+def test_migrate_single_files_replace_consolidated(cache_dir: Path) -> None:
+    """Events of single files replace those with the same ID in events.json."""
+    old = make_event("old")
+    new = old.model_copy(update={"name": "new"})
+    other = make_event("other")
+    cache.save_events({old, other})
+    (cache_dir / f"events/event_{new.id}.json").write_text(new.model_dump_json())
+
+    assert cache.load_events(exit_if_empty=False) == {new, other}
+
+
+def test_ratings_log(tmp_path: Path) -> None:
+    """Ratings are appended to one log, and compacted to the latest ones."""
+    ratings = make_ratings()
+    cache.save_ratings(set(ratings[:2]), directory=tmp_path)
+    cache.save_ratings(set(ratings[2:]), directory=tmp_path)
+
+    assert [path.name for path in tmp_path.iterdir()] == ["ratings.jsonl"]
+    assert cache.load_ratings(exit_if_empty=False, directory=tmp_path) == set(ratings)
+
+    assert compact_ratings(directory=tmp_path) == (6, 2)
+    assert cache.load_ratings(exit_if_empty=False, directory=tmp_path) == set(
+        ratings[4:]
+    )
+    assert len((tmp_path / "ratings.jsonl").read_text().splitlines()) == 2
+
+
+def test_ratings_log_skips_incomplete_line(tmp_path: Path) -> None:
+    """A partially written last line does not lose the other ratings."""
+    ratings = make_ratings()
+    cache.save_ratings(set(ratings), directory=tmp_path)
+    with open(tmp_path / "ratings.jsonl", "a") as f:
+        f.write('{"event_id": "')
+
+    assert cache.load_ratings(exit_if_empty=False, directory=tmp_path) == set(ratings)
+
+
+def test_ratings_log_appends_after_incomplete_line(tmp_path: Path) -> None:
+    """Ratings appended after a partially written last line are not lost."""
+    ratings = make_ratings()
+    cache.save_ratings(set(ratings[:2]), directory=tmp_path)
+    with open(tmp_path / "ratings.jsonl", "a") as f:
+        f.write('{"event_id": "')
+    cache.save_ratings(set(ratings[2:]), directory=tmp_path)
+
+    assert cache.load_ratings(exit_if_empty=False, directory=tmp_path) == set(ratings)
+
+
+def test_migrate_rating_files(tmp_path: Path) -> None:
+    """Ratings cached in one file each are migrated to the log on load."""
+    ratings = make_ratings()
+    for rating in ratings:
+        (tmp_path / f"rating_{rating.event_id}_{rating.timestamp}.json").write_text(
+            rating.model_dump_json()
+        )
+
+    assert cache.load_ratings(exit_if_empty=False, directory=tmp_path) == set(ratings)
+    assert [path.name for path in tmp_path.iterdir()] == ["ratings.jsonl"]
+
+
+@pytest.mark.parametrize("formulation", ["pairwise", "clique"])
+def test_save_and_load_conflicts(cache_dir: Path, formulation: Formulation) -> None:
+    """Conflicts are loaded unchanged, but only for the same events."""
+    events = [make_event(f"event {i}") for i in range(4)]
+    conflicts = Conflicts.from_events(events, formulation=formulation)
+    key = EventStore.from_events(events).key()
+
+    cache.save_conflicts(conflicts, key=key)
+
+    assert cache.load_conflicts(formulation, key=key) == conflicts
+    assert (
+        cache.load_conflicts(formulation, key=EventStore.from_events(events[1:]).key())
+        is None
+    )
+
+
+def test_save_warm_start_interrupted(
+    cache_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that an interrupted save keeps the previous warm start intact."""
+    warm_start = WarmStart(scheduled={uuid4()})
+    cache.save_warm_start(warm_start)
+
+    def interrupt(fd: int) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(cache.os, "fsync", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        cache.save_warm_start(WarmStart(scheduled={uuid4()}))
+
+    assert cache.load_warm_start() == warm_start
+    assert [path.name for path in (cache_dir / "optimize").iterdir()] == [
+        "warm_start.json"
+    ]
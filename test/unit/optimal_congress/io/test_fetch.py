@@ -0,0 +1,149 @@
+"""Tests for fetching from the API, against a local stub server."""
+
+import gzip
+import json
+import threading
+from collections.abc import Iterator
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import uuid4
+
+import pytest
+from pytz import timezone
+
+from optimal_congress.io import api
+from optimal_congress.schema import Event, Room
+
+TZ_DE = timezone("Europe/Berlin")
+
+EVENTS = [
+    Event(
+        id=uuid4(),
+        name=f"event {i}",
+        slug=f"event-{i}",
+        track=None,
+        assembly="foo",
+        room=None,
+        description="foo",
+        schedule_start=datetime(2023, 12, 27, 10 + i, tzinfo=TZ_DE),
+        schedule_end=datetime(2023, 12, 27, 11 + i, tzinfo=TZ_DE),
+    )
+    for i in range(3)
+]
+ROOMS = [Room(id=uuid4(), name=f"room {i}", assembly="foo") for i in range(2)]
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 27 Dec 2023 10:00:00 GMT"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serve JSON gzip-compressed, with validators for conditional requests."""
+
+    requests: list[dict[str, str]] = []
+
+    def do_GET(self) -> None:
+        StubHandler.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        items = EVENTS if self.path == "/events" else ROOMS
+        body = json.dumps([item.model_dump(mode="json") for item in items])
+        content = gzip.compress(body.encode())
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: object) -> None:
+        """Do not log requests to stderr."""
+
+
+@pytest.fixture
+def stub_url(monkeypatch: pytest.MonkeyPatch) -> Iterator[str]:
+    """Run stub server on a free port, and point events and rooms API to it."""
+    StubHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setitem(
+        api.ENDPOINTS, "events", api.Endpoint(url=f"{url}/events", model=Event)
+    )
+    monkeypatch.setitem(
+        api.ENDPOINTS, "rooms", api.Endpoint(url=f"{url}/rooms", model=Room)
+    )
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_events_conditional(stub_url: str) -> None:
+    """Events are decompressed, and not fetched again if not modified."""
+    events, validators = api.fetch_events()
+
+    assert events == set(EVENTS)
+    assert validators.etag == ETAG
+    assert validators.last_modified == LAST_MODIFIED
+    assert "gzip" in StubHandler.requests[0]["Accept-Encoding"]
+    assert "If-None-Match" not in StubHandler.requests[0]
+
+    events, validators_304 = api.fetch_events(validators=validators)
+
+    assert events is None
+    assert validators_304 == validators
+    assert StubHandler.requests[1]["If-None-Match"] == ETAG
+    assert StubHandler.requests[1]["If-Modified-Since"] == LAST_MODIFIED
+
+
+def test_fetch_endpoints(stub_url: str) -> None:
+    """Several endpoints are fetched at once, each conditionally."""
+    events, validators = api.fetch_events()
+
+    fetched = api.fetch_endpoints(validators={"events": validators, "rooms": None})
+
+    assert fetched["events"] == (None, validators)
+    assert fetched["rooms"][0] == set(ROOMS)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 16, 1024])
+def test_iter_json_array(chunk_size: int) -> None:
+    """Elements are split correctly, wherever chunks are split."""
+    array = [
+        {"name": 'quote " and brackets [{', "tags": ["a", "]"], "n": None},
+        {"name": "backslash \\", "nested": {"list": [1, [2, {}]]}},
+        "string, with comma",
+        -1.5e3,
+        [],
+        {"name": "unicode äöü 🎉"},
+    ]
+    content = json.dumps(array, ensure_ascii=False).encode()
+    chunks = [content[i : i + chunk_size] for i in range(0, len(content), chunk_size)]
+
+    elements = list(api.iter_json_array(chunks))
+
+    assert [json.loads(element) for element in elements] == array
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (b"[]", []),
+        (b" [ ] ", []),
+        (b'[ {"a": 1} ]', [b'{"a": 1}']),
+    ],
+)
+def test_iter_json_array_edge_cases(content: bytes, expected: list[bytes]) -> None:
+    """Empty arrays have no elements, and whitespace is stripped."""
+    assert list(api.iter_json_array([content])) == expected
+
+
+@pytest.mark.parametrize("content", [b'{"a": 1}', b'[{"a": 1}', b""])
+def test_iter_json_array_invalid(content: bytes) -> None:
+    """Objects and incomplete arrays are rejected."""
+    with pytest.raises(ValueError):
+        list(api.iter_json_array([content]))
@@ -0,0 +1,83 @@
+"""Tests for detecting changes of events between fetches."""
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from pytz import timezone
+
+from optimal_congress.changes import EventChanges, content_hash, diff_events
+from optimal_congress.schema import Event
+
+TZ_DE = timezone("Europe/Berlin")
+
+
+def make_event(name: str) -> Event:
+    """Create an event with the given name, and a random ID."""
+    return Event(
+        id=uuid4(),
+        name=name,
+        slug=name,
+        track=None,
+        assembly="foo",
+        room=uuid4(),
+        description="foo",
+        schedule_start=datetime(2023, 12, 27, 10, tzinfo=TZ_DE),
+        schedule_end=datetime(2023, 12, 27, 11, tzinfo=TZ_DE),
+    )
+
+
+def test_content_hash() -> None:
+    """Hashes differ by content, not only by ID."""
+    event = make_event("foo")
+
+    assert content_hash(event) == content_hash(event.model_copy())
+    assert content_hash(event) != content_hash(
+        event.model_copy(update={"description": "bar"})
+    )
+
+
+def test_diff_events() -> None:
+    """New, removed, modified and rescheduled events are detected."""
+    unchanged, removed, described, moved, delayed = [
+        make_event(name)
+        for name in ["unchanged", "removed", "described", "moved", "delayed"]
+    ]
+    new = make_event("new")
+    described_new = described.model_copy(update={"description": "bar"})
+    moved_new = moved.model_copy(update={"room": uuid4()})
+    delayed_new = delayed.model_copy(
+        update={
+            "schedule_start": delayed.schedule_start + timedelta(hours=1),
+            "schedule_end": delayed.schedule_end + timedelta(hours=1),
+        }
+    )
+
+    changes = diff_events(
+        cached={unchanged, removed, described, moved, delayed},
+        fetched={unchanged, new, described_new, moved_new, delayed_new},
+    )
+
+    assert changes.new == {new}
+    assert changes.removed == {removed}
+    assert {event.name for event in changes.modified} == {
+        "described",
+        "moved",
+        "delayed",
+    }
+    assert {new.name: old for new, old in changes.rescheduled.items()} == {
+        "moved": moved,
+        "delayed": delayed,
+    }
+    assert changes.rescheduled[delayed_new].schedule_start == delayed.schedule_start
+
+
+def test_diff_events_unchanged() -> None:
+    """Without changes, there is nothing to write."""
+    events = {make_event(f"event {i}") for i in range(3)}
+
+    changes = diff_events(cached=events, fetched=events)
+
+    assert not changes
+    assert changes == EventChanges(
+        new=set(), removed=set(), modified=set(), rescheduled={}
+    )
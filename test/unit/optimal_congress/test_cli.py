@@ -0,0 +1,25 @@
+"""Tests for the command line interface."""
+
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "module", ["numpy", "pandas", "pandera", "pulp", "rich", "requests"]
+)
+def test_cli_imports_lazily(module: str) -> None:
+    """Heavy dependencies are not imported when the CLI starts."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, optimal_congress.cli; " f"print({module!r} in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,112 @@
+"""Tests for the limits on the load of a schedule."""
+
+from datetime import datetime, time, timedelta
+from uuid import uuid4
+
+import pytest
+from pytz import timezone
+
+from optimal_congress.constraints import (
+    BreakWindow,
+    ScheduleConstraints,
+    congress_day,
+)
+from optimal_congress.schema import Event
+
+TZ_DE = timezone("Europe/Berlin")
+
+
+def event(start: float, end: float, day: int = 27) -> Event:
+    """Create event from start to end hour of a day in December, past midnight."""
+    midnight = TZ_DE.localize(datetime(2023, 12, day))
+    return Event(
+        id=uuid4(),
+        name="foo",
+        slug="foo",
+        track=None,
+        assembly="foo",
+        room=None,
+        description="foo",
+        schedule_start=midnight + timedelta(hours=start),
+        schedule_end=midnight + timedelta(hours=end),
+    )
+
+
+def test_congress_day():
+    """Congress days last until the early morning of the next calendar day."""
+    assert congress_day(event(1, 2, day=28).schedule_start).day == 27
+    assert congress_day(event(10, 11, day=28).schedule_start).day == 28
+
+
+@pytest.mark.parametrize(
+    "start, end, expected",
+    [
+        (11, 12, True),
+        (9.5, 12, False),  # starts too early
+        (23, 24.5, True),  # ends after midnight, before latest
+        (24.5, 25.5, False),  # ends too late, on same congress day
+    ],
+)
+def test_admits(start: float, end: float, expected: bool):
+    """Events must start after earliest time, and end before latest time."""
+    constraints = ScheduleConstraints(earliest=time(10), latest=time(1))
+
+    assert constraints.admits(event(start, end)) == expected
+
+
+def test_load_rows():
+    """Limits are encoded as one row per day, break and window, if not redundant."""
+    events = [
+        event(10, 12),
+        event(12, 13),
+        event(13.5, 15),
+        event(15.5, 17),
+        event(10, 11, day=28),
+    ]
+    constraints = ScheduleConstraints(
+        max_hours_per_day=4,
+        breaks=[BreakWindow(start=time(12), end=time(14), minutes=45)],
+        max_consecutive=2,
+        consecutive_window=240,
+    )
+
+    rows = {row.name: row for row in constraints.load_rows(events)}
+
+    # second day has too few events, to violate any limit
+    assert sorted(rows) == [
+        "load_break0_20231227",
+        "load_consecutive_0",
+        "load_consecutive_1",
+        "load_hours_20231227",
+    ]
+    assert rows["load_hours_20231227"].weights == [2, 1, 1.5, 1.5]
+    assert rows["load_break0_20231227"].indices == [1, 2]
+    assert rows["load_break0_20231227"].weights == [60, 30]
+    assert rows["load_break0_20231227"].bound == 75
+    assert rows["load_consecutive_0"].indices == [0, 1, 2]
+    assert rows["load_consecutive_1"].indices == [1, 2, 3]
+
+
+def test_load_rows_with_attended_events():
+    """Attended events use up limits, and leave nothing once they exceed them."""
+    events = [event(13, 14), event(14, 16)]
+    constraints = ScheduleConstraints(
+        max_hours_per_day=4,
+        breaks=[BreakWindow(start=time(12), end=time(14), minutes=30)],
+        attended=[event(10, 12), event(12, 13.5)],
+    )
+
+    rows = {row.name: row for row in constraints.load_rows(events)}
+
+    assert rows["load_hours_20231227"].indices == [0, 1]
+    assert rows["load_hours_20231227"].bound == 0.5
+    assert rows["load_break0_20231227"].indices == [0]
+    assert rows["load_break0_20231227"].bound == 0
+
+
+def test_load_rows_without_limits():
+    """Without limits on load, there are no rows."""
+    events = [event(10, 12), event(12, 13)]
+
+    assert ScheduleConstraints(earliest=time(10)).load_rows(events) == []
+    assert not ScheduleConstraints(earliest=time(10)).aggregated
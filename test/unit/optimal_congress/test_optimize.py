@@ -1,12 +1,29 @@
 """Test optimization functions."""
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from uuid import uuid4
 
+import pytest
 from pytz import timezone
 
-from optimal_congress.optimize import optimize_schedule
-from optimal_congress.schema import Event, EventRating, Rating
+from optimal_congress.constraints import ScheduleConstraints
+from optimal_congress.optimize import (
+    optimize_schedule,
+    solve_batch,
+    solve_rolling,
+    solve_schedule,
+)
+from optimal_congress.schema import (
+    Conflicts,
+    Event,
+    EventRating,
+    Formulation,
+    Rating,
+    Room,
+    TransitTimes,
+    WarmStart,
+)
+from optimal_congress.solvers import SolverOptions
 
 TZ_DE = timezone("Europe/Berlin")
 
@@ -15,7 +32,21 @@ UUID2 = uuid4()
 UUID3 = uuid4()
 
 
-def test_optimize_schedule() -> None:
+@pytest.mark.parametrize(
+    "solver, formulation",
+    [
+        ("auto", "pairwise"),
+        ("dp", "pairwise"),
+        ("cbc", "pairwise"),
+        ("cbc", "clique"),
+    ],
+)
+@pytest.mark.parametrize("workers", [None, 1, 2])
+def test_optimize_schedule(
+    solver: str,
+    formulation: Formulation,
+    workers: int | None,
+) -> None:
     # INPUT
     # event 'bar' overlaps with both other events
     event_ratings: set[EventRating] = {
@@ -64,7 +95,230 @@ def test_optimize_schedule() -> None:
     }
 
     # CALCULATION
-    scheduled_events = optimize_schedule(event_ratings)
+    scheduled_events = optimize_schedule(
+        event_ratings,
+        solver=solver,
+        options=SolverOptions(formulation=formulation),
+        workers=workers,
+    )
 
     # CHECK RESULT
     assert {event.slug for event in scheduled_events} == {"foo", "baz"}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_solve_batch(workers: int) -> None:
+    """Each attendee gets the optimal schedule for their own ratings."""
+    # INPUT
+    # event 'bar' overlaps with both other events
+    events = {
+        Event(
+            id=uuid,
+            name=name,
+            slug=name,
+            track=name,
+            assembly=name,
+            room=None,
+            description=name,
+            schedule_start=datetime(2023, 12, 27, start, tzinfo=TZ_DE),
+            schedule_end=datetime(2023, 12, 27, end, tzinfo=TZ_DE),
+        )
+        for uuid, name, start, end in [
+            (UUID1, "foo", 7, 9),
+            (UUID2, "bar", 8, 10),
+            (UUID3, "baz", 9, 12),
+        ]
+    }
+    scores = {
+        "alice": {UUID1: 8, UUID2: 10, UUID3: 5},
+        "bob": {UUID1: 2, UUID2: 10, UUID3: 5},
+        "carol": {UUID3: 1},
+    }
+    event_ratings = {
+        name: {
+            EventRating(event=event, rating=Rating(event_id=event.id, score=score))
+            for event in events
+            for event_id, score in attendee_scores.items()
+            if event.id == event_id
+        }
+        for name, attendee_scores in scores.items()
+    }
+
+    # CALCULATION
+    schedules = solve_batch(
+        event_ratings=event_ratings,
+        events=events,
+        solver="cbc",
+        workers=workers,
+    )
+
+    # CHECK RESULT
+    assert {
+        name: {event.slug for event in schedule.events}
+        for name, schedule in schedules.items()
+    } == {"alice": {"foo", "baz"}, "bob": {"bar"}, "carol": {"baz"}}
+
+
+@pytest.mark.parametrize("solver", ["dp", "cbc"])
+def test_solve_rolling(solver: str) -> None:
+    """Events of last schedule that started are kept, and others are re-optimized."""
+
+    # INPUT
+    # 'foo' was scheduled and is running at 8:30, 'qux' started before 8:30 but
+    # was not scheduled, and 'bar' and 'baz' start once 'foo' ended
+    def event_rating(name: str, start: float, end: float, score: float) -> EventRating:
+        """Create event from start to end hour on first day, with its rating."""
+        day = datetime(2023, 12, 27, tzinfo=TZ_DE)
+        event = Event(
+            id=uuid4(),
+            name=name,
+            slug=name,
+            track=name,
+            assembly=name,
+            room=None,
+            description=name,
+            schedule_start=day + timedelta(hours=start),
+            schedule_end=day + timedelta(hours=end),
+        )
+        return EventRating(event=event, rating=Rating(event_id=event.id, score=score))
+
+    foo = event_rating("foo", 7, 9, 1)
+    bar = event_rating("bar", 9, 10, 10)
+    baz = event_rating("baz", 10, 12, 5)
+    qux = event_rating("qux", 8, 11, 10)
+    quux = event_rating("quux", 9, 11, 20)  # overlaps 'bar' and 'baz'
+    early = event_rating("early", 8.75, 12, 100)  # overlaps running 'foo'
+    overlapping = event_rating("overlapping", 8, 12, 3)
+    warm_start = WarmStart(scheduled={foo.event.id, overlapping.event.id})
+
+    # CALCULATION
+    schedule = solve_rolling(
+        event_ratings={foo, bar, baz, qux, quux, early},
+        now=datetime(2023, 12, 27, 8, 30, tzinfo=TZ_DE),
+        warm_start=warm_start,
+        solver=solver,
+    )
+
+    # CHECK RESULT
+    # 'overlapping' was scheduled, but is not rated anymore
+    assert {event.slug for event in schedule.events} == {"foo", "quux"}
+    assert schedule.objective == 21
+    assert schedule.warm_start.scheduled == {foo.event.id, quux.event.id}
+    assert schedule.warm_start.model is None
+
+
+def test_solve_schedule_with_transit() -> None:
+    """Back-to-back events in distant rooms are not both scheduled with transit."""
+
+    # INPUT
+    rooms = [
+        Room(id=uuid4(), name="Saal 1", assembly="foo"),
+        Room(id=uuid4(), name="Saal 2", assembly="bar"),
+    ]
+    day = datetime(2023, 12, 27, tzinfo=TZ_DE)
+    event_ratings = set()
+    for name, room, hour, score in [("foo", 0, 10, 2), ("bar", 1, 11, 1)]:
+        event = Event(
+            id=uuid4(),
+            name=name,
+            slug=name,
+            track=name,
+            assembly=rooms[room].assembly,
+            room=rooms[room].id,
+            description=name,
+            schedule_start=day + timedelta(hours=hour),
+            schedule_end=day + timedelta(hours=hour + 1),
+        )
+        event_ratings.add(
+            EventRating(event=event, rating=Rating(event_id=event.id, score=score))
+        )
+
+    # CALCULATION
+    without_transit = solve_schedule(event_ratings=event_ratings)
+    with_transit = solve_schedule(
+        event_ratings=event_ratings, transit=TransitTimes.from_rooms(rooms)
+    )
+
+    # CHECK RESULT
+    assert {event.slug for event in without_transit.events} == {"foo", "bar"}
+    assert without_transit.solver == "dp"
+    assert {event.slug for event in with_transit.events} == {"foo"}
+    assert with_transit.solver == "cbc"
+    assert with_transit.warm_start.transit == TransitTimes.from_rooms(rooms)
+
+
+def test_solve_rolling_with_load_limits() -> None:
+    """Kept events count towards limits on load, e.g. hours of their day."""
+
+    # INPUT
+    # 'foo' is running at 8:30 and takes 2 of 3 hours of the day
+    def event_rating(name: str, start: float, end: float, score: float) -> EventRating:
+        """Create event from start to end hour on first day, with its rating."""
+        day = TZ_DE.localize(datetime(2023, 12, 27))
+        event = Event(
+            id=uuid4(),
+            name=name,
+            slug=name,
+            track=None,
+            assembly=name,
+            room=None,
+            description=name,
+            schedule_start=day + timedelta(hours=start),
+            schedule_end=day + timedelta(hours=end),
+        )
+        return EventRating(event=event, rating=Rating(event_id=event.id, score=score))
+
+    foo = event_rating("foo", 7, 9, 1)
+    bar = event_rating("bar", 9, 10, 10)
+    baz = event_rating("baz", 10, 12, 5)
+
+    # CALCULATION
+    schedule = solve_rolling(
+        event_ratings={foo, bar, baz},
+        now=TZ_DE.localize(datetime(2023, 12, 27, 8, 30)),
+        warm_start=WarmStart(scheduled={foo.event.id}),
+        constraints=ScheduleConstraints(max_hours_per_day=3),
+    )
+
+    # CHECK RESULT
+    # without 'foo', both 'bar' and 'baz' would fit into 3 hours
+    assert {event.slug for event in schedule.events} == {"foo", "bar"}
+    assert schedule.objective == 11
+
+
+@pytest.mark.parametrize("solver, found", [("auto", False), ("greedy", True)])
+def test_solve_schedule_finds_conflicts_lazily(solver: str, found: bool) -> None:
+    """Conflicts are only found if the chosen solver uses them."""
+
+    # INPUT
+    day = TZ_DE.localize(datetime(2023, 12, 27))
+    event_ratings = set()
+    for name, hour in [("foo", 10), ("bar", 11)]:
+        event = Event(
+            id=uuid4(),
+            name=name,
+            slug=name,
+            track=None,
+            assembly=name,
+            room=None,
+            description=name,
+            schedule_start=day + timedelta(hours=hour),
+            schedule_end=day + timedelta(hours=hour + 2),
+        )
+        event_ratings.add(
+            EventRating(event=event, rating=Rating(event_id=event.id, score=1))
+        )
+    calls: list[None] = []
+
+    def find_conflicts() -> Conflicts:
+        calls.append(None)
+        return Conflicts.from_events([rating.event for rating in event_ratings])
+
+    # CALCULATION
+    schedule = solve_schedule(
+        event_ratings=event_ratings, solver=solver, conflicts=find_conflicts
+    )
+
+    # CHECK RESULT
+    assert len(schedule.events) == 1
+    assert len(calls) == (1 if found else 0)
@@ -0,0 +1,67 @@
+"""Tests for the timing of phases."""
+
+import json
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from optimal_congress.profiling import phase, start_profiling, stop_profiling
+
+
+@pytest.fixture(autouse=True)
+def stop() -> Iterator[None]:
+    """Stop profiling after each test."""
+    yield
+    stop_profiling()
+
+
+@phase("decorated")
+def decorated() -> int:
+    """Return a constant, within a phase."""
+    return 42
+
+
+def test_phases_without_profiling():
+    """Without profiling, phases are not recorded."""
+    with phase("foo"):
+        pass
+
+    assert decorated() == 42
+    assert stop_profiling() is None
+
+
+def test_nested_phases():
+    """Time of nested phases is only counted for the innermost phase."""
+    profiler = start_profiling()
+    with phase("outer"):
+        time.sleep(0.01)
+        with phase("inner"):
+            time.sleep(0.02)
+    assert decorated() == 42
+    assert decorated() == 42
+    stop_profiling()
+
+    summary = profiler.summary()
+    assert list(summary) == ["outer", "inner", "decorated"]
+    assert summary["decorated"][1] == 2
+    outer, inner = summary["outer"][0], summary["inner"][0]
+    assert 0.01 <= outer < 0.02 <= inner
+    assert sum(seconds for seconds, _ in summary.values()) <= profiler.total
+    assert "outer" in profiler.report()
+
+
+def test_save_trace(tmp_path: Path):
+    """Trace lists each run of a phase, with its duration in microseconds."""
+    profiler = start_profiling()
+    with phase("foo"):
+        time.sleep(0.001)
+    stop_profiling()
+
+    profiler.save_trace(tmp_path / "trace.json")
+    trace = json.loads((tmp_path / "trace.json").read_text())
+
+    assert [event["name"] for event in trace["traceEvents"]] == ["foo"]
+    assert trace["traceEvents"][0]["dur"] >= 1000
+    assert trace["summary"]["foo"]["runs"] == 1
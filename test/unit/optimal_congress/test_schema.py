@@ -1,12 +1,28 @@
 """Tests for the models of the congress_optimizer app."""
 
-from datetime import datetime
+import random
+from datetime import datetime, timedelta
 from uuid import uuid4
 
 import pytest
 from pytz import timezone
 
-from optimal_congress.schema import Event, EventLanguage, events_overlap, parse_language
+from optimal_congress.schema import (
+    Conflicts,
+    Event,
+    EventLanguage,
+    Formulation,
+    Room,
+    TransitTimes,
+    events_conflict,
+    events_overlap,
+    find_conflicting_pairs,
+    find_overlap_cliques,
+    find_overlap_components,
+    find_overlapping_pairs,
+    index_rooms,
+    parse_language,
+)
 
 TZ_DE = timezone("Europe/Berlin")
 
@@ -107,6 +123,198 @@ def test_events_overlap(event1: Event, event2: Event, expected: bool):
     assert result1 == expected
 
 
+def random_events(n: int, seed: int = 42) -> list[Event]:
+    """Generate events on a 15 minute grid, including zero-length events."""
+    rng = random.Random(seed)
+    start = datetime(2023, 12, 27, 10, tzinfo=TZ_DE)
+    events = []
+    for i in range(n):
+        schedule_start = start + timedelta(minutes=15 * rng.randint(0, 100))
+        events.append(
+            Event(
+                id=uuid4(),
+                name=f"event {i}",
+                slug=f"event-{i}",
+                track=None,
+                assembly="foo",
+                room=None,
+                description="foo",
+                schedule_start=schedule_start,
+                # include zero-length events, which must only overlap strictly
+                schedule_end=schedule_start + timedelta(minutes=15 * rng.randint(0, 8)),
+            )
+        )
+    return events
+
+
+def test_find_overlapping_pairs():
+    """Sweep-line overlap detection matches pairwise comparison of all events."""
+    events = random_events(200)
+
+    expected = {
+        (i, j)
+        for i in range(len(events))
+        for j in range(i + 1, len(events))
+        if events_overlap(events[i], events[j])
+    }
+    result = find_overlapping_pairs(events)
+
+    assert len(result) == len(set(result))
+    assert set(result) == expected
+
+
+def test_find_overlap_cliques():
+    """Cliques consist of overlapping events, and cover all overlapping pairs."""
+    events = random_events(200)
+
+    cliques = find_overlap_cliques(events)
+    covered_pairs = {
+        (min(i, j), max(i, j)) for clique in cliques for i in clique for j in clique
+    }
+
+    # all events within a clique overlap each other
+    for clique in cliques:
+        assert len(clique) > 1
+        for i in clique:
+            for j in clique:
+                assert i == j or events_overlap(events[i], events[j])
+    # every overlapping pair is covered by some clique
+    assert set(find_overlapping_pairs(events)) <= covered_pairs
+    # cliques need far fewer constraints than pairs
+    assert len(cliques) < len(find_overlapping_pairs(events))
+
+
+def test_find_overlap_components():
+    """Components partition events, and no pair overlaps across components."""
+    # spread events over several days, with gaps in between
+    events = [
+        event.model_copy(
+            update={
+                "schedule_start": event.schedule_start + timedelta(days=i % 3),
+                "schedule_end": event.schedule_end + timedelta(days=i % 3),
+            }
+        )
+        for i, event in enumerate(random_events(200))
+    ]
+
+    components = find_overlap_components(events)
+    component_of = {i: k for k, component in enumerate(components) for i in component}
+
+    assert sorted(component_of) == list(range(len(events)))
+    for i, j in find_overlapping_pairs(events):
+        assert component_of[i] == component_of[j]
+    assert len(components) > 1
+
+
+# rooms of two assemblies, with a walking time between the first two rooms
+ROOMS = [
+    Room(id=uuid4(), name="Saal 1", assembly="foo"),
+    Room(id=uuid4(), name="Saal 2", assembly="foo"),
+    Room(id=uuid4(), name="Saal 3", assembly="bar"),
+]
+TRANSIT = TransitTimes.from_rooms(ROOMS, matrix={ROOMS[0].id: {ROOMS[1].id: 20}})
+
+
+@pytest.mark.parametrize(
+    "source, target, expected",
+    [
+        (ROOMS[0].id, ROOMS[0].id, 0),  # same room
+        (ROOMS[0].id, None, 0),  # e.g. online event
+        (ROOMS[0].id, ROOMS[1].id, 20),  # from matrix
+        (ROOMS[1].id, ROOMS[0].id, 20),  # from matrix, in reverse direction
+        (ROOMS[1].id, ROOMS[2].id, 10),  # other assembly
+        (ROOMS[1].id, uuid4(), 10),  # unknown room
+    ],
+)
+def test_transit_minutes(source, target, expected):
+    """Transit is looked up in matrix, and defaults by assemblies of rooms."""
+    assert TRANSIT.minutes(source, target) == expected
+    assert TRANSIT.minutes(source, target) <= TRANSIT.max_minutes(source)
+
+
+def test_transit_key():
+    """Key of transit times does not depend on the order of rooms."""
+    matrix = {ROOMS[0].id: {ROOMS[1].id: 20.0, ROOMS[2].id: 15.0}}
+    reordered = {ROOMS[0].id: {ROOMS[2].id: 15.0, ROOMS[1].id: 20.0}}
+    transit = TransitTimes.from_rooms(ROOMS, matrix=matrix)
+
+    assert transit.key() == TransitTimes.from_rooms(ROOMS[::-1], matrix=reordered).key()
+    assert transit.key() != TransitTimes.from_rooms(ROOMS, matrix={}).key()
+    assert transit.key() != TransitTimes.from_rooms(ROOMS, same_assembly=3).key()
+
+
+def test_find_conflicting_pairs():
+    """Conflicts with transit match pairwise comparison, and include overlaps."""
+    rng = random.Random(0)
+    # some events without room, which need no transit
+    events = [
+        event.model_copy(update={"room": rng.choice([room.id for room in ROOMS])})
+        if i % 4
+        else event
+        for i, event in enumerate(random_events(200))
+    ]
+
+    expected = {
+        (i, j)
+        for i in range(len(events))
+        for j in range(i + 1, len(events))
+        if events_conflict(events[i], events[j], transit=TRANSIT)
+    }
+    result = find_conflicting_pairs(events, transit=TRANSIT)
+
+    assert len(result) == len(set(result))
+    assert set(result) == expected
+    assert set(find_overlapping_pairs(events)) < expected
+    assert set(find_conflicting_pairs(events)) == set(find_overlapping_pairs(events))
+
+    # components with transit keep conflicting events together
+    components = find_overlap_components(events, transit=TRANSIT)
+    component_of = {i: k for k, component in enumerate(components) for i in component}
+    assert all(component_of[i] == component_of[j] for i, j in expected)
+
+    # clique conflicts cover the same pairs
+    cliques = Conflicts.from_events(events, formulation="clique", transit=TRANSIT)
+    covered_pairs = {
+        (min(i, j), max(i, j))
+        for group in cliques.groups
+        for i in group
+        for j in group
+        if i != j
+    }
+    assert covered_pairs == expected
+
+
+@pytest.mark.parametrize("formulation", ["pairwise", "clique"])
+def test_conflicts_restrict(formulation: Formulation):
+    """Restricted conflicts cover the overlapping pairs of the subset of events."""
+    events = random_events(200)
+    subset = random.Random(0).sample(events, 50)
+
+    conflicts = Conflicts.from_events(events, formulation=formulation)
+    restricted = conflicts.restrict(subset)
+    covered_pairs = {
+        (min(i, j), max(i, j))
+        for group in restricted.groups
+        for i in group
+        for j in group
+        if i != j
+    }
+
+    assert restricted.event_ids == [event.id for event in subset]
+    assert all(len(group) > 1 for group in restricted.groups)
+    assert covered_pairs == set(find_overlapping_pairs(subset))
+
+
+def test_index_rooms():
+    """Rooms are indexed by their ID."""
+    rooms = [Room(id=uuid4(), name=f"room {i}", assembly="foo") for i in range(3)]
+
+    index = index_rooms(rooms)
+
+    assert index == {room.id: room for room in rooms}
+    assert index[rooms[1].id].name == "room 1"
+
+
 def test_event_is_equal():
     """Assure that events with same id are equal."""
     event1 = Event(
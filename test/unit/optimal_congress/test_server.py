@@ -0,0 +1,139 @@
+"""Tests for the server, which keeps the cache in memory."""
+
+import json
+import threading
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+from urllib.error import HTTPError
+from urllib.request import urlopen
+from uuid import uuid4
+
+import pytest
+from pytz import timezone
+
+from optimal_congress import server
+from optimal_congress.io import cache
+from optimal_congress.optimize import Schedule, solve_schedule
+from optimal_congress.schema import Event, Rating, Room
+from optimal_congress.server import CacheState, ScheduleServer
+from optimal_congress.solvers import SolverOptions
+
+TZ_DE = timezone("Europe/Berlin")
+
+
+@pytest.fixture
+def state(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> CacheState:
+    """State of a temporary cache, with events of the next days."""
+    monkeypatch.setattr(cache, "FILE_EVENTS_CACHE", tmp_path / "events/events.json")
+    monkeypatch.setattr(cache, "FILE_ROOMS_CACHE", tmp_path / "rooms/rooms.json")
+    monkeypatch.setattr(cache, "DIR_EVENTS_CACHE", tmp_path / "events")
+    monkeypatch.setattr(cache, "DIR_ROOMS_CACHE", tmp_path / "rooms")
+    monkeypatch.setattr(cache, "DIR_CONFLICTS_CACHE", tmp_path / "conflicts")
+
+    # event 'bar' overlaps with both other events
+    room = Room(id=uuid4(), name="room", assembly="foo")
+    start = datetime.now(tz=TZ_DE).replace(microsecond=0) + timedelta(days=1)
+    events = [
+        Event(
+            id=uuid4(),
+            name=name,
+            slug=name,
+            track=None,
+            assembly="foo",
+            room=room.id,
+            description="foo",
+            schedule_start=start + timedelta(hours=begin),
+            schedule_end=start + timedelta(hours=end),
+        )
+        for name, begin, end in [("foo", 0, 2), ("bar", 1, 3), ("baz", 2, 5)]
+    ]
+    cache.save_events(set(events))
+    cache.save_rooms({room})
+    cache.save_ratings(
+        {
+            Rating(event_id=event.id, score=score)
+            for event, score in zip(events, [8, 10, 5])
+        },
+        directory=tmp_path / "alice",
+    )
+
+    return CacheState(ratings_dirs={"alice": tmp_path / "alice"})
+
+
+@pytest.fixture
+def server_url(state: CacheState) -> Iterator[str]:
+    """Serve the state of a temporary cache, on a free port."""
+    schedule_server = ScheduleServer(("127.0.0.1", 0), state)
+    thread = threading.Thread(target=schedule_server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{schedule_server.server_port}"
+    schedule_server.shutdown()
+    schedule_server.server_close()
+
+
+def get(url: str) -> dict:
+    """Get JSON response of server."""
+    with urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def test_queries(server_url: str, tmp_path: Path) -> None:
+    """Queries are answered from cache, and reflect changes of ratings."""
+    next_events = get(f"{server_url}/next?rating=6")["events"]
+    assert [event["name"] for event in next_events] == ["foo", "bar"]
+    assert next_events[0]["room_name"] == "room"
+
+    ratings = get(f"{server_url}/ratings")["ratings"]
+    assert [rating["score"] for rating in ratings] == [10, 8, 5]
+
+    schedule = get(f"{server_url}/optimize?attendee=alice&solver=dp")
+    assert [event["name"] for event in schedule["events"]] == ["foo", "baz"]
+
+    # new rating of 'bar' is picked up without restart
+    bar_id = next(rating["event"]["id"] for rating in ratings if rating["score"] == 10)
+    cache.save_ratings(
+        {Rating(event_id=bar_id, score=20)}, directory=tmp_path / "alice"
+    )
+    schedule = get(f"{server_url}/optimize?solver=dp")
+    assert [event["name"] for event in schedule["events"]] == ["bar"]
+
+
+@pytest.mark.parametrize(
+    "path, status",
+    [("/unknown", 404), ("/next?attendee=bob", 400), ("/optimize?solver=foo", 400)],
+)
+def test_invalid_queries(server_url: str, path: str, status: int) -> None:
+    """Invalid queries are answered with an error."""
+    with pytest.raises(HTTPError) as error:
+        get(f"{server_url}{path}")
+    assert error.value.code == status
+
+
+def test_schedule_of_reloaded_state(
+    state: CacheState, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Schedules solved while the state is reloaded are not kept."""
+    state.refresh()
+    bar = next(
+        event_rating.event
+        for event_rating in state.get_event_ratings("alice")
+        if event_rating.event.name == "bar"
+    )
+
+    def solve_during_refresh(**kwargs: Any) -> Schedule:
+        """Change a rating and reload the state, while solving."""
+        cache.save_ratings(
+            {Rating(event_id=bar.id, score=20)}, directory=tmp_path / "alice"
+        )
+        state.refresh()
+        return solve_schedule(**kwargs)
+
+    monkeypatch.setattr(server, "solve_schedule", solve_during_refresh)
+    stale = state.get_schedule("alice", 0, solver="dp", options=SolverOptions())
+    monkeypatch.setattr(server, "solve_schedule", solve_schedule)
+    current = state.get_schedule("alice", 0, solver="dp", options=SolverOptions())
+
+    assert {event.name for event in stale.events} == {"foo", "baz"}
+    assert {event.name for event in current.events} == {"bar"}
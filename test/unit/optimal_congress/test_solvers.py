@@ -0,0 +1,244 @@
+"""Tests for the solver backends."""
+
+import random
+from datetime import datetime, time, timedelta
+from uuid import uuid4
+
+import pytest
+from pytz import timezone
+
+from optimal_congress.constraints import BreakWindow, ScheduleConstraints
+from optimal_congress.schema import Event, events_overlap
+from optimal_congress.solvers import (
+    SOLVERS,
+    ScheduleProblem,
+    SolverOptions,
+    SolverResult,
+    get_solver,
+    register_solver,
+)
+
+TZ_DE = timezone("Europe/Berlin")
+
+
+def random_problem(n: int, seed: int = 42) -> ScheduleProblem:
+    """Generate events on a 15 minute grid, with random integer scores."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        schedule_start = datetime(2023, 12, 27, 10, tzinfo=TZ_DE) + timedelta(
+            minutes=15 * rng.randint(0, 60)
+        )
+        events.append(
+            Event(
+                id=uuid4(),
+                name=f"event {i}",
+                slug=f"event-{i}",
+                track=None,
+                assembly="foo",
+                room=None,
+                description="foo",
+                schedule_start=schedule_start,
+                schedule_end=schedule_start + timedelta(minutes=15 * rng.randint(1, 8)),
+            )
+        )
+    scores = [float(rng.randint(0, 10)) for _ in events]
+    return ScheduleProblem(events=events, scores=scores)
+
+
+def total_score(problem: ScheduleProblem, result: SolverResult) -> float:
+    """Sum up scores of scheduled events, asserting that none overlap."""
+    for i in result.scheduled:
+        for j in result.scheduled:
+            assert i == j or not events_overlap(problem.events[i], problem.events[j])
+    score = sum([problem.scores[i] for i in result.scheduled])
+    assert score == pytest.approx(result.objective)
+    return score
+
+
+@pytest.mark.parametrize(
+    "solver, options",
+    [
+        ("cbc", SolverOptions(formulation="pairwise")),
+        ("cbc", SolverOptions(formulation="clique", threads=2)),
+        ("highs", SolverOptions(formulation="clique")),
+    ],
+)
+def test_exact_solvers_agree(solver: str, options: SolverOptions) -> None:
+    """Exact solvers yield schedules of equal total score as dynamic program."""
+    problem = random_problem(60)
+    if solver == "highs":
+        try:
+            get_solver(solver)(problem, options)
+        except ValueError:
+            pytest.skip("HiGHS is not available.")
+
+    expected = total_score(problem, get_solver("dp")(problem, SolverOptions()))
+    result = total_score(problem, get_solver(solver)(problem, options))
+
+    assert result == expected
+
+
+@pytest.mark.parametrize("solver", ["cbc", "highs"])
+def test_anytime_reports_gap(solver: str) -> None:
+    """With a time limit, MILP solvers report status and gap of their solution."""
+    problem = random_problem(200)
+    options = SolverOptions(time_limit=10)
+    try:
+        result = get_solver(solver)(problem, options)
+    except ValueError:
+        pytest.skip(f"{solver} is not available.")
+
+    assert result.status in ("optimal", "feasible")
+    assert result.gap is not None
+    assert result.gap >= 0
+    assert total_score(problem, result) > 0
+
+
+def test_greedy_is_feasible() -> None:
+    """Greedy heuristic yields a feasible schedule, no better than the optimum."""
+    problem = random_problem(60)
+
+    optimum = total_score(problem, get_solver("dp")(problem, SolverOptions()))
+    result = total_score(problem, get_solver("greedy")(problem, SolverOptions()))
+
+    assert 0 < result <= optimum
+
+
+# limits that are all active on the events of `random_problem`
+LIMITS = ScheduleConstraints(
+    max_hours_per_day=4,
+    breaks=[BreakWindow(start=time(12), end=time(14), minutes=60)],
+    max_consecutive=2,
+    consecutive_window=120,
+)
+
+
+def within_limits(problem: ScheduleProblem, result: SolverResult) -> bool:
+    """Check that scheduled events stay within all limits on load."""
+    scheduled = set(result.scheduled)
+    return all(
+        sum([w for i, w in zip(row.indices, row.weights) if i in scheduled])
+        <= row.bound + 1e-9
+        for row in problem.load_rows()
+    )
+
+
+@pytest.mark.parametrize("solver", ["cbc", "greedy"])
+def test_load_limits(solver: str) -> None:
+    """Solvers keep limits on load, at the cost of total score."""
+    problem = random_problem(60)
+    limited = problem.model_copy(update={"constraints": LIMITS})
+    assert len(limited.load_rows()) > 3
+
+    unlimited = total_score(problem, get_solver("dp")(problem, SolverOptions()))
+    result = get_solver(solver)(limited, SolverOptions())
+
+    assert within_limits(limited, result)
+    assert 0 < total_score(limited, result) < unlimited
+    with pytest.raises(ValueError):
+        get_solver("dp")(limited, SolverOptions())
+
+
+def test_anytime_hits_time_limit() -> None:
+    """If the time limit is hit before CBC finds a solution, a feasible one is kept."""
+    problem = random_problem(500).model_copy(update={"constraints": LIMITS})
+
+    result = get_solver("cbc")(problem, SolverOptions(time_limit=0.01))
+
+    assert result.status == "feasible"
+    assert within_limits(problem, result)
+    assert total_score(problem, result) > 0
+
+
+@pytest.mark.parametrize("constraints", [None, LIMITS])
+def test_anytime_on_large_problem(constraints: ScheduleConstraints | None) -> None:
+    """A schedule is found at the time limit, even if CBC fails with a MIP start."""
+    problem = random_problem(1000).model_copy(update={"constraints": constraints})
+
+    result = get_solver("cbc")(problem, SolverOptions(time_limit=1))
+
+    assert result.status == "feasible"
+    assert within_limits(problem, result)
+    assert total_score(problem, result) > 0
+
+
+def test_register_solver() -> None:
+    """Registered backends can be looked up by name, unknown names raise."""
+
+    @register_solver("nothing")
+    def solve_nothing(problem: ScheduleProblem, options: SolverOptions) -> SolverResult:
+        return SolverResult(scheduled=[], status="feasible", objective=0)
+
+    try:
+        assert get_solver("nothing") is solve_nothing
+    finally:
+        del SOLVERS["nothing"]
+
+    with pytest.raises(ValueError):
+        get_solver("nothing")
+
+
+def test_warm_start() -> None:
+    """Patched previous programs yield optimal schedules for changed problems."""
+    problem = random_problem(60)
+    cbc = get_solver("cbc")
+    dp = get_solver("dp")
+    options = SolverOptions()
+    previous = cbc(problem, options).warm_start
+    assert previous is not None and previous.model is not None
+
+    # changed scores, and removed events
+    changed = ScheduleProblem(
+        events=problem.events[:40],
+        scores=[10 - score for score in problem.scores[:40]],
+        warm_start=previous,
+    )
+    result = cbc(changed, options)
+    assert total_score(changed, result) == total_score(changed, dp(changed, options))
+
+    # re-added events, which must not overlap with each other
+    readded = problem.model_copy(update={"warm_start": result.warm_start})
+    result = cbc(readded, options)
+    assert total_score(readded, result) == total_score(readded, dp(readded, options))
+
+    # added limits on load, which replace those of previous program
+    limited = problem.model_copy(
+        update={"warm_start": result.warm_start, "constraints": LIMITS}
+    )
+    result = cbc(limited, options)
+    expected = cbc(limited.model_copy(update={"warm_start": None}), options)
+    assert within_limits(limited, result)
+    assert total_score(limited, result) == total_score(limited, expected)
+
+
+def test_warm_start_with_load_limits() -> None:
+    """Events removed from a program with load limits do not break patching."""
+    start = datetime(2023, 12, 27, 10, tzinfo=TZ_DE)
+    # back to back, so that the last event is in no overlap constraint
+    events = [
+        Event(
+            id=uuid4(),
+            name=f"event {i}",
+            slug=f"event-{i}",
+            track=None,
+            assembly="foo",
+            room=None,
+            description="foo",
+            schedule_start=start + timedelta(hours=i),
+            schedule_end=start + timedelta(hours=i + 1),
+        )
+        for i in range(4)
+    ]
+    limits = ScheduleConstraints(max_hours_per_day=2)
+    cbc = get_solver("cbc")
+    problem = ScheduleProblem(events=events, scores=[1.0] * 4, constraints=limits)
+    previous = cbc(problem, SolverOptions()).warm_start
+
+    removed = ScheduleProblem(
+        events=events[:3], scores=[1.0] * 3, constraints=limits, warm_start=previous
+    )
+    result = cbc(removed, SolverOptions())
+
+    assert within_limits(removed, result)
+    assert total_score(removed, result) == 2
@@ -0,0 +1,186 @@
+"""Tests for the column store of events."""
+
+import random
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from pytz import timezone
+
+from optimal_congress.io.cache import EVENTS_ADAPTER
+from optimal_congress.schema import (
+    Conflicts,
+    Event,
+    EventLanguage,
+    Formulation,
+    Rating,
+    Room,
+    TransitTimes,
+    find_conflicting_pairs,
+    find_overlapping_pairs,
+)
+from optimal_congress.store import EventStore
+
+TZ_DE = timezone("Europe/Berlin")
+
+
+def random_events(n: int, seed: int = 42) -> list[Event]:
+    """Generate events on a 15 minute grid, including zero-length events."""
+    rng = random.Random(seed)
+    start = datetime(2023, 12, 27, 10, tzinfo=TZ_DE)
+    rooms = [uuid4(), uuid4(), None]
+    languages: list[list[EventLanguage] | None] = [["de"], ["en"], ["de", "en"], None]
+    events = []
+    for i in range(n):
+        schedule_start = start + timedelta(minutes=15 * rng.randint(0, 100))
+        events.append(
+            Event(
+                id=uuid4(),
+                name=f"event {i}",
+                slug=f"event-{i}",
+                track=rng.choice(["foo", "bar", None]),
+                assembly="foo",
+                room=rng.choice(rooms),
+                language=rng.choice(languages),
+                description="foo",
+                schedule_start=schedule_start,
+                schedule_end=schedule_start + timedelta(minutes=15 * rng.randint(0, 8)),
+            )
+        )
+    return events
+
+
+def test_from_json():
+    """Store of the events cache holds the same events as the cache."""
+    events = random_events(50)
+
+    store = EventStore.from_json(EVENTS_ADAPTER.dump_json(events))
+
+    assert len(store) == len(events)
+    for event, stored in zip(events, store.events()):
+        assert stored.model_dump() == event.model_dump()
+    assert sorted(store.tracks) == ["bar", "foo"]
+    assert [None if code < 0 else store.tracks[code] for code in store.track_codes] == [
+        event.track for event in events
+    ]
+
+
+def test_key():
+    """Key of events depends on their IDs and times, but not on their order."""
+    events = random_events(50)
+    moved = events[0].model_copy(
+        update={"schedule_end": events[0].schedule_end + timedelta(minutes=15)}
+    )
+    renamed = events[0].model_copy(update={"name": "foo"})
+
+    def key(events: list[Event]) -> bytes:
+        """Key of store of events, as loaded from the events cache."""
+        return EventStore.from_json(EVENTS_ADAPTER.dump_json(events)).key()
+
+    assert key(events) == EventStore.from_events(events).key()
+    assert key(events) == key(events[::-1])
+    assert key(events) == key([renamed, *events[1:]])
+    assert key(events) != key([moved, *events[1:]])
+    assert key(events) != key(events[1:])
+    assert len(EventStore([]).key()) == 16
+
+
+def test_overlapping_pairs():
+    """Vectorized overlap detection matches the sweep over models."""
+    events = random_events(200)
+
+    pairs = [tuple(pair) for pair in EventStore.from_events(events).overlapping_pairs()]
+
+    assert len(pairs) == len(set(pairs))
+    assert set(pairs) == set(find_overlapping_pairs(events))
+
+
+@pytest.mark.parametrize("formulation", ["pairwise", "clique"])
+def test_conflicts(formulation: Formulation):
+    """Conflicts of store match conflicts found on models."""
+    events = random_events(100)
+
+    conflicts = EventStore.from_events(events).conflicts(formulation)
+    expected = Conflicts.from_events(events, formulation=formulation)
+
+    assert conflicts.event_ids == expected.event_ids
+    assert sorted(map(sorted, conflicts.groups)) == sorted(map(sorted, expected.groups))
+
+
+@pytest.mark.parametrize("formulation", ["pairwise", "clique"])
+def test_conflicts_with_transit(formulation: Formulation):
+    """Vectorized conflicts with transit match conflicts found on models."""
+    events = random_events(200)
+    rooms = {event.room for event in events if event.room is not None}
+    transit = TransitTimes.from_rooms(
+        [Room(id=room, name=str(room), assembly="foo") for room in rooms],
+        matrix={min(rooms): {max(rooms): 25}},
+    )
+    store = EventStore.from_events(events)
+
+    pairs = {tuple(pair) for pair in store.conflicting_pairs(transit).tolist()}
+    conflicts = store.conflicts(formulation, transit=transit)
+    expected = Conflicts.from_events(events, formulation=formulation, transit=transit)
+
+    assert pairs == set(find_conflicting_pairs(events, transit=transit))
+    assert pairs > {tuple(pair) for pair in store.overlapping_pairs().tolist()}
+    assert sorted(map(sorted, conflicts.groups)) == sorted(map(sorted, expected.groups))
+
+
+@pytest.mark.parametrize("language", ["de", "en"])
+def test_language_mask(language: EventLanguage):
+    """Language mask matches languages of events."""
+    events = random_events(50)
+
+    mask = EventStore.from_events(events).language_mask(language)
+
+    assert mask.tolist() == [language in (event.language or []) for event in events]
+
+
+def test_upcoming():
+    """Upcoming events are rated highly enough, start after now, and are sorted."""
+    events = random_events(100)
+    ratings = [
+        Rating(event_id=event.id, score=i % 10) for i, event in enumerate(events)
+    ]
+    now = datetime(2023, 12, 27, 20, tzinfo=TZ_DE)
+
+    store = EventStore.from_json(EVENTS_ADAPTER.dump_json(events))
+    upcoming = store.upcoming(
+        scores=store.scores(ratings), min_rating=5, now=now, num_events=10
+    )
+
+    expected = sorted(
+        (
+            event
+            for event, rating in zip(events, ratings)
+            if rating.score >= 5 and event.schedule_start > now
+        ),
+        key=lambda event: event.schedule_start,
+    )
+    assert [event.schedule_start for event in upcoming] == [
+        event.schedule_start for event in expected[:10]
+    ]
+    assert {event.id for event in upcoming} <= {event.id for event in expected}
+
+
+def test_scores_and_join_ratings():
+    """Unrated events score NaN, and only rated events above minimum are joined."""
+    events = random_events(10)
+    ratings = {
+        Rating(event_id=events[0].id, score=3),
+        Rating(event_id=events[1].id, score=7),
+        Rating(event_id=uuid4(), score=9),  # unknown event
+    }
+
+    store = EventStore.from_json(EVENTS_ADAPTER.dump_json(events))
+    scores = store.scores(ratings)
+
+    assert scores[:2].tolist() == [3, 7]
+    assert np.isnan(scores[2:]).all()
+    assert {event_rating.event for event_rating in store.join_ratings(ratings, 5)} == {
+        events[1]
+    }
+    # models are only built for joined events
+    assert list(store._events) == [1]